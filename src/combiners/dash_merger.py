@@ -13,6 +13,7 @@ DASH Merger - 跨平台DASH视频分段合并工具
 
 import os
 import re
+import sys
 import shutil
 import subprocess
 import tempfile
@@ -21,13 +22,30 @@ from pathlib import Path
 from typing import List, Dict, Optional, Tuple
 import time
 
+# m4s文件名格式：P1-450.056-792.500-0001.m4s
+_M4S_RE = re.compile(r'^P(\d+)-(\d+\.?\d*)-(\d+\.?\d*)-(\d+)\.m4s$')
+
+# 分段拷贝缓冲区大小（足以容纳常见的单个m4s分段）
+DEFAULT_SCRATCH_SIZE = 8 * 1024 * 1024
+
+# Linux 的 sendfile 支持普通文件作为目标；macOS/Windows 走缓冲区拷贝
+_USE_SENDFILE = sys.platform.startswith('linux') and hasattr(os, 'sendfile')
+
+
 class DashMerger:
     """DASH视频分段合并器"""
     
-    def __init__(self, verbose: bool = False):
+    def __init__(self, verbose: bool = False, scratch: Optional[bytearray] = None):
+        """
+        Args:
+            verbose: 详细日志
+            scratch: 可复用的拷贝缓冲区，由调用方（如批量工作进程）提供；
+                     为None时在首次合并时按 DEFAULT_SCRATCH_SIZE 分配一次
+        """
         self.verbose = verbose
         self.logger = self._setup_logging()
         self.temp_dirs = []  # 用于清理
+        self.scratch = scratch
     
     def _setup_logging(self) -> logging.Logger:
         """设置日志"""
@@ -51,15 +69,14 @@ class DashMerger:
             self.logger.error("FFmpeg not found. Please install FFmpeg")
             return False
     
-    def parse_m4s_filename(self, filename: str) -> Optional[Dict[str, str]]:
+    @staticmethod
+    def parse_m4s_filename(filename: str) -> Optional[Dict[str, str]]:
         """解析m4s文件名格式: P<identifier>-<start>-<end>-<sequenceNumber>.m4s
         
         兼容Segment2Motrix.js输出格式:
         P${i+1}-${segmentPartStart.toFixed(3)}-${segmentPartEnd.toFixed(3)}-${sequenceNumber}.m4s
         """
-        # 匹配格式：P1-450.056-792.500-0001.m4s
-        pattern = r'^P(\d+)-(\d+\.?\d*)-(\d+\.?\d*)-(\d+)\.m4s$'
-        match = re.match(pattern, filename)
+        match = _M4S_RE.match(filename)
         if match:
             return {
                 'identifier': match.group(1),    # P后的数字 (段落标识符)
@@ -132,8 +149,13 @@ class DashMerger:
         
         return m4s_files
     
-    def merge_binary_files(self, target_file: Path, source_file: Path, max_retries: int = 3) -> bool:
-        """二进制文件合并（带重试机制）"""
+    def merge_binary_files(self, dst_fd: int, source_file: Path, max_retries: int = 3) -> bool:
+        """把单个分段追加到已打开的目标文件（带重试机制）
+        
+        Linux 上使用 os.sendfile 在内核中完成拷贝；其他平台复用 scratch 缓冲区。
+        失败重试前会把目标文件截断回本次追加前的长度，避免残留半个分段。
+        """
+        start_offset = os.lseek(dst_fd, 0, os.SEEK_END)
         for attempt in range(max_retries):
             try:
                 # 检查源文件
@@ -142,17 +164,20 @@ class DashMerger:
                     return False
                 
                 # 合并文件
-                with open(source_file, 'rb') as src:
-                    mode = 'ab' if target_file.exists() else 'wb'
-                    with open(target_file, mode) as dst:
-                        shutil.copyfileobj(src, dst)
+                with open(source_file, 'rb', buffering=0) as src:
+                    if _USE_SENDFILE:
+                        self._sendfile_copy(dst_fd, src.fileno())
+                    else:
+                        self._buffered_copy(dst_fd, src)
                 
-                self.logger.debug(f"Merged: {source_file.name} -> {target_file.name}")
+                self.logger.debug(f"Merged: {source_file.name}")
                 return True
                 
             except (IOError, OSError) as e:
                 self.logger.warning(f"Merge attempt {attempt + 1} failed: {e}")
                 if attempt < max_retries - 1:
+                    os.ftruncate(dst_fd, start_offset)
+                    os.lseek(dst_fd, start_offset, os.SEEK_SET)
                     time.sleep(0.2)
                 else:
                     self.logger.error(f"Failed to merge after {max_retries} attempts")
@@ -160,6 +185,31 @@ class DashMerger:
         
         return False
     
+    @staticmethod
+    def _sendfile_copy(dst_fd: int, src_fd: int):
+        """零拷贝：由内核直接把源文件内容写入目标文件"""
+        remaining = os.fstat(src_fd).st_size
+        offset = 0
+        while remaining > 0:
+            sent = os.sendfile(dst_fd, src_fd, offset, remaining)
+            if sent == 0:
+                break
+            offset += sent
+            remaining -= sent
+    
+    def _buffered_copy(self, dst_fd: int, src):
+        """复用 scratch 缓冲区读入/写出，避免每个分段重新分配"""
+        if self.scratch is None:
+            self.scratch = bytearray(DEFAULT_SCRATCH_SIZE)
+        view = memoryview(self.scratch)
+        while True:
+            n = src.readinto(view)
+            if not n:
+                break
+            chunk = view[:n]
+            while chunk:
+                chunk = chunk[os.write(dst_fd, chunk):]
+    
     def repair_audio_stream(self, input_file: Path, output_file: Path, duration: float) -> bool:
         """音频流修复（多策略尝试）"""
         strategies = [
@@ -302,16 +352,21 @@ class DashMerger:
                 init_file = folder_path / "init.mp4"
                 temp_merged = temp_dir / f"merged_{identifier}.m4s"
                 
-                # 如果有init文件，先复制init文件作为基础
+                # 如果有init文件，先写入init文件作为基础
+                sources = list(files)
                 if init_file.exists():
                     self.logger.debug(f"Found init file, using as base for P{identifier}")
-                    shutil.copy2(init_file, temp_merged)
+                    sources.insert(0, init_file)
                 
-                # 合并所有m4s文件
-                for file_path in files:
-                    if not self.merge_binary_files(temp_merged, file_path):
-                        self.logger.error(f"Failed to merge file: {file_path}")
-                        return False
+                # 目标文件只打开一次，依次追加所有分段
+                dst_fd = os.open(temp_merged, os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, 'O_BINARY', 0))
+                try:
+                    for file_path in sources:
+                        if not self.merge_binary_files(dst_fd, file_path):
+                            self.logger.error(f"Failed to merge file: {file_path}")
+                            return False
+                finally:
+                    os.close(dst_fd)
                 
                 # 检查合并后的文件
                 if not temp_merged.exists() or temp_merged.stat().st_size == 0:
@@ -3,7 +3,6 @@ Configuration management for VR Video Processing Pipeline.
 """
 
 import os
-import yaml
 from pathlib import Path
 from typing import Dict, Any, Optional
 
@@ -20,6 +19,19 @@ class Config:
         self.config_file = config_file or "config/settings.yaml"
         self.settings = self._load_config()
     
+    @classmethod
+    def from_dict(cls, settings: Dict[str, Any], config_file: Optional[str] = None) -> 'Config':
+        """Create a configuration from an already-parsed mapping, without reading the file.
+        
+        Args:
+            settings: Parsed configuration data.
+            config_file: File the data came from, used by save().
+        """
+        config = cls.__new__(cls)
+        config.config_file = config_file or "config/settings.yaml"
+        config.settings = settings
+        return config
+    
     def _load_config(self) -> Dict[str, Any]:
         """Load configuration from file."""
         config_path = Path(self.config_file)
@@ -27,6 +39,8 @@ class Config:
         if not config_path.exists():
             return self._get_default_config()
         
+        # Imported lazily: runs without a config file never need PyYAML
+        import yaml
         try:
             with open(config_path, 'r', encoding='utf-8') as f:
                 config = yaml.safe_load(f)
@@ -98,5 +112,6 @@ class Config:
         config_path = Path(self.config_file)
         config_path.parent.mkdir(parents=True, exist_ok=True)
         
+        import yaml
         with open(config_path, 'w', encoding='utf-8') as f:
             yaml.dump(self.settings, f, default_flow_style=False, indent=2)
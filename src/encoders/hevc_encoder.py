@@ -172,8 +172,13 @@ class HEVCEncoder(BaseEncoder):
                     crf: Optional[int] = None,
                     resolution: str = "4k",
                     progress_logger: ProgressLogger = None,
-                    force_4k: bool = False) -> bool:
-        """Encode a video to HEVC format."""
+                    force_4k: bool = False,
+                    errors_only: bool = False) -> bool:
+        """Encode a video to HEVC format.
+
+        errors_only 为 True 时 FFmpeg 只输出错误（-loglevel error -nostats），
+        progress_logger 只会收到错误行。
+        """
         self.logger.info(f"Encoding video: {input_file} -> {output_file}")
 
         # 防御性处理，确保 encoder_type 为 Enum 实例
@@ -218,7 +223,7 @@ class HEVCEncoder(BaseEncoder):
         
         # Build FFmpeg command
         cmd = self._build_ffmpeg_command(
-            input_file, output_file, encoder_type, quality_preset, crf, force_4k
+            input_file, output_file, encoder_type, quality_preset, crf, force_4k, errors_only
         )
         
         try:
@@ -250,13 +255,16 @@ class HEVCEncoder(BaseEncoder):
     
     def _build_ffmpeg_command(self, input_file: Path, output_file: Path,
                              encoder_type: EncoderType, quality_preset: QualityPreset,
-                             crf: int, force_4k: bool = False) -> List[str]:
+                             crf: int, force_4k: bool = False,
+                             errors_only: bool = False) -> List[str]:
         """Build FFmpeg command for encoding."""
-        cmd = [
-            self.ffmpeg_path,
-            '-stats',
-            '-i', str(input_file),
-        ]
+        cmd = [self.ffmpeg_path]
+        # 默认用 -stats 在stderr输出进度；errors_only 时关闭进度，只输出错误
+        if errors_only:
+            cmd.extend(['-loglevel', 'error', '-nostats'])
+        else:
+            cmd.append('-stats')
+        cmd.extend(['-i', str(input_file)])
         
         # Add scaling filter if force_4k is enabled
         if force_4k:
@@ -264,6 +272,14 @@ class HEVCEncoder(BaseEncoder):
                 '-vf', 'scale=min(4096,iw):-2'  # 强制缩放到4K以内，保持宽高比
             ])
         
+        cmd.extend(self._build_output_options(encoder_type, quality_preset, crf, errors_only))
+        cmd.append(str(output_file))
+        return cmd
+    
+    def _build_output_options(self, encoder_type: EncoderType, quality_preset: QualityPreset,
+                              crf: int, errors_only: bool = False) -> List[str]:
+        """Encoder/rate-control/audio options for one output file."""
+        cmd = []
         if encoder_type == EncoderType.NVENC:
             # Map generic presets to NVENC p1-p7
             nvenc_preset_map = {
@@ -306,14 +322,70 @@ class HEVCEncoder(BaseEncoder):
                 '-bufsize', '100M'
             ])
         elif encoder_type == EncoderType.LIBX265:
+            x265_params = f'crf={crf}:preset={quality_preset.value}'
+            if errors_only:
+                # x265 自己写 stderr，不受 -loglevel 控制
+                x265_params += ':log-level=error'
             cmd.extend([
-                '-x265-params', f'crf={crf}:preset={quality_preset.value}'
+                '-x265-params', x265_params
             ])
         
-        cmd.append(str(output_file))
-        # 去掉 -progress pipe:1，只保留 -stats
         return cmd
     
+    def encode_video_multi(self, input_file: Path,
+                           outputs: List[Tuple[Path, QualityPreset]],
+                           encoder_type: EncoderType,
+                           crf: Optional[int] = None,
+                           resolution: str = "4k",
+                           progress_logger: ProgressLogger = None,
+                           force_4k: bool = False,
+                           errors_only: bool = False) -> bool:
+        """Encode one input to several presets in a single FFmpeg run.
+        
+        The input is decoded once and split to one encoder per output, instead
+        of decoding it again for every preset.
+        """
+        if not input_file.exists():
+            raise FileNotFoundError(f"Input file not found: {input_file}")
+        
+        if crf is None:
+            crf = self.calculate_crf(resolution, "medium")
+        
+        cmd = [self.ffmpeg_path]
+        if errors_only:
+            cmd.extend(['-loglevel', 'error', '-nostats'])
+        else:
+            cmd.append('-stats')
+        cmd.extend(['-i', str(input_file)])
+        
+        # 解码一次，split 给每个输出；-vf 不能用于 filter_complex 的输出，缩放也放进滤镜图
+        scale = 'scale=min(4096,iw):-2,' if force_4k else ''
+        labels = ''.join(f'[v{idx}]' for idx in range(len(outputs)))
+        cmd.extend(['-filter_complex', f'[0:v]{scale}split={len(outputs)}{labels}'])
+        
+        for idx, (output_file, quality_preset) in enumerate(outputs):
+            output_file.parent.mkdir(parents=True, exist_ok=True)
+            cmd.extend(['-map', f'[v{idx}]', '-map', '0:a?'])
+            cmd.extend(self._build_output_options(encoder_type, quality_preset, crf, errors_only))
+            cmd.append(str(output_file))
+        
+        try:
+            start_time = time.time()
+            process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, universal_newlines=True, bufsize=1)
+            for line in process.stdout:
+                if progress_logger:
+                    progress_logger.format_and_write(line)
+            process.wait()
+            
+            if all(output_file.exists() and output_file.stat().st_size > 0 for output_file, _ in outputs):
+                self.logger.info(f"[SUCCESS] Encoded {len(outputs)} outputs in {time.time() - start_time:.2f}s")
+                return True
+            self.logger.error("[ERROR] Encoding failed: Output file is empty or missing")
+            return False
+        except Exception as e:
+            self.logger.error(f"[ERROR] Encoding failed: {e}")
+            return False
+    
     def batch_encode(self, input_files: List[Path], output_dir: Path,
                     encoder_type: Optional[EncoderType] = None,
                     quality_preset: QualityPreset = QualityPreset.MEDIUM,
@@ -178,7 +178,7 @@ def split_encode_merge(config, input_file, output_file, segment_duration, encode
     logger.info(f"合并完成: {output_file}")
     return True
 
-def main():
+def main(argv=None):
     parser = argparse.ArgumentParser(description="VR Video Processing Pipeline (Refactored)")
     subparsers = parser.add_subparsers(dest='command', help='Available commands')
     
@@ -208,7 +208,7 @@ def main():
     create_script_parser = network_subparsers.add_parser('create-script', help='创建访问脚本')
     create_script_parser.add_argument('--output-path', type=Path, help='输出路径（默认项目根目录）')
     
-    args = parser.parse_args()
+    args = parser.parse_args(argv)
     if not args.command:
         parser.print_help()
         return
@@ -23,48 +23,61 @@ class FFmpegDetector:
         self.is_windows = self.system == "windows"
         self.is_macos = self.system == "darwin"
         self.is_linux = self.system == "linux"
+        # 检测结果缓存（路径, 检测方式），同一实例内只检测一次
+        self._ffmpeg_path: Optional[str] = None
+        self._detection_method: Optional[str] = None
+        # PATH 检测时 ffmpeg -version 的输出，供 test_ffmpeg_installation 复用
+        self._path_version_output: Optional[str] = None
         
     def detect_ffmpeg_path(self) -> str:
         """
         自动检测 FFmpeg 可执行文件路径
         
+        找到后缓存在实例上，重复调用不会再次启动 ffmpeg 子进程。
+        
         Returns:
             FFmpeg 可执行文件的完整路径
             
         Raises:
             FileNotFoundError: 如果找不到 FFmpeg
         """
+        if self._ffmpeg_path is None:
+            self._ffmpeg_path, self._detection_method = self._detect_ffmpeg_path()
+        return self._ffmpeg_path
+    
+    def _detect_ffmpeg_path(self) -> Tuple[str, str]:
+        """按优先级依次检测，返回 (路径, 检测方式)"""
         logger.info(f"开始检测 FFmpeg 路径 (系统: {self.system})")
         
         # 1. 优先检查配置文件中的路径
         config_path = self._get_config_path()
         if config_path:
             logger.info(f"从配置文件找到 FFmpeg 路径: {config_path}")
-            return config_path
+            return config_path, 'config_file'
         
         # 2. 检查系统 PATH 环境变量
         path_path = self._check_path_environment()
         if path_path:
             logger.info(f"从系统 PATH 找到 FFmpeg: {path_path}")
-            return path_path
+            return path_path, 'system_path'
         
         # 3. 检查常见安装路径
         common_path = self._check_common_paths()
         if common_path:
             logger.info(f"从常见路径找到 FFmpeg: {common_path}")
-            return common_path
+            return common_path, 'common_paths'
         
         # 4. 检查包管理器安装路径
         package_path = self._check_package_manager_paths()
         if package_path:
             logger.info(f"从包管理器路径找到 FFmpeg: {package_path}")
-            return package_path
+            return package_path, 'package_manager'
         
         # 5. 检查用户自定义路径
         custom_path = self._check_custom_paths()
         if custom_path:
             logger.info(f"从自定义路径找到 FFmpeg: {custom_path}")
-            return custom_path
+            return custom_path, 'custom_paths'
         
         # 如果都找不到，抛出错误
         error_msg = self._generate_error_message()
@@ -106,6 +119,7 @@ class FFmpegDetector:
                 timeout=10
             )
             if result.returncode == 0:
+                self._path_version_output = result.stdout
                 return 'ffmpeg'
         except (subprocess.CalledProcessError, FileNotFoundError, subprocess.TimeoutExpired):
             pass
@@ -300,6 +314,9 @@ class FFmpegDetector:
         """
         try:
             ffmpeg_path = self.detect_ffmpeg_path()
+            if ffmpeg_path == 'ffmpeg' and self._path_version_output:
+                # PATH 检测刚运行过 ffmpeg -version，直接复用其输出
+                return True, self._path_version_output.partition('\n')[0]
             result = subprocess.run(
                 [ffmpeg_path, '-version'], 
                 capture_output=True, 
@@ -310,7 +327,7 @@ class FFmpegDetector:
             
             if result.returncode == 0:
                 # 提取版本信息
-                version_line = result.stdout.split('\n')[0]
+                version_line = result.stdout.partition('\n')[0]
                 return True, version_line
             else:
                 return False, f"FFmpeg 执行失败，返回码: {result.returncode}"
@@ -350,17 +367,8 @@ class FFmpegDetector:
             if is_working:
                 summary['version'] = version_info
             
-            # 确定检测方法
-            if self._get_config_path():
-                summary['detection_method'] = 'config_file'
-            elif self._check_path_environment():
-                summary['detection_method'] = 'system_path'
-            elif self._check_common_paths():
-                summary['detection_method'] = 'common_paths'
-            elif self._check_package_manager_paths():
-                summary['detection_method'] = 'package_manager'
-            elif self._check_custom_paths():
-                summary['detection_method'] = 'custom_paths'
+            # 检测方法在 detect_ffmpeg_path 中已记录，无需重新走一遍检测链
+            summary['detection_method'] = self._detection_method
                 
         except Exception as e:
             summary['error'] = str(e)
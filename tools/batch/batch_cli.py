@@ -335,6 +335,33 @@ class BatchCLI:
         """主函数"""
         parser = self.create_parser()
         args = parser.parse_args(argv)
+        return self.run(**vars(args))
+    
+    def run(self, input_dir: Path, output_dir: Path,
+            segment_duration: float = 300.0,
+            encoder: str = 'libx265',
+            quality: str = 'high',
+            max_workers: int = 2,
+            parallel_files: int = 1,
+            temp_dir: Optional[Path] = None,
+            skip_split_encode: bool = False,
+            force_4k: bool = False,
+            config_file: Optional[Path] = None,
+            verbose: bool = False,
+            dry_run: bool = False,
+            list_files: bool = False) -> int:
+        """按已解析好的参数执行（参数与命令行选项一一对应，供其他入口直接调用，免去再次解析）
+        
+        Returns:
+            退出码
+        """
+        args = argparse.Namespace(
+            input_dir=input_dir, output_dir=output_dir,
+            segment_duration=segment_duration, encoder=encoder, quality=quality,
+            max_workers=max_workers, parallel_files=parallel_files,
+            temp_dir=temp_dir, skip_split_encode=skip_split_encode, force_4k=force_4k,
+            config_file=config_file, verbose=verbose, dry_run=dry_run, list_files=list_files
+        )
         
         # 设置日志
         self.setup_logging(args.verbose)
@@ -23,6 +23,10 @@ from config.settings import Config
 class BatchProcessor:
     """批量视频处理器 - 用户友好的批量处理接口"""
     
+    # 支持的视频扩展名，类级别构建一次，所有扫描共享
+    _VIDEO_EXTS = frozenset({'.mp4', '.avi', '.mkv', '.mov', '.m4v', '.webm'})
+    _VIDEO_EXT_NAMES = frozenset(ext[1:] for ext in _VIDEO_EXTS)
+    
     def __init__(self, config_file: Optional[str] = None):
         """初始化批量处理器
         
@@ -45,25 +49,28 @@ class BatchProcessor:
         
         Args:
             input_dir: 输入目录
-            extensions: 支持的视频格式扩展名
+            extensions: 支持的视频格式扩展名，为None时使用 _VIDEO_EXTS
             
         Returns:
             视频文件路径列表
         """
         if extensions is None:
-            extensions = ['.mp4', '.avi', '.mkv', '.mov', '.m4v', '.webm']
+            ext_names = self._VIDEO_EXT_NAMES
+        else:
+            ext_names = frozenset(ext.lstrip('.').lower() for ext in extensions)
         
         video_files = []
         if not input_dir.exists():
             self.logger.error(f"输入目录不存在: {input_dir}")
             return video_files
         
-        for ext in extensions:
-            video_files.extend(input_dir.glob(f"*{ext}"))
-            video_files.extend(input_dir.glob(f"*{ext.upper()}"))
+        # 单次目录遍历，每个条目只做一次集合查找
+        with os.scandir(input_dir) as entries:
+            for entry in entries:
+                _, dot, ext = entry.name.rpartition('.')
+                if dot and ext.lower() in ext_names and entry.is_file():
+                    video_files.append(Path(entry.path))
         
-        # 去重并排序
-        video_files = list(set(video_files))
         video_files.sort(key=lambda x: x.name.lower())
         
         self.logger.info(f"在 {input_dir} 中找到 {len(video_files)} 个视频文件")
@@ -4,7 +4,7 @@
 高效并行处理多个文件夹中的DASH视频分段，提供用户友好的界面和详细的处理报告
 
 特点:
-- 并行处理多个文件夹
+- 并行处理多个文件夹（默认多进程，绕开GIL）
 - 实时进度显示
 - 详细的处理报告
 - 错误恢复和重试
@@ -14,20 +14,38 @@
 import os
 import sys
 import time
+import asyncio
 import json
-import threading
 from pathlib import Path
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from dataclasses import dataclass, asdict
-from typing import List, Dict, Optional, Tuple
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass, field, asdict
+from typing import List, Dict, Optional, Tuple, Iterator, Iterable
 import logging
 from datetime import datetime
 
+try:
+    import orjson  # 可选：序列化更快，且原生支持 dataclass
+except ImportError:
+    orjson = None
+
 # 添加项目根目录到路径
 PROJECT_ROOT = Path(__file__).parent.parent
 sys.path.insert(0, str(PROJECT_ROOT))
 
-from src.combiners.dash_merger import DashMerger
+from src.combiners.dash_merger import DashMerger, DEFAULT_SCRATCH_SIZE
+
+# io-bound 模式下每个文件夹通过该脚本在独立子进程中合并
+DASH_MERGER_SCRIPT = PROJECT_ROOT / "src" / "combiners" / "dash_merger.py"
+
+
+def default_max_workers(io_bound: bool = False) -> int:
+    """根据硬件计算默认并行数
+    
+    io-bound（asyncio子进程）沿用 ThreadPoolExecutor 的 min(32, cpu_count + 4)；
+    进程池每个任务都占满一个解释器，按 CPU 核数设置。
+    """
+    cpu_count = os.cpu_count() or 1
+    return min(32, cpu_count + 4) if io_bound else cpu_count
 
 
 @dataclass
@@ -45,16 +63,140 @@ class ProcessingResult:
     total_size_mb: float = 0.0
 
 
+@dataclass
+class BatchStats:
+    """批量处理运行统计，只保存计数与失败项，成功结果流式写入JSONL"""
+    total_folders: int = 0
+    successful: int = 0
+    failed: int = 0
+    total_files: int = 0
+    total_size_mb: float = 0.0
+    processing_time: float = 0.0
+    failed_results: List[ProcessingResult] = field(default_factory=list)
+    
+    def add(self, result: ProcessingResult):
+        """累计单个结果"""
+        self.total_folders += 1
+        self.total_files += result.files_processed
+        self.total_size_mb += result.total_size_mb
+        self.processing_time += result.duration
+        if result.success:
+            self.successful += 1
+        else:
+            self.failed += 1
+            self.failed_results.append(result)
+
+
+# 每个工作进程一份的拷贝缓冲区，由进程池 initializer 分配，进程内所有任务复用
+_worker_scratch: Optional[bytearray] = None
+
+
+def _init_worker_scratch(size: int):
+    """进程池 initializer：为当前工作进程分配拷贝缓冲区"""
+    global _worker_scratch
+    _worker_scratch = bytearray(size)
+
+
+def process_single_folder(folder_path: Path, output_dir: Path,
+                          folder_info: Dict[str, any]) -> ProcessingResult:
+    """处理单个文件夹
+    
+    模块级函数，可被pickle后交给ProcessPoolExecutor的工作进程执行。
+    进度统计由主进程在收集结果时完成，这里不共享任何状态。
+    folder_info 为扫描阶段已计算的 get_folder_info 结果。
+    """
+    start_time = time.time()
+    folder_name = folder_path.name
+    
+    # 创建输出文件路径
+    output_file = output_dir / f"{folder_name}.mp4"
+    
+    try:
+        # 创建DASH合并器
+        merger = DashMerger(verbose=False, scratch=_worker_scratch)  # 减少日志输出避免混乱
+        
+        # 执行合并
+        success = merger.merge_single_folder(folder_path, output_file, dry_run=False)
+        error_message = ""
+    except Exception as e:
+        success = False
+        error_message = str(e)
+    
+    end_time = time.time()
+    
+    return ProcessingResult(
+        folder_name=folder_name,
+        input_path=str(folder_path),
+        output_path=str(output_file) if success else "",
+        success=success,
+        start_time=start_time,
+        end_time=end_time,
+        duration=end_time - start_time,
+        error_message=error_message,
+        files_processed=folder_info['total_files'],
+        total_size_mb=folder_info['total_size_mb']
+    )
+
+
+def _process_folder_shard(shard: List[Tuple[Path, Dict[str, any]]], output_dir: Path) -> List[ProcessingResult]:
+    """在一个工作进程中顺序处理一组文件夹，一次提交/回传摊薄IPC与pickle开销"""
+    return [process_single_folder(folder, output_dir, info) for folder, info in shard]
+
+
+async def _process_single_folder_async(folder_path: Path, output_dir: Path,
+                                       folder_info: Dict[str, any],
+                                       sem: asyncio.Semaphore) -> ProcessingResult:
+    """以异步子进程方式处理单个文件夹，并发数由信号量限制"""
+    async with sem:
+        start_time = time.time()
+        folder_name = folder_path.name
+        output_file = output_dir / f"{folder_name}.mp4"
+        
+        cmd = [sys.executable, str(DASH_MERGER_SCRIPT), str(folder_path), '--output', str(output_file)]
+        try:
+            proc = await asyncio.create_subprocess_exec(
+                *cmd,
+                stdout=asyncio.subprocess.DEVNULL,
+                stderr=asyncio.subprocess.PIPE,
+                cwd=str(PROJECT_ROOT)
+            )
+            _, stderr = await proc.communicate()
+            success = proc.returncode == 0
+            # 失败时保留合并器最后一行日志作为错误信息
+            error_message = "" if success else stderr.decode(errors='replace').strip().rpartition('\n')[2]
+        except OSError as e:
+            success = False
+            error_message = str(e)
+        
+        end_time = time.time()
+        
+        return ProcessingResult(
+            folder_name=folder_name,
+            input_path=str(folder_path),
+            output_path=str(output_file) if success else "",
+            success=success,
+            start_time=start_time,
+            end_time=end_time,
+            duration=end_time - start_time,
+            error_message=error_message,
+            files_processed=folder_info['total_files'],
+            total_size_mb=folder_info['total_size_mb']
+        )
+
+
 class BatchDashMerger:
     """批量DASH合并器"""
     
-    def __init__(self, max_workers: int = 4, verbose: bool = False):
-        self.max_workers = max_workers
+    def __init__(self, max_workers: Optional[int] = None, verbose: bool = False, io_bound: bool = False):
+        self.max_workers = max_workers or default_max_workers(io_bound)
         self.verbose = verbose
+        # io_bound=True 时以asyncio子进程并发调用合并脚本，否则使用进程池
+        self.io_bound = io_bound
         self.logger = self._setup_logging()
-        self.results: List[ProcessingResult] = []
+        self.stats = BatchStats()
+        self.results_file: Optional[Path] = None
+        self.run_id = datetime.now().strftime('%Y%m%d_%H%M%S')
         self.start_time = time.time()
-        self.progress_lock = threading.Lock()
         self.completed_count = 0
         self.total_count = 0
         
@@ -70,49 +212,69 @@ class BatchDashMerger:
             logger.setLevel(level)
         return logger
     
-    def scan_dash_folders(self, parent_dir: Path) -> List[Path]:
-        """扫描包含DASH文件的文件夹"""
-        dash_folders = []
+    def iter_dash_folders(self, parent_dir: Path) -> Iterator[Tuple[Path, Dict[str, any]]]:
+        """逐个产出包含DASH文件的文件夹，调用方可边扫描边提交处理
         
+        Yields:
+            (文件夹路径, get_folder_info结果)
+        """
         if not parent_dir.exists() or not parent_dir.is_dir():
             self.logger.error(f"Parent directory does not exist: {parent_dir}")
-            return dash_folders
-        
-        for folder in parent_dir.iterdir():
-            if folder.is_dir():
-                # 检查是否包含.m4s文件
-                m4s_files = list(folder.glob("*.m4s"))
-                if m4s_files:
-                    dash_folders.append(folder)
-                    self.logger.debug(f"Found DASH folder: {folder.name} ({len(m4s_files)} m4s files)")
+            return
         
-        return dash_folders
+        with os.scandir(parent_dir) as entries:
+            for entry in entries:
+                if not entry.is_dir():
+                    continue
+                # 检查是否包含.m4s文件（统计与扫描在同一次遍历中完成）
+                folder = Path(entry.path)
+                info = self.get_folder_info(folder)
+                if info['total_files']:
+                    self.logger.debug(f"Found DASH folder: {folder.name} ({info['total_files']} m4s files)")
+                    yield folder, info
     
-    def get_folder_info(self, folder_path: Path) -> Dict[str, any]:
-        """获取文件夹信息"""
-        m4s_files = list(folder_path.glob("*.m4s"))
-        init_files = list(folder_path.glob("init.mp4"))
+    def scan_dash_folders(self, parent_dir: Path) -> List[Tuple[Path, Dict[str, any]]]:
+        """扫描包含DASH文件的文件夹
         
-        total_size = sum(f.stat().st_size for f in m4s_files + init_files)
-        total_size_mb = total_size / (1024 * 1024)
+        Returns:
+            (文件夹路径, get_folder_info结果) 列表，后续摘要与处理直接复用
+        """
+        return list(self.iter_dash_folders(parent_dir))
+    
+    @staticmethod
+    def get_folder_info(folder_path: Path) -> Dict[str, any]:
+        """获取文件夹信息
         
-        # 分析P标识符
+        使用 os.scandir 单次读取目录，DirEntry 缓存的 stat 结果直接用于统计大小。
+        """
+        m4s_count = 0
+        init_count = 0
+        total_size = 0
         identifiers = set()
-        for file in m4s_files:
-            merger = DashMerger()
-            file_info = merger.parse_m4s_filename(file.name)
-            if file_info:
-                identifiers.add(file_info['identifier'])
+        
+        with os.scandir(folder_path) as entries:
+            for entry in entries:
+                name = entry.name
+                if name.endswith('.m4s'):
+                    m4s_count += 1
+                    total_size += entry.stat().st_size
+                    # 分析P标识符
+                    file_info = DashMerger.parse_m4s_filename(name)
+                    if file_info:
+                        identifiers.add(file_info['identifier'])
+                elif name == 'init.mp4':
+                    init_count += 1
+                    total_size += entry.stat().st_size
         
         return {
-            'total_files': len(m4s_files),
-            'init_files': len(init_files),
-            'total_size_mb': total_size_mb,
+            'total_files': m4s_count,
+            'init_files': init_count,
+            'total_size_mb': total_size / (1024 * 1024),
             'identifiers': sorted(identifiers),
             'identifier_count': len(identifiers)
         }
     
-    def display_scan_summary(self, dash_folders: List[Path], parent_dir: Path):
+    def display_scan_summary(self, dash_folders: List[Tuple[Path, Dict[str, any]]], parent_dir: Path):
         """显示扫描摘要"""
         print(f"\n🔍 扫描目录: {parent_dir}")
         print("=" * 80)
@@ -127,8 +289,7 @@ class BatchDashMerger:
         total_files = 0
         total_size = 0.0
         
-        for i, folder in enumerate(dash_folders, 1):
-            info = self.get_folder_info(folder)
+        for i, (folder, info) in enumerate(dash_folders, 1):
             total_files += info['total_files']
             total_size += info['total_size_mb']
             
@@ -142,91 +303,41 @@ class BatchDashMerger:
         print(f"📊 总计: {len(dash_folders)} 文件夹, {total_files} 文件, {total_size:.1f} MB")
         print("=" * 80)
     
-    def process_single_folder(self, folder_path: Path, output_dir: Path) -> ProcessingResult:
-        """处理单个文件夹"""
-        start_time = time.time()
-        folder_name = folder_path.name
+    def process_batch(self, parent_dir: Path, output_dir: Path, dry_run: bool = False,
+                      assume_yes: bool = False) -> Optional[BatchStats]:
+        """批量处理DASH文件夹
         
-        # 创建输出文件路径
-        output_file = output_dir / f"{folder_name}.mp4"
+        每个完成的结果立即追加写入 JSONL 结果文件，内存中只保留计数与失败项。
+        assume_yes=True 时跳过扫描摘要与确认，扫描到一个文件夹就立即提交处理。
         
-        # 获取文件夹信息
-        folder_info = self.get_folder_info(folder_path)
+        Returns:
+            运行统计；未处理任何文件夹时返回None
+        """
+        if assume_yes and not dry_run:
+            return self._process_streaming(parent_dir, output_dir)
         
-        try:
-            # 创建DASH合并器
-            merger = DashMerger(verbose=False)  # 减少日志输出避免混乱
-            
-            # 执行合并
-            success = merger.merge_single_folder(folder_path, output_file, dry_run=False)
-            
-            end_time = time.time()
-            duration = end_time - start_time
-            
-            # 更新进度
-            with self.progress_lock:
-                self.completed_count += 1
-                progress = (self.completed_count / self.total_count) * 100
-                print(f"✅ [{self.completed_count}/{self.total_count}] {progress:.1f}% | {folder_name} | {duration:.1f}s")
-            
-            return ProcessingResult(
-                folder_name=folder_name,
-                input_path=str(folder_path),
-                output_path=str(output_file) if success else "",
-                success=success,
-                start_time=start_time,
-                end_time=end_time,
-                duration=duration,
-                files_processed=folder_info['total_files'],
-                total_size_mb=folder_info['total_size_mb']
-            )
-            
-        except Exception as e:
-            end_time = time.time()
-            duration = end_time - start_time
-            
-            with self.progress_lock:
-                self.completed_count += 1
-                progress = (self.completed_count / self.total_count) * 100
-                print(f"❌ [{self.completed_count}/{self.total_count}] {progress:.1f}% | {folder_name} | 错误: {str(e)}")
-            
-            return ProcessingResult(
-                folder_name=folder_name,
-                input_path=str(folder_path),
-                output_path="",
-                success=False,
-                start_time=start_time,
-                end_time=end_time,
-                duration=duration,
-                error_message=str(e),
-                files_processed=folder_info['total_files'],
-                total_size_mb=folder_info['total_size_mb']
-            )
-    
-    def process_batch(self, parent_dir: Path, output_dir: Path, dry_run: bool = False) -> List[ProcessingResult]:
-        """批量处理DASH文件夹"""
         # 扫描文件夹
         dash_folders = self.scan_dash_folders(parent_dir)
         
         if not dash_folders:
-            return []
+            return None
         
         # 显示扫描摘要
         self.display_scan_summary(dash_folders, parent_dir)
         
         if dry_run:
             print("\n🔍 模拟运行模式 - 不会实际处理文件")
-            return []
+            return None
         
         # 确认处理
         try:
             response = input(f"\n🤔 确定要处理这 {len(dash_folders)} 个文件夹吗? (y/N): ").strip().lower()
             if response not in ['y', 'yes']:
                 print("❌ 用户取消操作")
-                return []
+                return None
         except KeyboardInterrupt:
             print("\n❌ 用户中断操作")
-            return []
+            return None
         
         # 确保输出目录存在
         output_dir.mkdir(parents=True, exist_ok=True)
@@ -238,88 +349,185 @@ class BatchDashMerger:
         print(f"\n🚀 开始批量处理 ({self.max_workers} 个并行任务)")
         print("=" * 80)
         
+        self.results_file = output_dir / f"batch_dash_merge_results_{self.run_id}.jsonl"
+        
         # 并行处理
-        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
-            # 提交任务
-            future_to_folder = {
-                executor.submit(self.process_single_folder, folder, output_dir): folder 
-                for folder in dash_folders
-            }
+        with open(self.results_file, 'a', encoding='utf-8') as results_out:
+            if self.io_bound:
+                asyncio.run(self._process_folders_async(dash_folders, output_dir, results_out))
+                return self.stats
             
-            # 收集结果
-            for future in as_completed(future_to_folder):
-                result = future.result()
-                self.results.append(result)
+            with ProcessPoolExecutor(max_workers=self.max_workers,
+                                     initializer=_init_worker_scratch,
+                                     initargs=(DEFAULT_SCRATCH_SIZE,)) as executor:
+                # 提交任务：文件夹较多时预先分成 max_workers*4 个分片，每个分片一个future
+                n_shards = min(len(dash_folders), self.max_workers * 4)
+                shards = [dash_folders[i::n_shards] for i in range(n_shards)]
+                futures = [
+                    executor.submit(_process_folder_shard, shard, output_dir)
+                    for shard in shards
+                ]
+                
+                # 收集结果（在主进程中计数，无需锁）
+                for future in as_completed(futures):
+                    for result in future.result():
+                        self._record_result(result, results_out)
+        
+        return self.stats
+    
+    def _process_streaming(self, parent_dir: Path, output_dir: Path) -> Optional[BatchStats]:
+        """扫描与处理重叠进行：文件夹边被发现边提交，扫描结束前进度显示为不定总数"""
+        output_dir.mkdir(parents=True, exist_ok=True)
         
-        return self.results
+        self.total_count = 0
+        self.completed_count = 0
+        
+        print(f"\n🚀 开始批量处理 ({self.max_workers} 个并行任务，边扫描边处理)")
+        print("=" * 80)
+        
+        self.results_file = output_dir / f"batch_dash_merge_results_{self.run_id}.jsonl"
+        folders = self.iter_dash_folders(parent_dir)
+        
+        with open(self.results_file, 'a', encoding='utf-8') as results_out:
+            if self.io_bound:
+                asyncio.run(self._process_folders_async(folders, output_dir, results_out))
+            else:
+                with ProcessPoolExecutor(max_workers=self.max_workers,
+                                         initializer=_init_worker_scratch,
+                                         initargs=(DEFAULT_SCRATCH_SIZE,)) as executor:
+                    pending = set()
+                    submitted = 0
+                    for item in folders:
+                        pending.add(executor.submit(_process_folder_shard, [item], output_dir))
+                        submitted += 1
+                        # 扫描期间顺带收集已完成的结果
+                        done = {f for f in pending if f.done()}
+                        pending -= done
+                        for future in done:
+                            for result in future.result():
+                                self._record_result(result, results_out)
+                    
+                    self.total_count = submitted
+                    for future in as_completed(pending):
+                        for result in future.result():
+                            self._record_result(result, results_out)
+        
+        if not self.stats.total_folders:
+            print(f"❌ 未找到包含DASH文件的文件夹: {parent_dir}")
+            return None
+        return self.stats
+    
+    async def _process_folders_async(self, dash_folders: Iterable[Tuple[Path, Dict[str, any]]],
+                                     output_dir: Path, results_out):
+        """在事件循环中并发处理所有文件夹（单线程，进度计数无需加锁）
+        
+        dash_folders 可以是扫描生成器：每产出一个文件夹就创建任务并让出事件循环，
+        使已启动的子进程在扫描其余目录时继续推进。
+        """
+        sem = asyncio.Semaphore(self.max_workers)
+        
+        async def run(folder: Path, info: Dict[str, any]):
+            result = await _process_single_folder_async(folder, output_dir, info, sem)
+            self._record_result(result, results_out)
+        
+        tasks = []
+        for folder, info in dash_folders:
+            tasks.append(asyncio.ensure_future(run(folder, info)))
+            await asyncio.sleep(0)
+        
+        self.total_count = len(tasks)
+        await asyncio.gather(*tasks)
+    
+    def _record_result(self, result: ProcessingResult, results_out):
+        """追加写入单条结果、更新统计并显示进度"""
+        if orjson is not None:
+            results_out.write(orjson.dumps(result).decode('utf-8') + "\n")
+        else:
+            results_out.write(json.dumps(asdict(result), ensure_ascii=False) + "\n")
+        self.stats.add(result)
+        self._report_progress(result)
+    
+    def _report_progress(self, result: ProcessingResult):
+        """打印单个文件夹的完成进度"""
+        self.completed_count += 1
+        if self.total_count:
+            progress = (self.completed_count / self.total_count) * 100
+            counter = f"[{self.completed_count}/{self.total_count}] {progress:.1f}%"
+        else:
+            # 边扫描边处理时总数未知，只显示已完成数量
+            counter = f"[已处理 {self.completed_count}]"
+        if result.error_message:
+            print(f"❌ {counter} | {result.folder_name} | 错误: {result.error_message}")
+        else:
+            status = "✅" if result.success else "❌"
+            print(f"{status} {counter} | {result.folder_name} | {result.duration:.1f}s")
     
     def generate_report(self, output_dir: Path) -> Path:
-        """生成处理报告"""
-        if not self.results:
+        """生成处理报告
+        
+        逐项结果已在处理过程中写入 results_file，这里只写出汇总部分与失败项。
+        """
+        stats = self.stats
+        if not stats.total_folders:
             return None
         
         # 计算统计信息
         total_time = time.time() - self.start_time
-        successful = [r for r in self.results if r.success]
-        failed = [r for r in self.results if not r.success]
-        
-        total_files = sum(r.files_processed for r in self.results)
-        total_size = sum(r.total_size_mb for r in self.results)
-        processing_time = sum(r.duration for r in self.results)
+        processing_time = stats.processing_time
         
         # 创建报告
         report = {
             'summary': {
-                'total_folders': len(self.results),
-                'successful': len(successful),
-                'failed': len(failed),
-                'success_rate': len(successful) / len(self.results) * 100,
+                'total_folders': stats.total_folders,
+                'successful': stats.successful,
+                'failed': stats.failed,
+                'success_rate': stats.successful / stats.total_folders * 100,
                 'total_time_seconds': total_time,
                 'total_processing_time_seconds': processing_time,
-                'total_files_processed': total_files,
-                'total_size_mb': total_size,
-                'average_speed_mb_per_second': total_size / processing_time if processing_time > 0 else 0,
+                'total_files_processed': stats.total_files,
+                'total_size_mb': stats.total_size_mb,
+                'average_speed_mb_per_second': stats.total_size_mb / processing_time if processing_time > 0 else 0,
                 'parallel_efficiency': processing_time / total_time if total_time > 0 else 0,
                 'timestamp': datetime.now().isoformat()
             },
-            'successful_folders': [asdict(r) for r in successful],
-            'failed_folders': [asdict(r) for r in failed]
+            'results_file': str(self.results_file) if self.results_file else "",
+            'failed_folders': stats.failed_results
         }
         
-        # 保存报告
-        report_file = output_dir / f"batch_dash_merge_report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
-        with open(report_file, 'w', encoding='utf-8') as f:
-            json.dump(report, f, indent=2, ensure_ascii=False)
+        # 保存报告（有 orjson 时直接序列化 dataclass，否则回退到标准库 json）
+        report_file = output_dir / f"batch_dash_merge_report_{self.run_id}.json"
+        if orjson is not None:
+            report_file.write_bytes(orjson.dumps(report, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS))
+        else:
+            report['failed_folders'] = [asdict(r) for r in stats.failed_results]
+            with open(report_file, 'w', encoding='utf-8') as f:
+                json.dump(report, f, indent=2, ensure_ascii=False)
         
         return report_file
     
     def display_final_summary(self, report_file: Optional[Path] = None):
         """显示最终摘要"""
-        if not self.results:
+        stats = self.stats
+        if not stats.total_folders:
             return
         
-        successful = [r for r in self.results if r.success]
-        failed = [r for r in self.results if not r.success]
-        
         total_time = time.time() - self.start_time
-        total_files = sum(r.files_processed for r in self.results)
-        total_size = sum(r.total_size_mb for r in self.results)
         
         print("\n" + "=" * 80)
         print("📊 批量处理完成摘要")
         print("=" * 80)
         
-        print(f"✅ 成功: {len(successful)} 个文件夹")
-        print(f"❌ 失败: {len(failed)} 个文件夹")
-        print(f"📈 成功率: {len(successful)/len(self.results)*100:.1f}%")
+        print(f"✅ 成功: {stats.successful} 个文件夹")
+        print(f"❌ 失败: {stats.failed} 个文件夹")
+        print(f"📈 成功率: {stats.successful/stats.total_folders*100:.1f}%")
         print(f"⏱️  总耗时: {total_time:.1f} 秒")
-        print(f"📄 处理文件: {total_files} 个")
-        print(f"📊 处理大小: {total_size:.1f} MB")
-        print(f"🚀 平均速度: {total_size/total_time:.1f} MB/s")
+        print(f"📄 处理文件: {stats.total_files} 个")
+        print(f"📊 处理大小: {stats.total_size_mb:.1f} MB")
+        print(f"🚀 平均速度: {stats.total_size_mb/total_time:.1f} MB/s")
         
-        if failed:
+        if stats.failed_results:
             print(f"\n❌ 失败的文件夹:")
-            for result in failed:
+            for result in stats.failed_results:
                 print(f"   • {result.folder_name}: {result.error_message}")
         
         if report_file:
@@ -327,7 +535,6 @@ class BatchDashMerger:
         
         print("=" * 80)
 
-
 def main():
     """主函数"""
     import argparse
@@ -343,6 +550,9 @@ def main():
   # 指定输出目录和并行数
   python tools/batch_dash_merge.py C:\\Users\\carll\\Desktop\\catDownloads -o D:\\Output -w 6
   
+  # 跳过确认，扫描与处理重叠进行
+  python tools/batch_dash_merge.py C:\\Users\\carll\\Desktop\\catDownloads -y
+  
   # 模拟运行（仅扫描，不处理）
   python tools/batch_dash_merge.py C:\\Users\\carll\\Desktop\\catDownloads --dry-run
   
@@ -353,8 +563,10 @@ def main():
     
     parser.add_argument('input_dir', type=Path, help='包含DASH文件夹的父目录')
     parser.add_argument('-o', '--output-dir', type=Path, help='输出目录 (默认为输入目录下的merged文件夹)')
-    parser.add_argument('-w', '--workers', type=int, default=4, help='并行处理任务数 (默认: 4)')
+    parser.add_argument('-w', '--workers', type=int, default=None, help='并行处理任务数 (默认: 按CPU核数自动选择)')
+    parser.add_argument('--io-bound', action='store_true', help='以asyncio子进程并发调用合并脚本，代替进程池 (I/O密集场景)')
     parser.add_argument('--dry-run', action='store_true', help='模拟运行，仅扫描不处理')
+    parser.add_argument('-y', '--yes', action='store_true', help='跳过确认，边扫描边处理')
     parser.add_argument('--verbose', '-v', action='store_true', help='详细输出模式')
     
     args = parser.parse_args()
@@ -366,20 +578,22 @@ def main():
     
     # 设置输出目录
     output_dir = args.output_dir or (args.input_dir / "merged")
+    workers = args.workers or default_max_workers(args.io_bound)
     
     print(f"🎬 VREconder 批量DASH合并工具")
     print(f"📁 输入目录: {args.input_dir}")
     print(f"📁 输出目录: {output_dir}")
-    print(f"🔧 并行任务: {args.workers}")
+    print(f"🔧 并行任务: {workers}")
     
     try:
         # 创建批量处理器
-        batch_merger = BatchDashMerger(max_workers=args.workers, verbose=args.verbose)
+        batch_merger = BatchDashMerger(max_workers=workers, verbose=args.verbose, io_bound=args.io_bound)
         
         # 执行批量处理
-        results = batch_merger.process_batch(args.input_dir, output_dir, dry_run=args.dry_run)
+        stats = batch_merger.process_batch(args.input_dir, output_dir, dry_run=args.dry_run,
+                                           assume_yes=args.yes)
         
-        if results and not args.dry_run:
+        if stats and not args.dry_run:
             # 生成报告
             report_file = batch_merger.generate_report(output_dir)
             
@@ -387,11 +601,10 @@ def main():
             batch_merger.display_final_summary(report_file)
         
         # 返回适当的退出代码
-        if not results:
+        if not stats:
             return 0 if args.dry_run else 1
         
-        failed_count = sum(1 for r in results if not r.success)
-        return 0 if failed_count == 0 else 1
+        return 0 if stats.failed == 0 else 1
         
     except KeyboardInterrupt:
         print("\n❌ 用户中断操作")
@@ -6,24 +6,38 @@ A rigorous benchmarking tool to compare compression efficiency and performance.
 """
 
 import os
+import re
 import sys
 import time
 import json
 import csv
 import argparse
 import subprocess
-import threading
 import psutil
 import shutil
 import logging
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple, NamedTuple
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, fields, astuple
+from typing import Dict, List, Optional, Tuple
 
 # Configure Logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger("Benchmark")
 
-class BenchmarkResult(NamedTuple):
+# Cached ffmpeg capability probe results (NVENC / libvmaf), keyed on the ffmpeg binary
+CAPS_CACHE_FILE = Path.home() / ".cache" / "vreconder" / "ffmpeg_caps.json"
+
+# ffmpeg log patterns, compiled once for every metric pass
+_SSIM_RE = re.compile(r"SSIM.*?All:([0-9.]+)")    # [Parsed_ssim_0 @ ...] SSIM Y:0.98... All:0.98...
+_PSNR_RE = re.compile(r"PSNR.*?average:([0-9.]+)")  # [Parsed_psnr_1 @ ...] PSNR y:30... average:30...
+
+@dataclass(frozen=True)
+class BenchmarkResult:
+    # Explicit __slots__ (dataclass(slots=True) needs Python 3.10; we support 3.8+)
+    __slots__ = ('encoder', 'preset', 'mode', 'target', 'time_sec', 'size_mb',
+                 'bitrate_mbps', 'fps', 'cpu_usage_avg', 'vmaf', 'ssim', 'psnr')
+
     encoder: str
     preset: str
     mode: str
@@ -38,120 +52,144 @@ class BenchmarkResult(NamedTuple):
     psnr: float
 
 class ComparativeBenchmark:
-    def __init__(self, input_file: Path, output_dir: Path, force_cpu: bool = False):
+    def __init__(self, input_file: Path, output_dir: Path, force_cpu: bool = False,
+                 overlap_encoders: bool = False):
         self.input_file = input_file
         self.output_dir = output_dir
         self.output_dir.mkdir(parents=True, exist_ok=True)
         self.temp_dir = self.output_dir / "temp_work"
         self.temp_dir.mkdir(exist_ok=True)
         self.force_cpu = force_cpu
+        # Run each libx265 (CPU) / hevc_nvenc (GPU) pair at the same time
+        self.overlap_encoders = overlap_encoders
         
         self.source_clip = self.temp_dir / "benchmark_source.mp4"
         self.results: List[BenchmarkResult] = []
         self.has_nvenc = False
         self.has_vmaf = False
-        
-        self.cpu_monitor_active = False
-        self.cpu_readings = []
 
     def check_deps(self):
         """Check availability of FFmpeg, NVENC, and LibVMAF."""
         print("🔍 Checking dependencies...")
         
         # Check FFmpeg
-        try:
-            subprocess.run(['ffmpeg', '-version'], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
-        except (subprocess.CalledProcessError, FileNotFoundError):
+        ffmpeg_path = shutil.which('ffmpeg')
+        if not ffmpeg_path:
             logger.error("❌ FFmpeg not found!")
             sys.exit(1)
 
+        caps = self._load_cached_caps(ffmpeg_path)
+        if caps is None:
+            caps = self._probe_caps()
+            self._save_cached_caps(ffmpeg_path, caps)
+
         # Check NVENC
         if not self.force_cpu:
-            try:
-                res = subprocess.run(['ffmpeg', '-encoders'], capture_output=True, text=True)
-                if "hevc_nvenc" in res.stdout:
-                    self.has_nvenc = True
-                    print("✅ NVENC available")
-                else:
-                    print("⚠️ NVENC not found, will run CPU only.")
-            except Exception:
-                pass
+            if caps['nvenc']:
+                self.has_nvenc = True
+                print("✅ NVENC available")
+            else:
+                print("⚠️ NVENC not found, will run CPU only.")
         
         # Check VMAF
-        try:
+        if caps['vmaf']:
+            self.has_vmaf = True
+            print("✅ VMAF filter available")
+        else:
+            print("⚠️ VMAF filter NOT found. Will fallback to SSIM only.")
+
+    def _probe_caps(self) -> Dict[str, bool]:
+        """Run the -version/-encoders/-filters probes concurrently."""
+        def probe(flag: str) -> Optional[subprocess.CompletedProcess]:
+            try:
+                return subprocess.run(['ffmpeg', flag], capture_output=True, text=True)
+            except Exception:
+                return None
+
+        with ThreadPoolExecutor(max_workers=3) as ex:
+            version, encoders, filters = ex.map(probe, ['-version', '-encoders', '-filters'])
+
+        if version is None or version.returncode != 0:
+            logger.error("❌ FFmpeg not found!")
+            sys.exit(1)
+
+        return {
+            'nvenc': encoders is not None and "hevc_nvenc" in encoders.stdout,
             # Simple check if libvmaf filter exists
-            res = subprocess.run(['ffmpeg', '-filters'], capture_output=True, text=True)
-            if "libvmaf" in res.stdout:
-                self.has_vmaf = True
-                print("✅ VMAF filter available")
-            else:
-                print("⚠️ VMAF filter NOT found. Will fallback to SSIM only.")
-        except Exception:
+            'vmaf': filters is not None and "libvmaf" in filters.stdout,
+        }
+
+    @staticmethod
+    def _caps_key(ffmpeg_path: str) -> str:
+        """Identify the ffmpeg build by its resolved path, size and mtime (no subprocess needed)."""
+        st = os.stat(ffmpeg_path)
+        return f"{os.path.realpath(ffmpeg_path)}:{st.st_size}:{st.st_mtime_ns}"
+
+    def _load_cached_caps(self, ffmpeg_path: str) -> Optional[Dict[str, bool]]:
+        try:
+            with open(CAPS_CACHE_FILE, 'r', encoding='utf-8') as f:
+                cached = json.load(f)
+            if cached.get('key') == self._caps_key(ffmpeg_path):
+                return cached['caps']
+        except (OSError, ValueError, KeyError):
             pass
+        return None
+
+    def _save_cached_caps(self, ffmpeg_path: str, caps: Dict[str, bool]):
+        try:
+            CAPS_CACHE_FILE.parent.mkdir(parents=True, exist_ok=True)
+            with open(CAPS_CACHE_FILE, 'w', encoding='utf-8') as f:
+                json.dump({'key': self._caps_key(ffmpeg_path), 'caps': caps}, f)
+        except OSError as e:
+            logger.debug(f"Could not write capability cache: {e}")
 
     def prepare_source_clip(self):
         """Create a consolidated source clip from 3 segments of the input video."""
         print(f"✂️  Preparing 3-clip sample from {self.input_file.name}...")
         
-        # Get duration
-        cmd = ['ffprobe', '-v', 'error', '-show_entries', 'format=duration', '-of', 'default=noprint_wrappers=1:nokey=1', str(self.input_file)]
+        # Get duration and stream types in one probe
+        cmd = ['ffprobe', '-v', 'error', '-show_entries', 'format=duration:stream=codec_type',
+               '-of', 'default=noprint_wrappers=1:nokey=1', str(self.input_file)]
         try:
-            duration = float(subprocess.check_output(cmd).decode().strip())
+            lines = subprocess.check_output(cmd).decode().split()
+            has_audio = 'audio' in lines
+            duration = float(next(l for l in lines if l[0].isdigit()))
         except:
             logger.error("Could not determine video duration.")
             sys.exit(1)
 
         # Timestamps: 20%, 50%, 80%
         timestamps = [duration * 0.2, duration * 0.5, duration * 0.8]
-        clip_paths = []
         
-        # Extract individual clips (lossless-ish intermediate)
-        for i, ts in enumerate(timestamps):
-            clip_path = self.temp_dir / f"clip_{i}.mp4"
-            # Extract 3 seconds
-            cmd = [
-                'ffmpeg', '-y', '-ss', str(ts), '-i', str(self.input_file),
-                '-t', '3', '-c:v', 'libx264', '-crf', '16', '-preset', 'ultrafast',
-                '-c:a', 'copy', str(clip_path)
-            ]
-            subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
-            clip_paths.append(clip_path)
-
-        # Concatenate using file list
-        list_file = self.temp_dir / "clips.txt"
-        with open(list_file, 'w') as f:
-            for p in clip_paths:
-                f.write(f"file '{p.name}'\n")
+        # Seek each 3-second segment as its own input and join them with the concat filter,
+        # so the source clip is written in one pass without intermediate files
+        cmd = ['ffmpeg', '-y']
+        for ts in timestamps:
+            cmd += ['-ss', str(ts), '-t', '3', '-i', str(self.input_file)]
+        
+        streams = "v=1:a=1" if has_audio else "v=1:a=0"
+        pads = "".join(f"[{i}:v][{i}:a]" if has_audio else f"[{i}:v]" for i in range(len(timestamps)))
+        outputs = "[v][a]" if has_audio else "[v]"
+        cmd += ['-filter_complex', f"{pads}concat=n={len(timestamps)}:{streams}{outputs}", '-map', '[v]']
+        if has_audio:
+            cmd += ['-map', '[a]', '-c:a', 'aac']
+        cmd += ['-c:v', 'libx264', '-crf', '16', '-preset', 'ultrafast', str(self.source_clip)]
         
-        cmd = [
-            'ffmpeg', '-y', '-f', 'concat', '-safe', '0', '-i', str(list_file),
-            '-c', 'copy', str(self.source_clip)
-        ]
         subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
         print(f"✅ Created benchmark source: {self.source_clip} (~9s)")
 
-    def _monitor_cpu(self):
-        self.cpu_readings = []
-        p = psutil.Process()
-        while self.cpu_monitor_active:
-            # Record system-wide CPU for simplicity, or process specific if needed.
-            # Usually encoding affects whole system responsiveness, so system-wide is good metric for "Cost".
-            self.cpu_readings.append(psutil.cpu_percent(interval=0.5))
-
     def measure_quality(self, encoded_file: Path) -> Tuple[float, float, float]:
         """Calculate VMAF, SSIM, PSNR."""
         # Need to scale encoded file to match source if resolutions differ? 
         # For this benchmark we assume same resolution.
-        
-        # Build complex filter
-        # [0:v][1:v]libvmaf,ssim,psnr currently awkward to chain all in one output easily without valid model path issues for VMAF
-        # Let's run individual or grounded checks.
+        if self.has_vmaf:
+            return self._measure_quality_vmaf(encoded_file)
         
         vmaf_score = 0.0
         ssim_score = 0.0
         psnr_score = 0.0
 
-        # Run SSIM & PSNR (Fast)
+        # Run SSIM & PSNR (Fast) - fallback when libvmaf is unavailable
         cmd_metrics = [
             'ffmpeg', '-i', str(encoded_file), '-i', str(self.source_clip),
             '-lavfi', 'ssim;[0:v][1:v]psnr', 
@@ -163,84 +201,99 @@ class ComparativeBenchmark:
             output = res.stderr
             
             # Parse SSIM
-            # [Parsed_ssim_0 @ ...] SSIM Y:0.98... All:0.98...
-            import re
-            ssim_match = re.search(r"SSIM.*?All:([0-9\.]+)", output)
+            ssim_match = _SSIM_RE.search(output)
             if ssim_match:
                 ssim_score = float(ssim_match.group(1))
             
             # Parse PSNR
-            # [Parsed_psnr_1 @ ...] PSNR y:30... average:30...
-            psnr_match = re.search(r"PSNR.*?average:([0-9\.]+)", output)
+            psnr_match = _PSNR_RE.search(output)
             if psnr_match:
                 psnr_score = float(psnr_match.group(1))
                 
         except Exception as e:
             logger.error(f"Metrics calculation failed: {e}")
 
-        # Run VMAF (Slow) if enabled
-        if self.has_vmaf:
-            # We assume default model is available to ffmpeg
-            cmd_vmaf = [
-                'ffmpeg', '-i', str(encoded_file), '-i', str(self.source_clip),
-                '-lavfi', 'libvmaf', '-f', 'null', '-'
-            ]
-            try:
-                res = subprocess.run(cmd_vmaf, capture_output=True, text=True)
-                # Output: [libvmaf @ ...] VMAF score: 95.123
-                vmaf_match = re.search(r"VMAF score:\s*([0-9\.]+)", res.stderr)
-                if vmaf_match:
-                    vmaf_score = float(vmaf_match.group(1))
-            except Exception as e:
-                logger.error(f"VMAF calculation failed: {e}")
-
         return vmaf_score, ssim_score, psnr_score
 
-    def run_encoding(self, mode_name: str, target_desc: str, cmd_base: List[str], encoder_name: str, output_file: Path):
-        """Run single encoding task."""
-        print(f"   Now running: {encoder_name} | {mode_name} | {target_desc} ...", end="", flush=True)
-        
-        # Start CPU Monitor
-        self.cpu_monitor_active = True
-        monitor_thread = threading.Thread(target=self._monitor_cpu)
-        monitor_thread.start()
-        
-        start_time = time.time()
+    def _measure_quality_vmaf(self, encoded_file: Path) -> Tuple[float, float, float]:
+        """Calculate VMAF, SSIM and PSNR in a single libvmaf pass (one decode of each input)."""
+        # Relative log path + cwd avoids escaping drive letters/backslashes inside the filtergraph
+        log_name = f"{encoded_file.stem}_vmaf.json"
+        log_path = self.temp_dir / log_name
+        cmd = [
+            'ffmpeg', '-nostats', '-loglevel', 'error',
+            '-i', str(encoded_file.resolve()), '-i', str(self.source_clip.resolve()),
+            '-lavfi', f"libvmaf=feature='name=psnr|name=float_ssim':log_fmt=json:log_path={log_name}",
+            '-f', 'null', '-'
+        ]
         
         try:
-            # Run ffmpeg
-            res = subprocess.run(cmd_base + [str(output_file)], capture_output=True, text=True)
+            res = subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True,
+                                 cwd=self.temp_dir)
             if res.returncode != 0:
-                print(" ❌ Failed")
-                logger.error(res.stderr)
-                return
+                logger.error(f"VMAF calculation failed: {res.stderr[-500:]}")
+                return 0.0, 0.0, 0.0
+            
+            with open(log_path, 'r', encoding='utf-8') as f:
+                pooled = json.load(f).get('pooled_metrics', {})
+            
+            def pooled_mean(name: str) -> float:
+                return float(pooled.get(name, {}).get('mean', 0.0))
+            
+            return pooled_mean('vmaf'), pooled_mean('float_ssim'), pooled_mean('psnr_y')
+        except Exception as e:
+            logger.error(f"VMAF calculation failed: {e}")
+            return 0.0, 0.0, 0.0
         finally:
-            self.cpu_monitor_active = False
-            monitor_thread.join()
+            if log_path.exists():
+                log_path.unlink()
 
-        end_time = time.time()
-        duration = end_time - start_time
+    def run_encoding(self, mode_name: str, target_desc: str, cmd_base: List[str], encoder_name: str,
+                     output_file: Path) -> Optional[BenchmarkResult]:
+        """Run single encoding task."""
+        label = f"{encoder_name} | {mode_name} | {target_desc}"
+        print(f"   Now running: {label} ...", flush=True)
+        
+        start_time = time.time()
+        # System-wide CPU is integrated from two snapshots around the encode (no per-tick sampling)
+        cpu_t0 = psutil.cpu_times()
+        
+        # Run ffmpeg with structured progress on stdout
+        cmd = cmd_base + ['-progress', 'pipe:1', '-nostats', str(output_file)]
+        proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
         
-        # Parse FPS
         fps = 0.0
-        # frame=  234 fps= 45 ...
-        import re
-        fps_match = re.findall(r"fps=\s*([0-9\.]+)", res.stderr)
-        if fps_match:
-            fps = float(fps_match[-1])
+        for line in proc.stdout:
+            if line.startswith(b"fps="):
+                try:
+                    fps = float(line[4:])
+                except ValueError:
+                    pass
+        proc.wait()
+        cpu_t1 = psutil.cpu_times()
+        
+        if proc.returncode != 0:
+            print(f"   ❌ Failed: {label}")
+            # Rare path: re-run once with stderr captured (errors only) to log the cause
+            diag = subprocess.run(cmd_base + ['-nostats', '-loglevel', 'error', str(output_file)],
+                                  stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+            logger.error(f"ffmpeg exited with code {proc.returncode}: {' '.join(cmd)}\n{diag.stderr}")
+            return None
+
+        end_time = time.time()
+        duration = end_time - start_time
         
         # Metrics
         size_mb = output_file.stat().st_size / (1024 * 1024)
         bitrate_mbps = (size_mb * 8) / 9.0 # approx 9s duration
         
-        cpu_avg = sum(self.cpu_readings) / len(self.cpu_readings) if self.cpu_readings else 0
+        cpu_avg = self._cpu_busy_percent(cpu_t0, cpu_t1)
         
-        print(" Analyzing...", end="", flush=True)
         vmaf, ssim, psnr = self.measure_quality(output_file)
         
-        print(f" Done! (VMAF: {vmaf:.1f}, Size: {size_mb:.2f}MB, Time: {duration:.2f}s)")
+        print(f"   Done: {label} (VMAF: {vmaf:.1f}, Size: {size_mb:.2f}MB, Time: {duration:.2f}s)")
         
-        self.results.append(BenchmarkResult(
+        return BenchmarkResult(
             encoder=encoder_name,
             preset="default", # Simplified
             mode=mode_name,
@@ -253,7 +306,25 @@ class ComparativeBenchmark:
             vmaf=vmaf,
             ssim=ssim,
             psnr=psnr
-        ))
+        )
+
+    @staticmethod
+    def _cpu_busy_percent(t0, t1) -> float:
+        """Average system-wide CPU% between two psutil.cpu_times() snapshots."""
+        total = sum(t1) - sum(t0)
+        if total <= 0:
+            return 0.0
+        return 100.0 * (1.0 - (t1.idle - t0.idle) / total)
+
+    def _run_pair(self, *jobs: Optional[tuple]):
+        """Run an x265/NVENC job pair (serially, or overlapped on CPU+GPU) and keep results in job order."""
+        jobs = [job for job in jobs if job is not None]
+        if self.overlap_encoders and len(jobs) > 1:
+            with ThreadPoolExecutor(max_workers=len(jobs)) as ex:
+                results = list(ex.map(lambda job: self.run_encoding(*job), jobs))
+        else:
+            results = [self.run_encoding(*job) for job in jobs]
+        self.results.extend(r for r in results if r is not None)
 
     def run_benchmarks(self):
         modes_a_bitrate = [5, 15, 30] # Mbps
@@ -273,9 +344,10 @@ class ComparativeBenchmark:
                 '-b:v', target,
                 '-c:a', 'copy'
             ]
-            self.run_encoding("FixedBitrate", target, cmd_x265, "libx265", out_x265)
+            x265_job = ("FixedBitrate", target, cmd_x265, "libx265", out_x265)
             
             # NVENC
+            nvenc_job = None
             if self.has_nvenc:
                 out_nvenc = self.temp_dir / f"nvenc_rate_{b}M.mp4"
                 cmd_nvenc = [
@@ -288,7 +360,9 @@ class ComparativeBenchmark:
                     '-bufsize', f"{int(b*2)}M",
                     '-c:a', 'copy'
                 ]
-                self.run_encoding("FixedBitrate", target, cmd_nvenc, "nvenc_p7", out_nvenc)
+                nvenc_job = ("FixedBitrate", target, cmd_nvenc, "nvenc_p7", out_nvenc)
+            
+            self._run_pair(x265_job, nvenc_job)
 
         # --- Mode B: Quality Match ---
         print("\n💎 Running Mode B: Quality Match (File Size Mode)")
@@ -302,9 +376,10 @@ class ComparativeBenchmark:
                 '-crf', str(q),
                 '-c:a', 'copy'
             ]
-            self.run_encoding("FixedQuality", f"CRF {q}", cmd_x265, "libx265", out_x265)
+            x265_job = ("FixedQuality", f"CRF {q}", cmd_x265, "libx265", out_x265)
             
             # NVENC (CQ)
+            nvenc_job = None
             if self.has_nvenc:
                 out_nvenc = self.temp_dir / f"nvenc_cq_{q}.mp4"
                 cmd_nvenc = [
@@ -316,7 +391,9 @@ class ComparativeBenchmark:
                     '-b:v', '0', # Important for CQ mode
                     '-c:a', 'copy'
                 ]
-                self.run_encoding("FixedQuality", f"CQ {q}", cmd_nvenc, "nvenc_p7", out_nvenc)
+                nvenc_job = ("FixedQuality", f"CQ {q}", cmd_nvenc, "nvenc_p7", out_nvenc)
+            
+            self._run_pair(x265_job, nvenc_job)
 
     def generate_report(self):
         report_file = self.output_dir / "benchmark_report.md"
@@ -325,9 +402,8 @@ class ComparativeBenchmark:
         # Write CSV
         with open(csv_file, 'w', newline='') as f:
             writer = csv.writer(f)
-            writer.writerow(BenchmarkResult._fields)
-            for r in self.results:
-                writer.writerow(r)
+            writer.writerow([f.name for f in fields(BenchmarkResult)])
+            writer.writerows(map(astuple, self.results))
         
         # Write Markdown
         with open(report_file, 'w', encoding='utf-8') as f:
@@ -363,9 +439,11 @@ def main():
     parser.add_argument("--output", default=Path("benchmark_results_v2"), type=Path)
     parser.add_argument("--check-deps", action="store_true")
     parser.add_argument("--force-cpu", action="store_true")
+    parser.add_argument("--overlap-encoders", action="store_true",
+                        help="Run each libx265/NVENC pair concurrently (CPU + GPU); timings and system CPU%% then cover both encodes")
     args = parser.parse_args()
     
-    bench = ComparativeBenchmark(args.input, args.output, args.force_cpu)
+    bench = ComparativeBenchmark(args.input, args.output, args.force_cpu, args.overlap_encoders)
     bench.check_deps()
     
     if args.check_deps:
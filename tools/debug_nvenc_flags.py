@@ -1,6 +1,41 @@
+import argparse
+import collections
+import itertools
+import json
+import os
+import shlex
 import subprocess
 import sys
 import shutil
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+# Winning combo per ffmpeg build, so later runs can skip the search
+CACHE_FILE = Path.home() / ".cache" / "vreconder" / "nvenc_flags.json"
+
+parser = argparse.ArgumentParser(description="Find an hevc_nvenc flag combo this machine accepts")
+parser.add_argument('--full', action='store_true',
+                    help='encode the whole input instead of a short probe')
+parser.add_argument('--probe-frames', type=int, default=None,
+                    help='frames to encode per combo when probing (default: 30 for file, 60 for lavfi)')
+parser.add_argument('--source', choices=['file', 'lavfi'], default='file',
+                    help='file: decode the sample clip; lavfi: synthetic frame uploaded once to the GPU')
+parser.add_argument('--jobs', type=int, default=2,
+                    help='combos to run at once; consumer GPUs cap concurrent NVENC sessions (default: 2)')
+parser.add_argument('--refresh', action='store_true',
+                    help='ignore the cached result and search again')
+parser.add_argument('--write-output', action='store_true',
+                    help='write each combo to an mp4 instead of the null muxer')
+parser.add_argument('--verbose', '-v', action='store_true',
+                    help='keep ffmpeg progress stats in the captured output')
+args = parser.parse_args()
+if args.full and args.source == 'lavfi':
+    parser.error("--full needs --source file (the lavfi source loops forever)")
+
+# NVENC validates the session config at init, so a handful of frames is
+# enough to tell whether a combo is accepted.
+default_probe_frames = 60 if args.source == 'lavfi' else 30
+probe_frames = None if args.full else (args.probe_frames or default_probe_frames)
 
 # Check ffmpeg availability
 ffmpeg_path = shutil.which('ffmpeg')
@@ -10,97 +45,151 @@ if not ffmpeg_path:
 
 print(f"Using ffmpeg: {ffmpeg_path}")
 
+st = os.stat(ffmpeg_path)
+cache_key = f"{os.path.realpath(ffmpeg_path)}:{st.st_size}:{st.st_mtime_ns}"
+if not args.refresh:
+    try:
+        with open(CACHE_FILE, 'r', encoding='utf-8') as f:
+            cached = json.load(f)
+        if cached.get('key') == cache_key:
+            print(f"\n🎉 Cached finding: '{cached['name']}' works: {' '.join(cached['flags'])}")
+            print("   (run with --refresh to search again)")
+            sys.exit(0)
+    except (OSError, ValueError, KeyError):
+        pass
+
 # Flags from hevc_encoder.py we want to test
 # input/output paths
 input_file = "C:\\Users\\carll\\Documents\\Projects\\VREconder\\benchmark_results\\temp_clips\\sample_0_ref.mp4"
 output_file = "C:\\Users\\carll\\Documents\\Projects\\VREconder\\benchmark_results\\temp_clips\\debug_nvenc.mp4"
 
-# Basic flags common to all
-base_flags = [
+if args.source == 'lavfi':
+    # One black frame is uploaded to the GPU and looped there: no CPU decode
+    # and a single PCIe transfer instead of one per frame.
+    input_flags = [
+        '-init_hw_device', 'cuda=cu', '-filter_hw_device', 'cu',
+        '-f', 'lavfi', '-i', 'color=c=black:s=1920x1080:r=60',
+        '-vf', 'format=yuv420p,trim=end_frame=1,hwupload=extra_hw_frames=64,loop=loop=-1:size=1:start=0',
+    ]
+else:
+    input_flags = ['-i', input_file]
+
+# Basic flags common to all. Audio is dropped (-an): only whether hevc_nvenc
+# accepts the video flags matters here.
+base_flags = (
     ffmpeg_path,
-    '-stats',
+    '-stats' if args.verbose else '-nostats',
     '-y',
-    '-i', input_file,
+    *input_flags,
+    '-an',
     '-c:v', 'hevc_nvenc',
-    '-c:a', 'aac',
-    '-b:a', '128k',
-]
+)
 
 
-def test_flags(name, flags):
-    print(f"\n--- Testing Combo: {name} ---")
-    cmd = base_flags + flags + [output_file]
-    print("Command:", " ".join(cmd))
+def test_flags(flags, output_args, probe_frames=30):
+    """Run one combo; returns (cmd, success, last stderr lines) without printing,
+    so several combos can run at once. probe_frames=None encodes the full input."""
+    frame_limit = ['-frames:v', str(probe_frames)] if probe_frames else []
+    cmd = [*base_flags, *flags, *frame_limit, *output_args]
     
     try:
-        result = subprocess.run(
+        p = subprocess.Popen(
             cmd, 
-            stdout=subprocess.PIPE, 
+            stdout=subprocess.DEVNULL, 
             stderr=subprocess.PIPE, 
-            text=True
+            text=True,
+            bufsize=1
         )
-        if result.returncode == 0:
-            print("✅ SUCCESS!")
-            return True
-        else:
-            print("❌ FAILURE!")
-            # Print last few lines of error
-            lines = result.stderr.splitlines()
-            for line in lines[-5:]:
-                print(f"   {line}")
-            return False
+        # Only the last few lines of error are kept, whatever the encode length
+        tail = collections.deque(maxlen=5)
+        for line in p.stderr:
+            tail.append(line.rstrip('\n'))
+        return cmd, p.wait() == 0, list(tail)
     except Exception as e:
-        print(f"Exec Error: {e}")
-        return False
-
-# Combo 1: Current project new fix (p4 preset, rc vbr, cq)
-combo_1 = [
-    '-preset', 'p4',
-    '-rc', 'vbr',
-    '-cq', '25',
-    '-b:v', '0',
-    '-maxrate', '50M',
-    '-bufsize', '100M'
-]
+        return cmd, False, [f"Exec Error: {e}"]
 
-# Combo 2: Simplified (remove rc explicit, just cq)
-combo_2 = [
-    '-preset', 'p4',
-    '-rc', 'constqp', # try constqp
-    '-qp', '25',
-    '-b:v', '0'
-]
 
-# Combo 3: Minimal (just preset and cq)
-# Note: some nvenc use -cq, others -qp. 
-combo_3 = [
-    '-preset', 'p4',
-    '-cq', '25' 
-]
+def session_limited(tail):
+    """The driver refused to open another encode session (concurrent session cap),
+    which says nothing about whether the flags themselves are accepted."""
+    return any('OpenEncodeSession' in line for line in tail)
 
-# Combo 4: Standard ffmpeg nvenc CRF-like
-combo_4 = [
-    '-preset', 'p4',
-    '-rc', 'constqp',
-    '-qp', '25'
-]
 
-# Combo 5: Just preset (CBR default)
-combo_5 = [
-    '-preset', 'p4',
-    '-b:v', '20M'
-]
+def quote_cmd(cmd):
+    """Copy-pasteable command line (paths with spaces stay intact)."""
+    return subprocess.list2cmdline(cmd) if os.name == 'nt' else shlex.join(cmd)
+
+
+def report(name, cmd, success, tail):
+    print(f"\n--- Testing Combo: {name} ---")
+    # The command line is only built when it is shown: failures, or -v
+    if args.verbose or not success:
+        print("Command:", quote_cmd(cmd))
+    if success:
+        print("✅ SUCCESS!")
+    else:
+        print("❌ FAILURE!")
+        for line in tail:
+            print(f"   {line}")
+
+# Search matrix on the p1..p7 preset API. Legacy presets / rc modes are
+# deprecated and some driver+SDK combinations reject them at InitializeEncoder
+# ("Preset P1 to P7 not supported with older 2 Pass RC Modes").
+presets = ['p1', 'p4', 'p7']
+tunes = ['hq', 'll', 'ull']
+rate_controls = {
+    'vbr': ['-rc', 'vbr', '-cq', '25', '-b:v', '0'],
+    'constqp': ['-rc', 'constqp', '-qp', '25'],   # constqp takes -qp, not -cq
+    'cbr': ['-rc', 'cbr', '-b:v', '20M'],
+}
 
 tests = [
-    ("Current (VBR+CQ)", combo_1),
-    ("ConstQP", combo_2),
-    ("Minimal CQ", combo_3),
-    ("ConstQP Clean", combo_4),
-    ("Simple CBR", combo_5)
+    (f"{p}-{t}-{rc}", ['-preset', p, '-tune', t] + rc_flags)
+    for p, t, (rc, rc_flags) in itertools.product(presets, tunes, rate_controls.items())
 ]
 
-for name, flags in tests:
-    if test_flags(name, flags):
-        print(f"\n🎉 Finding: '{name}' works! Please update hevc_encoder.py specific flags.")
-        break
+def output_args_for(i):
+    """Null muxer by default (no disk I/O or moov writes); one mp4 per combo with --write-output."""
+    if args.write_output:
+        output_stem, output_ext = os.path.splitext(output_file)
+        return [f"{output_stem}_{i}{output_ext}"]
+    return ['-f', 'null', os.devnull]
+
+
+# Run combos concurrently (--jobs at a time) so the wall time is not the sum
+# of every combo.
+with ThreadPoolExecutor(max_workers=max(1, min(args.jobs, len(tests)))) as executor:
+    futures = [
+        executor.submit(test_flags, flags, output_args_for(i), probe_frames)
+        for i, (name, flags) in enumerate(tests)
+    ]
+    outcomes = [future.result() for future in futures]
+
+# Combos refused only because too many sessions were open are retried one at a time
+for i, (name, flags) in enumerate(tests):
+    if not outcomes[i][1] and session_limited(outcomes[i][2]):
+        outcomes[i] = test_flags(flags, output_args_for(i), probe_frames)
+
+working = None
+for (name, flags), (cmd, success, tail) in zip(tests, outcomes):
+    report(name, cmd, success, tail)
+    if success and working is None:
+        working = (name, flags)
+
+# An unresolved session error means an earlier combo may have been skipped: don't cache
+unresolved = [name for (name, _), (_, success, tail) in zip(tests, outcomes)
+              if not success and session_limited(tail)]
+
+if working:
+    name, flags = working
+    print(f"\n🎉 Finding: '{name}' works! Please update hevc_encoder.py specific flags.")
+    if unresolved:
+        print(f"Not caching: NVENC session errors for {', '.join(unresolved)}")
+    else:
+        try:
+            CACHE_FILE.parent.mkdir(parents=True, exist_ok=True)
+            with open(CACHE_FILE, 'w', encoding='utf-8') as f:
+                json.dump({'key': cache_key, 'name': name, 'flags': flags}, f)
+        except OSError as e:
+            print(f"Could not write cache: {e}")
 
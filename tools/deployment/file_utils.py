@@ -0,0 +1,34 @@
+#!/usr/bin/env python3
+"""
+部署工具共用的文件写入辅助函数
+"""
+import os
+import tempfile
+from pathlib import Path
+
+
+def write_text_atomic(target: Path, content: str) -> bool:
+    """原子写入文本文件，内容未变化时跳过
+    
+    先写入同目录下的临时文件再 os.replace，中断时不会留下半截文件。
+    
+    Returns:
+        是否实际写入（内容相同时返回False）
+    """
+    try:
+        if target.read_text(encoding='utf-8') == content:
+            return False
+    except (OSError, UnicodeDecodeError):
+        pass
+    
+    fd, tmp_path = tempfile.mkstemp(dir=target.parent, prefix=f".{target.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(content)
+        # mkstemp 创建的文件权限为0600，沿用原文件权限或使用常规的0644
+        os.chmod(tmp_path, target.stat().st_mode & 0o777 if target.exists() else 0o644)
+        os.replace(tmp_path, target)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+    return True
@@ -4,19 +4,30 @@
 自动安装和检查VREconder项目的依赖
 """
 import sys
+import importlib.util
 import subprocess
 import argparse
 import logging
 from pathlib import Path
 from typing import List, Dict, Tuple, Optional
 
+try:
+    from .file_utils import write_text_atomic
+except ImportError:
+    # 作为脚本直接运行时没有父包，脚本所在目录已在 sys.path 中
+    from file_utils import write_text_atomic
+
+# 项目根目录与当前解释器，导入时确定一次
+_PROJECT_ROOT = Path(__file__).resolve().parents[2]
+_PY = sys.executable
+
 
 class DependencyInstaller:
     """依赖安装工具"""
     
     def __init__(self):
         self.logger = logging.getLogger(__name__)
-        self.project_root = Path(__file__).parent.parent.parent
+        self.project_root = _PROJECT_ROOT
     
     def check_python_version(self) -> Tuple[bool, str]:
         """检查Python版本"""
@@ -44,52 +55,82 @@ class DependencyInstaller:
             return self._install_basic_dependencies()
         
         try:
-            cmd = [sys.executable, '-m', 'pip', 'install', '-r', str(requirements_file)]
-            result = subprocess.run(cmd, capture_output=True, text=True, check=True)
+            cmd = [_PY, '-m', 'pip', 'install', '-r', str(requirements_file)]
+            # 成功时不需要pip的安装日志，只保留stderr用于失败诊断
+            subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True, check=True)
             print("   ✅ 依赖安装成功")
             return True
         except subprocess.CalledProcessError as e:
             print(f"   ❌ 依赖安装失败: {e.stderr}")
             return False
     
+    @staticmethod
+    def _normalize_name(name: str) -> str:
+        """按 PEP 503 规范化包名，用于匹配pip输出"""
+        return name.lower().replace('_', '-').replace('.', '-')
+    
+    def _pip_install_batch(self, deps: List[str]) -> bool:
+        """一次pip调用安装全部依赖，再从输出中解析逐个包的结果
+        
+        单个进程共享解释器启动、依赖解析与索引请求，避免每个包各起一次pip。
+        优先只装wheel，跳过源码包的本地编译；有包没有wheel时回退为普通安装。
+        """
+        cmd = [_PY, '-m', 'pip', 'install',
+               '--disable-pip-version-check', '--no-input', '--no-warn-script-location', *deps]
+        binary_cmd = cmd[:4] + ['--only-binary=:all:', '--prefer-binary'] + cmd[4:]
+        try:
+            try:
+                result = subprocess.run(binary_cmd, capture_output=True, text=True, check=True)
+            except subprocess.CalledProcessError:
+                self.logger.debug("wheel-only安装失败，回退为允许源码构建的安装")
+                result = subprocess.run(cmd, capture_output=True, text=True, check=True)
+        except subprocess.CalledProcessError as e:
+            # pip 在解析/安装失败时整体回滚，逐个标记失败
+            error = e.stderr.strip().splitlines()[-1] if e.stderr.strip() else "安装失败"
+            for dep in deps:
+                print(f"   ❌ {dep}: {error}")
+            return False
+        
+        # "Successfully installed PyYAML-6.0.1 psutil-5.9.8"
+        installed = set()
+        for line in result.stdout.splitlines():
+            if line.startswith('Successfully installed '):
+                installed.update(self._normalize_name(pkg.rsplit('-', 1)[0])
+                                 for pkg in line.split()[2:])
+        
+        for dep in deps:
+            if self._normalize_name(dep) in installed:
+                print(f"   ✅ {dep}")
+            else:
+                print(f"   ✅ {dep} (已安装)")
+        return True
+    
     def _install_basic_dependencies(self) -> bool:
         """安装基本依赖"""
         basic_deps = [
             'pyyaml',
             'psutil',
-            'pathlib',
         ]
         
         print("   安装基本依赖...")
-        success = True
-        
-        for dep in basic_deps:
-            try:
-                cmd = [sys.executable, '-m', 'pip', 'install', dep]
-                result = subprocess.run(cmd, capture_output=True, text=True, check=True)
-                print(f"   ✅ {dep}")
-            except subprocess.CalledProcessError as e:
-                print(f"   ❌ {dep}: {e.stderr}")
-                success = False
-        
-        return success
+        return self._pip_install_batch(basic_deps)
     
     def check_dependencies(self) -> Dict[str, bool]:
         """检查依赖状态"""
         print("\n🔍 检查依赖状态...")
         
+        # pathlib 属于标准库，无需检查
         dependencies = {
             'yaml': False,
             'psutil': False,
-            'pathlib': False,
         }
         
         for dep_name in dependencies:
-            try:
-                __import__(dep_name)
+            # 只查找模块，不执行其顶层代码
+            if importlib.util.find_spec(dep_name) is not None:
                 dependencies[dep_name] = True
                 print(f"   ✅ {dep_name}")
-            except ImportError:
+            else:
                 print(f"   ❌ {dep_name} (未安装)")
         
         return dependencies
@@ -117,9 +158,10 @@ flake8>=3.8.0
 """
         
         try:
-            with open(requirements_path, 'w', encoding='utf-8') as f:
-                f.write(requirements_content)
-            print("   ✅ requirements.txt创建成功")
+            if write_text_atomic(requirements_path, requirements_content):
+                print("   ✅ requirements.txt创建成功")
+            else:
+                print("   ✅ requirements.txt已是最新，无需写入")
             return True
         except Exception as e:
             print(f"   ❌ 创建失败: {e}")
@@ -138,17 +180,7 @@ flake8>=3.8.0
             'isort'
         ]
         
-        success = True
-        for dep in dev_deps:
-            try:
-                cmd = [sys.executable, '-m', 'pip', 'install', dep]
-                result = subprocess.run(cmd, capture_output=True, text=True, check=True)
-                print(f"   ✅ {dep}")
-            except subprocess.CalledProcessError as e:
-                print(f"   ❌ {dep}: 安装失败")
-                success = False
-        
-        return success
+        return self._pip_install_batch(dev_deps)
     
     def create_parser(self) -> argparse.ArgumentParser:
         """创建命令行参数解析器"""
@@ -291,11 +323,11 @@ flake8>=3.8.0
             return 1
 
 
-def main():
-    """入口点函数"""
+def main(argv=None):
+    """入口点函数，返回退出码（argv 为 None 时解析 sys.argv）"""
     installer = DependencyInstaller()
-    sys.exit(installer.main())
+    return installer.main(argv)
 
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    sys.exit(main()) 
\ No newline at end of file
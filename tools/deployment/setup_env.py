@@ -5,24 +5,49 @@
 """
 import sys
 import os
+import json
 import subprocess
 import argparse
 import logging
+import functools
+import importlib
+import importlib.util
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
 from typing import Dict, List, Optional, Tuple
 
+try:
+    from .file_utils import write_text_atomic
+except ImportError:
+    # 作为脚本直接运行时没有父包，脚本所在目录已在 sys.path 中
+    from file_utils import write_text_atomic
+
+# 项目根目录，导入时计算一次
+_PROJECT_ROOT = Path(__file__).resolve().parents[2]
+
 # 添加src到路径
-sys.path.insert(0, str(Path(__file__).parent.parent.parent / "src"))
+sys.path.insert(0, str(_PROJECT_ROOT / "src"))
 
 from config.settings import Config
 
 
+@functools.lru_cache(maxsize=None)
+def _resolved_user_site() -> Optional[Path]:
+    """用户 site-packages 目录（进程内只解析一次），不存在时返回None"""
+    import site
+    user_site = site.getusersitepackages()
+    if user_site and Path(user_site).exists():
+        return Path(user_site)
+    return None
+
+
 class EnvironmentSetup:
     """环境配置工具"""
     
     def __init__(self):
         self.logger = logging.getLogger(__name__)
-        self.project_root = Path(__file__).parent.parent.parent
+        self.project_root = _PROJECT_ROOT
+        self.import_cache_file = self.project_root / ".setup_cache.json"
     
     def create_directories(self) -> bool:
         """创建必要的目录"""
@@ -36,11 +61,17 @@ class EnvironmentSetup:
             'config'
         ]
         
+        # 一次列出项目根目录，只对缺失的目录发起mkdir
+        with os.scandir(self.project_root) as entries:
+            existing = {entry.name for entry in entries if entry.is_dir()}
+        
         success = True
         for dir_name in directories:
-            dir_path = self.project_root / dir_name
+            if dir_name in existing:
+                print(f"   ✅ {dir_name}/")
+                continue
             try:
-                dir_path.mkdir(exist_ok=True)
+                (self.project_root / dir_name).mkdir(exist_ok=True)
                 print(f"   ✅ {dir_name}/")
             except Exception as e:
                 print(f"   ❌ {dir_name}/: {e}")
@@ -99,8 +130,7 @@ network:
         
         try:
             config_file.parent.mkdir(exist_ok=True)
-            with open(config_file, 'w', encoding='utf-8') as f:
-                f.write(sample_config)
+            write_text_atomic(config_file, sample_config)
             print(f"   ✅ 配置文件创建成功: {config_file}")
             return True
         except Exception as e:
@@ -181,13 +211,15 @@ network:
         
         # 创建.pth文件（如果在site-packages中）
         try:
-            import site
-            user_site = site.getusersitepackages()
+            user_site = _resolved_user_site()
             
-            if user_site and Path(user_site).exists():
-                pth_file = Path(user_site) / "vreconder.pth"
+            if user_site:
+                pth_file = user_site / "vreconder.pth"
+                if pth_file.exists() and pth_file.read_text() == src_path:
+                    print(f"   ✅ Python路径文件已存在: {pth_file}")
+                    return True
                 with open(pth_file, 'w') as f:
-                    f.write(str(self.project_root / "src"))
+                    f.write(src_path)
                 print(f"   ✅ 创建Python路径文件: {pth_file}")
                 return True
             else:
@@ -200,11 +232,90 @@ network:
             print(f"   ❌ Python路径配置失败: {e}")
             return False
     
+    def _module_file(self, module_name: str) -> Optional[Path]:
+        """不导入模块，直接定位其源文件（src/ 下的核心模块或项目根下的 tools 模块）"""
+        relative = Path(*module_name.split('.')).with_suffix('.py')
+        for base in (self.project_root / "src", self.project_root):
+            candidate = base / relative
+            if candidate.exists():
+                return candidate
+        return None
+    
+    def _import_cache_key(self, module_name: str) -> Optional[str]:
+        module_file = self._module_file(module_name)
+        if module_file is None:
+            return None
+        return f"{module_name}:{module_file.stat().st_mtime_ns}"
+    
+    def _environment_key(self) -> List[str]:
+        """当前运行环境的指纹：解释器、requirements.txt 与 site-packages 目录的mtime
+        
+        安装/卸载第三方包会改变 site-packages 目录的mtime，换解释器或venv时路径不同，
+        任一变化都使缓存整体失效。
+        """
+        import sysconfig
+        paths = {self.project_root / "requirements.txt",
+                 Path(sysconfig.get_paths()['purelib']), Path(sysconfig.get_paths()['platlib'])}
+        user_site = _resolved_user_site()
+        if user_site is not None:
+            paths.add(user_site)
+        
+        key = [sys.executable, sys.version]
+        for path in sorted(paths):
+            try:
+                key.append(f"{path}:{path.stat().st_mtime_ns}")
+            except OSError:
+                key.append(f"{path}:-")
+        return key
+    
+    def _load_import_cache(self, env_key: List[str]) -> set:
+        try:
+            with open(self.import_cache_file, 'r', encoding='utf-8') as f:
+                cached = json.load(f)
+            if cached.get('env') != env_key:
+                return set()
+            return set(cached['passed'])
+        except (OSError, ValueError, TypeError, KeyError, AttributeError):
+            return set()
+    
+    def _save_import_cache(self, env_key: List[str], passed: set):
+        try:
+            with open(self.import_cache_file, 'w', encoding='utf-8') as f:
+                json.dump({'env': env_key, 'passed': sorted(passed)}, f, indent=2)
+        except OSError as e:
+            self.logger.debug(f"无法写入安装测试缓存: {e}")
+    
+    @staticmethod
+    def _probe_import(module_name: str, class_name: Optional[str] = None) -> Optional[str]:
+        """导入单个模块并检查类是否存在，成功返回None，否则返回错误描述
+        
+        先用 find_spec 做廉价的存在性检查，找不到时不必真正执行导入。
+        """
+        try:
+            if importlib.util.find_spec(module_name) is None:
+                return "导入失败"
+            module = importlib.import_module(module_name)
+        except ImportError:
+            return "导入失败"
+        except Exception as e:
+            # 模块导入时抛出的其他异常同样记为失败，不中断整个测试
+            return f"导入出错: {e}"
+        if class_name and not hasattr(module, class_name):
+            return "类不存在"
+        return None
+    
     def test_installation(self) -> bool:
-        """测试安装"""
+        """测试安装
+        
+        导入成功的模块按 (模块名, 源文件mtime) 记录在 .setup_cache.json 中，
+        源文件与运行环境（见 _environment_key）均未变化时跳过重复导入。
+        """
         print("\n🧪 测试安装...")
         
         success = True
+        env_key = self._environment_key()
+        cached = self._load_import_cache(env_key)
+        passed = set()
         
         # 测试核心模块导入
         test_modules = [
@@ -214,17 +325,52 @@ network:
             ('processors.video_splitter', 'VideoSplitter')
         ]
         
+        # 测试tools模块
+        tools_modules = [
+            ('tools.batch.batch_processor', None),
+            ('tools.maintenance.ffmpeg_checker', None)
+        ]
+        
+        # 未命中缓存的模块并发导入（.pyc 读取与C扩展初始化期间会释放GIL），结果按原顺序输出
+        keys = {name: self._import_cache_key(name) for name, _ in test_modules + tools_modules}
+        pending = [(name, cls) for name, cls in test_modules + tools_modules
+                   if not (keys[name] and keys[name] in cached)]
+        errors = {}
+        # 共同的父包（如 tools，其 __init__ 会导入子包）先在主线程中串行导入：
+        # 多个线程同时初始化存在循环导入的包会触发 importlib 的 _DeadlockError
+        parents = {name.rsplit('.', 1)[0] for name, _ in pending if '.' in name}
+        failed_parents = set()
+        for parent in sorted(parents):
+            if self._probe_import(parent) is not None:
+                failed_parents.add(parent)
+        for name, _ in pending:
+            if '.' in name and name.rsplit('.', 1)[0] in failed_parents:
+                errors[name] = "导入失败"
+        pending = [(name, cls) for name, cls in pending if name not in errors]
+        if pending:
+            with ThreadPoolExecutor(max_workers=len(pending)) as executor:
+                futures = {executor.submit(self._probe_import, name, cls): name
+                           for name, cls in pending}
+                for future in as_completed(futures):
+                    errors[futures[future]] = future.result()
+        
+        def report(module_name: str, class_name: Optional[str]) -> bool:
+            label = f"{module_name}.{class_name}" if class_name else module_name
+            if module_name not in errors:
+                passed.add(keys[module_name])
+                print(f"   ✅ {label} (缓存)")
+                return True
+            error = errors[module_name]
+            if error:
+                print(f"   ❌ {label}: {error}")
+                return False
+            if keys[module_name]:
+                passed.add(keys[module_name])
+            print(f"   ✅ {label}")
+            return True
+        
         for module_name, class_name in test_modules:
-            try:
-                module = __import__(module_name, fromlist=[class_name])
-                getattr(module, class_name)
-                print(f"   ✅ {module_name}.{class_name}")
-            except ImportError as e:
-                print(f"   ❌ {module_name}.{class_name}: 导入失败")
-                success = False
-            except AttributeError as e:
-                print(f"   ❌ {module_name}.{class_name}: 类不存在")
-                success = False
+            success &= report(module_name, class_name)
         
         # 测试主入口
         main_script = self.project_root / "src" / "main.py"
@@ -234,19 +380,11 @@ network:
             print("   ❌ src/main.py: 文件不存在")
             success = False
         
-        # 测试tools模块
-        tools_modules = [
-            'tools.batch.batch_processor',
-            'tools.maintenance.ffmpeg_checker'
-        ]
+        for module_name, class_name in tools_modules:
+            success &= report(module_name, class_name)
         
-        for module_name in tools_modules:
-            try:
-                __import__(module_name)
-                print(f"   ✅ {module_name}")
-            except ImportError:
-                print(f"   ❌ {module_name}: 导入失败")
-                success = False
+        if passed != cached:
+            self._save_import_cache(env_key, passed)
         
         return success
     
@@ -277,14 +415,13 @@ python src/main.py "$@"
         success = True
         for script_path, script_content in scripts:
             try:
-                with open(script_path, 'w', encoding='utf-8') as f:
-                    f.write(script_content)
+                written = write_text_atomic(script_path, script_content)
                 
                 # 设置可执行权限（Unix系统）
                 if script_path.suffix == '.sh':
                     script_path.chmod(0o755)
                 
-                print(f"   ✅ {script_path.name}")
+                print(f"   ✅ {script_path.name}" + ("" if written else " (未变化)"))
             except Exception as e:
                 print(f"   ❌ {script_path.name}: {e}")
                 success = False
@@ -424,11 +561,11 @@ python src/main.py "$@"
             return 1
 
 
-def main():
-    """入口点函数"""
+def main(argv=None):
+    """入口点函数，返回退出码（argv 为 None 时解析 sys.argv）"""
     setup = EnvironmentSetup()
-    sys.exit(setup.main())
+    return setup.main(argv)
 
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    sys.exit(main()) 
\ No newline at end of file
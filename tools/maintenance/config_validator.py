@@ -3,10 +3,17 @@
 配置验证工具
 验证VREconder项目的配置文件正确性
 """
+import os
 import sys
-import yaml
+import json
+import time
+import hashlib
+import functools
 import argparse
 import logging
+import tempfile
+import importlib.util
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import Dict, Any, List, Optional, Tuple
 
@@ -15,13 +22,209 @@ sys.path.insert(0, str(Path(__file__).parent.parent.parent / "src"))
 
 from config.settings import Config
 
+try:
+    import fastjsonschema  # 可选：把 SCHEMA 编译成直线式的Python校验函数
+except ImportError:
+    fastjsonschema = None
+
+try:
+    import orjson  # 可选：--json 输出时序列化更快
+except ImportError:
+    orjson = None
+
+
+_HEVC_PRESETS = ['ultrafast', 'superfast', 'veryfast', 'faster', 'fast',
+                 'medium', 'slow', 'slower', 'veryslow']
+# 成员检查用集合；需要按固定顺序输出的项保持为元组
+_VALID_PRESETS = frozenset(_HEVC_PRESETS)
+_VALID_PROFILES = frozenset({'main', 'main10', 'main12'})
+_BASIC_PATHS = ('download', 'output', 'temp', 'logs')
+_PLATFORMS = ('windows', 'macos', 'linux')
+_PLATFORM_SECTION = {'type': 'object', 'properties': {'ffmpeg_path': {'type': 'string'}}}
+
+# processing 节的取值规则: (键, 类型, 下限, 上限, 级别, 单位)，上限为None表示不限
+# 'error' 级别的规则同时写入 SCHEMA，范围常量只在这里维护
+PROCESSING_RULES = (
+    ('max_workers', int, 1, 32, 'warning', ''),
+    ('batch_size', int, 1, 100, 'warning', ''),
+    ('timeout', int, 1, None, 'error', '秒'),
+)
+_SCHEMA_TYPES = {int: 'integer', float: 'number', str: 'string'}
+
+
+def _rule_schema(typ, lo, hi) -> Dict[str, Any]:
+    """把一条取值规则转换为 JSON Schema 片段"""
+    schema = {'type': _SCHEMA_TYPES[typ], 'minimum': lo}
+    if hi is not None:
+        schema['maximum'] = hi
+    return schema
+
+
+# 配置结构约束（只包含会导致错误的项，建议性检查仍由 _validate_* 给出警告）
+SCHEMA = {
+    '$schema': 'http://json-schema.org/draft-07/schema#',
+    'type': 'object',
+    'properties': {
+        'app': {'type': 'object'},
+        'paths': {
+            'type': 'object',
+            'properties': {
+                'download': {'type': 'string'},
+                'output': {'type': 'string'},
+                'temp': {'type': 'string'},
+                'logs': {'type': 'string'},
+                'windows': _PLATFORM_SECTION,
+                'macos': _PLATFORM_SECTION,
+                'linux': _PLATFORM_SECTION,
+            },
+        },
+        'encoding': {
+            'type': 'object',
+            'properties': {
+                'hevc': {
+                    'type': 'object',
+                    'properties': {
+                        'preset': {'enum': _HEVC_PRESETS},
+                        'crf_range': {
+                            'type': 'object',
+                            'properties': {
+                                'min': {'type': 'number', 'minimum': 0, 'maximum': 51},
+                                'max': {'type': 'number', 'minimum': 0, 'maximum': 51},
+                            },
+                        },
+                    },
+                },
+            },
+        },
+        'processing': {
+            'type': 'object',
+            'properties': {
+                name: _rule_schema(typ, lo, hi)
+                for name, typ, lo, hi, severity, _ in PROCESSING_RULES
+                if severity == 'error'
+            },
+        },
+    },
+}
+
+def _write_json(result: Dict[str, Any]):
+    """把结果以单个JSON对象写到stdout（--json 模式下的唯一输出）"""
+    if orjson is not None:
+        sys.stdout.buffer.write(orjson.dumps(result) + b"\n")
+    else:
+        sys.stdout.write(json.dumps(result, ensure_ascii=False) + "\n")
+    sys.stdout.flush()
+
+
+# 示例配置内容固定不变，直接保存序列化后的YAML，运行时无需再调用 yaml.dump
+_SAMPLE_YAML = b"""\
+app:
+  name: VR Video Processing Pipeline
+  version: 2.0.0
+  debug: false
+paths:
+  download: ./downloads
+  output: ./output
+  temp: ./temp
+  logs: ./logs
+  windows:
+    ffmpeg_path: C:/ffmpeg/bin/ffmpeg.exe
+  macos:
+    ffmpeg_path: /usr/local/bin/ffmpeg
+  linux:
+    ffmpeg_path: /usr/bin/ffmpeg
+encoding:
+  hevc:
+    preset: slower
+    crf_range:
+      min: 20
+      max: 38
+    profile: main10
+processing:
+  max_workers: 4
+  batch_size: 10
+  timeout: 3600
+network:
+  share_name: VR_Project
+  access_script_auto_create: true
+"""
+
+@functools.lru_cache(maxsize=None)
+def _yaml():
+    """按需导入PyYAML（--create-sample 等路径无需加载），返回 (yaml模块, SafeLoader)"""
+    import yaml
+    try:
+        # libyaml C绑定，解析比纯Python实现快一个数量级
+        from yaml import CSafeLoader as SafeLoader
+    except ImportError:
+        from yaml import SafeLoader
+    return yaml, SafeLoader
+
+
+# fastjsonschema 生成的校验代码缓存目录（按 SCHEMA 哈希命名）
+VALIDATOR_CACHE_DIR = Path.home() / ".cache" / "vreconder"
+
+
+def _load_validator():
+    """返回编译后的 SCHEMA 校验函数
+    
+    首次运行把生成的Python源码写入 validator_<sha1>.py，之后的运行直接导入，
+    省去每次启动重新编译schema。缓存不可用时退回内存编译。
+    """
+    digest = hashlib.sha1(
+        (fastjsonschema.VERSION + json.dumps(SCHEMA, sort_keys=True)).encode('utf-8')
+    ).hexdigest()
+    cache_path = VALIDATOR_CACHE_DIR / f"validator_{digest}.py"
+    
+    try:
+        if not cache_path.exists():
+            cache_path.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=cache_path.parent, suffix=".tmp")
+            try:
+                with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                    f.write(fastjsonschema.compile_to_code(SCHEMA))
+                os.replace(tmp_path, cache_path)
+            except BaseException:
+                # 写入失败（磁盘满、只读缓存目录等）时不留下 .tmp 文件
+                os.unlink(tmp_path)
+                raise
+        
+        spec = importlib.util.spec_from_file_location(f"_vreconder_validator_{digest}", cache_path)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        return module.validate
+    except (OSError, ImportError, SyntaxError, AttributeError,
+            fastjsonschema.JsonSchemaDefinitionException):
+        return fastjsonschema.compile(SCHEMA)
+
 
 class ConfigValidator:
     """配置验证工具"""
     
+    # 已加载的schema校验函数，所有实例共享
+    _validate = None
+    
     def __init__(self):
         self.logger = logging.getLogger(__name__)
         self.project_root = Path(__file__).parent.parent.parent
+        self.profile_failures = False
+        self.quiet = False
+        # 输出行缓冲，运行结束时一次写出
+        self._out: List[str] = []
+        # 最近一次 validate_config_file 解析出的配置数据，供 test_config_loading 复用
+        self.config_data: Optional[Dict[str, Any]] = None
+    
+    def _emit(self, *args):
+        """记录一行人类可读输出，由 _flush 统一写出；--json 模式下不输出"""
+        if not self.quiet:
+            self._out.append(" ".join(map(str, args)))
+    
+    def _flush(self):
+        """把缓冲的输出行一次写到stdout"""
+        if self._out:
+            sys.stdout.write("\n".join(self._out) + "\n")
+            sys.stdout.flush()
+            self._out.clear()
     
     def validate_config_file(self, config_path: Path) -> Tuple[bool, List[str], List[str]]:
         """验证配置文件
@@ -29,42 +232,26 @@ class ConfigValidator:
         Returns:
             (是否有效, 错误列表, 警告列表)
         """
-        print(f"🔍 验证配置文件: {config_path}")
-        print("-" * 50)
+        self._emit(f"🔍 验证配置文件: {config_path}")
+        self._emit("-" * 50)
         
         errors = []
         warnings = []
+        self.config_data = None
+        state = {'path': config_path, 'data': None, 'warnings': warnings}
         
-        # 检查文件存在性
-        if not config_path.exists():
-            errors.append(f"配置文件不存在: {config_path}")
-            return False, errors, warnings
+        # 廉价且最可能失败的检查排在前面，任一失败立即返回，不再做逐节检查
+        for check_name in self._FAST_CHECKS:
+            start = time.perf_counter()
+            ok, check_errors = getattr(self, check_name)(state)
+            if not ok:
+                errors.extend(check_errors)
+                if self.profile_failures:
+                    self.logger.info(f"fail-fast: {check_name} 失败 "
+                                     f"({(time.perf_counter() - start) * 1000:.2f}ms)")
+                return False, errors, warnings
         
-        # 检查文件格式
-        try:
-            with open(config_path, 'r', encoding='utf-8') as f:
-                config_data = yaml.safe_load(f)
-                print("✅ YAML格式: 有效")
-        except yaml.YAMLError as e:
-            errors.append(f"YAML格式错误: {e}")
-            return False, errors, warnings
-        except Exception as e:
-            errors.append(f"文件读取错误: {e}")
-            return False, errors, warnings
-        
-        if config_data is None:
-            config_data = {}
-        
-        # 验证必需的配置节
-        required_sections = ['app', 'paths', 'encoding', 'processing']
-        
-        print("\n📋 配置节检查:")
-        for section in required_sections:
-            if section in config_data:
-                print(f"   ✅ {section}")
-            else:
-                warnings.append(f"缺少配置节: {section}")
-                print(f"   ⚠️  {section} (缺失)")
+        config_data = self.config_data = state['data']
         
         # 验证应用配置
         if 'app' in config_data:
@@ -74,58 +261,146 @@ class ConfigValidator:
             if not isinstance(app_config.get('version'), str):
                 warnings.append("app.version 应该是字符串")
         
-        # 验证路径配置
-        if 'paths' in config_data:
-            self._validate_paths(config_data['paths'], errors, warnings)
+        # 路径/编码/处理三节互不依赖：并发检查（路径检查的stat调用可与其余检查重叠），
+        # 结果按固定顺序合并输出
+        sections = [(section, getattr(self, f'_validate_{section}'))
+                    for section in ('paths', 'encoding', 'processing') if section in config_data]
+        with ThreadPoolExecutor(max_workers=max(1, len(sections))) as executor:
+            futures = [executor.submit(validate, config_data[section]) for section, validate in sections]
+            for future in futures:
+                section_errors, section_warnings, lines = future.result()
+                errors.extend(section_errors)
+                warnings.extend(section_warnings)
+                self._emit("\n".join(lines))
         
-        # 验证编码配置
-        if 'encoding' in config_data:
-            self._validate_encoding(config_data['encoding'], errors, warnings)
+        return len(errors) == 0, errors, warnings
+    
+    # 快速检查的执行顺序（按失败可能性与开销排列），可根据 --profile-failures 的记录调整
+    _FAST_CHECKS = ('_check_exists', '_check_yaml', '_check_sections', '_check_schema')
+    
+    def _check_exists(self, state: Dict[str, Any]) -> Tuple[bool, List[str]]:
+        """检查文件存在性"""
+        config_path = state['path']
+        if not config_path.exists():
+            return False, [f"配置文件不存在: {config_path}"]
+        return True, []
+    
+    def _check_yaml(self, state: Dict[str, Any]) -> Tuple[bool, List[str]]:
+        """检查文件格式（整文件一次读入，UTF-8解码交给yaml解析器）"""
+        config_path = state['path']
+        yaml, loader = _yaml()
+        try:
+            config_data = yaml.load(config_path.read_bytes(), Loader=loader)
+            self._emit("✅ YAML格式: 有效")
+        except yaml.YAMLError as e:
+            # 按字节解析时错误标记里没有文件名，在此补上
+            return False, [f"YAML格式错误 ({config_path.name}): {e}"]
+        except Exception as e:
+            return False, [f"文件读取错误: {e}"]
         
-        # 验证处理配置
-        if 'processing' in config_data:
-            self._validate_processing(config_data['processing'], errors, warnings)
+        if config_data is None:
+            config_data = {}
+        if not isinstance(config_data, dict):
+            return False, ["配置文件顶层必须是键值映射"]
         
-        return len(errors) == 0, errors, warnings
+        state['data'] = config_data
+        return True, []
     
-    def _validate_paths(self, paths_config: Dict[str, Any], errors: List[str], warnings: List[str]):
-        """验证路径配置"""
-        print("\n📁 路径配置检查:")
+    def _check_sections(self, state: Dict[str, Any]) -> Tuple[bool, List[str]]:
+        """验证必需的配置节：缺失只给出警告，存在但不是映射则无法继续检查"""
+        config_data = state['data']
+        required_sections = ['app', 'paths', 'encoding', 'processing']
+        errors = []
+        
+        self._emit("\n📋 配置节检查:")
+        for section in required_sections:
+            if section not in config_data:
+                state['warnings'].append(f"缺少配置节: {section}")
+                self._emit(f"   ⚠️  {section} (缺失)")
+            elif not isinstance(config_data[section], dict):
+                errors.append(f"配置节 {section} 应该是字典格式")
+                self._emit(f"   ❌ {section} (格式错误)")
+            else:
+                self._emit(f"   ✅ {section}")
+        
+        return not errors, errors
+    
+    def _check_schema(self, state: Dict[str, Any]) -> Tuple[bool, List[str]]:
+        """结构校验：任一硬性约束不满足即失败"""
+        validate = self._schema_validator()
+        if validate is None:
+            return True, []
+        try:
+            validate(state['data'])
+            self._emit("\n✅ 结构校验: 通过")
+            return True, []
+        except fastjsonschema.JsonSchemaException as e:
+            self._emit(f"\n❌ 结构校验: {e.message}")
+            return False, [f"配置结构错误: {e.message}"]
+    
+    @classmethod
+    def _schema_validator(cls):
+        """按需加载schema校验函数；未安装 fastjsonschema 时返回None"""
+        if fastjsonschema is None:
+            return None
+        if cls._validate is None:
+            cls._validate = staticmethod(_load_validator())
+        return cls._validate
+    
+    def _validate_paths(self, paths_config: Dict[str, Any]) -> Tuple[List[str], List[str], List[str]]:
+        """验证路径配置
+        
+        Returns:
+            (错误列表, 警告列表, 输出行)
+        """
+        errors, warnings, lines = [], [], []
+        lines.append("\n📁 路径配置检查:")
+        # download/output/temp/logs 通常共用同一父目录，本次检查内每个目录只stat一次；
+        # 不跨调用缓存，目录可能在两次验证之间被创建或删除
+        parent_is_dir: Dict[Path, bool] = {}
         
         # 检查基本路径
-        basic_paths = ['download', 'output', 'temp', 'logs']
-        for path_name in basic_paths:
+        for path_name in _BASIC_PATHS:
             if path_name in paths_config:
                 path_value = paths_config[path_name]
                 try:
                     path_obj = Path(path_value)
                     # 检查父目录是否存在
-                    if path_obj.parent.exists():
-                        print(f"   ✅ {path_name}: {path_value}")
+                    parent = path_obj.parent
+                    if parent not in parent_is_dir:
+                        parent_is_dir[parent] = parent.is_dir()
+                    if parent_is_dir[parent]:
+                        lines.append(f"   ✅ {path_name}: {path_value}")
                     else:
                         warnings.append(f"路径 {path_name} 的父目录不存在: {path_value}")
-                        print(f"   ⚠️  {path_name}: {path_value} (父目录不存在)")
+                        lines.append(f"   ⚠️  {path_name}: {path_value} (父目录不存在)")
                 except Exception as e:
                     errors.append(f"路径 {path_name} 格式错误: {e}")
-                    print(f"   ❌ {path_name}: {path_value} (格式错误)")
+                    lines.append(f"   ❌ {path_name}: {path_value} (格式错误)")
             else:
                 warnings.append(f"缺少路径配置: {path_name}")
-                print(f"   ⚠️  {path_name} (缺失)")
+                lines.append(f"   ⚠️  {path_name} (缺失)")
         
         # 检查平台特定路径
-        platforms = ['windows', 'macos', 'linux']
-        for platform in platforms:
+        for platform in _PLATFORMS:
             if platform in paths_config:
                 platform_config = paths_config[platform]
                 if 'ffmpeg_path' in platform_config:
                     ffmpeg_path = platform_config['ffmpeg_path']
-                    print(f"   ✅ {platform}.ffmpeg_path: {ffmpeg_path}")
+                    lines.append(f"   ✅ {platform}.ffmpeg_path: {ffmpeg_path}")
                 else:
                     warnings.append(f"平台 {platform} 缺少 ffmpeg_path 配置")
+        
+        return errors, warnings, lines
     
-    def _validate_encoding(self, encoding_config: Dict[str, Any], errors: List[str], warnings: List[str]):
-        """验证编码配置"""
-        print("\n🎬 编码配置检查:")
+    def _validate_encoding(self, encoding_config: Dict[str, Any]) -> Tuple[List[str], List[str], List[str]]:
+        """验证编码配置
+        
+        Returns:
+            (错误列表, 警告列表, 输出行)
+        """
+        errors, warnings, lines = [], [], []
+        lines.append("\n🎬 编码配置检查:")
         
         if 'hevc' in encoding_config:
             hevc_config = encoding_config['hevc']
@@ -133,13 +408,11 @@ class ConfigValidator:
             # 检查预设
             if 'preset' in hevc_config:
                 preset = hevc_config['preset']
-                valid_presets = ['ultrafast', 'superfast', 'veryfast', 'faster', 'fast', 
-                               'medium', 'slow', 'slower', 'veryslow']
-                if preset in valid_presets:
-                    print(f"   ✅ hevc.preset: {preset}")
+                if isinstance(preset, str) and preset in _VALID_PRESETS:
+                    lines.append(f"   ✅ hevc.preset: {preset}")
                 else:
                     errors.append(f"无效的HEVC预设: {preset}")
-                    print(f"   ❌ hevc.preset: {preset} (无效)")
+                    lines.append(f"   ❌ hevc.preset: {preset} (无效)")
             
             # 检查CRF范围
             if 'crf_range' in hevc_config:
@@ -148,135 +421,98 @@ class ConfigValidator:
                     crf_min = crf_range.get('min', 0)
                     crf_max = crf_range.get('max', 51)
                     if 0 <= crf_min <= 51 and 0 <= crf_max <= 51 and crf_min <= crf_max:
-                        print(f"   ✅ hevc.crf_range: {crf_min}-{crf_max}")
+                        lines.append(f"   ✅ hevc.crf_range: {crf_min}-{crf_max}")
                     else:
                         errors.append(f"无效的CRF范围: min={crf_min}, max={crf_max}")
-                        print(f"   ❌ hevc.crf_range: {crf_min}-{crf_max} (无效)")
+                        lines.append(f"   ❌ hevc.crf_range: {crf_min}-{crf_max} (无效)")
                 else:
                     errors.append("hevc.crf_range 应该是字典格式")
             
             # 检查配置文件
             if 'profile' in hevc_config:
                 profile = hevc_config['profile']
-                valid_profiles = ['main', 'main10', 'main12']
-                if profile in valid_profiles:
-                    print(f"   ✅ hevc.profile: {profile}")
+                if isinstance(profile, str) and profile in _VALID_PROFILES:
+                    lines.append(f"   ✅ hevc.profile: {profile}")
                 else:
                     warnings.append(f"HEVC配置文件可能不受支持: {profile}")
-                    print(f"   ⚠️  hevc.profile: {profile} (可能不支持)")
+                    lines.append(f"   ⚠️  hevc.profile: {profile} (可能不支持)")
+        
+        return errors, warnings, lines
     
-    def _validate_processing(self, processing_config: Dict[str, Any], errors: List[str], warnings: List[str]):
-        """验证处理配置"""
-        print("\n⚙️  处理配置检查:")
+    def _validate_processing(self, processing_config: Dict[str, Any]) -> Tuple[List[str], List[str], List[str]]:
+        """验证处理配置
         
-        # 检查工作线程数
-        if 'max_workers' in processing_config:
-            max_workers = processing_config['max_workers']
-            if isinstance(max_workers, int) and 1 <= max_workers <= 32:
-                print(f"   ✅ max_workers: {max_workers}")
-            else:
-                warnings.append(f"max_workers 建议在1-32之间: {max_workers}")
-                print(f"   ⚠️  max_workers: {max_workers} (建议1-32)")
+        Returns:
+            (错误列表, 警告列表, 输出行)
+        """
+        errors, warnings, lines = [], [], []
+        lines.append("\n⚙️  处理配置检查:")
         
-        # 检查批处理大小
-        if 'batch_size' in processing_config:
-            batch_size = processing_config['batch_size']
-            if isinstance(batch_size, int) and 1 <= batch_size <= 100:
-                print(f"   ✅ batch_size: {batch_size}")
+        for name, typ, lo, hi, severity, unit in PROCESSING_RULES:
+            if name not in processing_config:
+                continue
+            value = processing_config[name]
+            if isinstance(value, typ) and lo <= value and (hi is None or value <= hi):
+                lines.append(f"   ✅ {name}: {value}{unit}")
+            elif severity == 'error':
+                expected = f"{lo}-{hi}之间的整数" if hi is not None else ("正整数" if lo == 1 else f"不小于{lo}的整数")
+                errors.append(f"{name} 必须是{expected}: {value}")
+                lines.append(f"   ❌ {name}: {value} (必须是{expected})")
             else:
-                warnings.append(f"batch_size 建议在1-100之间: {batch_size}")
-                print(f"   ⚠️  batch_size: {batch_size} (建议1-100)")
+                warnings.append(f"{name} 建议在{lo}-{hi}之间: {value}")
+                lines.append(f"   ⚠️  {name}: {value} (建议{lo}-{hi})")
         
-        # 检查超时设置
-        if 'timeout' in processing_config:
-            timeout = processing_config['timeout']
-            if isinstance(timeout, int) and timeout > 0:
-                print(f"   ✅ timeout: {timeout}秒")
-            else:
-                errors.append(f"timeout 必须是正整数: {timeout}")
-                print(f"   ❌ timeout: {timeout} (必须是正整数)")
+        return errors, warnings, lines
     
-    def test_config_loading(self, config_path: Path) -> bool:
-        """测试配置加载"""
-        print(f"\n🧪 测试配置加载...")
-        print("-" * 30)
+    def test_config_loading(self, config_path: Path, config_data: Optional[Dict[str, Any]] = None) -> bool:
+        """测试配置加载
+        
+        Args:
+            config_path: 配置文件路径
+            config_data: 已解析的配置数据；提供时直接构造Config，不再重新读取解析文件
+        """
+        self._emit(f"\n🧪 测试配置加载...")
+        self._emit("-" * 30)
         
         try:
             # 测试通过Config类加载
-            config = Config(str(config_path))
-            print("✅ 配置加载: 成功")
+            if config_data is not None and hasattr(Config, 'from_dict'):
+                config = Config.from_dict(config_data, str(config_path))
+            else:
+                config = Config(str(config_path))
+            self._emit("✅ 配置加载: 成功")
             
             # 测试一些基本的获取操作
             app_name = config.get('app.name', 'Unknown')
-            print(f"   应用名称: {app_name}")
+            self._emit(f"   应用名称: {app_name}")
             
             max_workers = config.get('processing.max_workers', 4)
-            print(f"   最大工作线程: {max_workers}")
+            self._emit(f"   最大工作线程: {max_workers}")
             
             # 测试路径解析
             try:
                 temp_path = config.get_path('paths.temp', './temp')
-                print(f"   临时路径: {temp_path}")
+                self._emit(f"   临时路径: {temp_path}")
             except Exception as e:
-                print(f"   ⚠️  路径解析失败: {e}")
+                self._emit(f"   ⚠️  路径解析失败: {e}")
             
             return True
             
         except Exception as e:
-            print(f"❌ 配置加载失败: {e}")
+            self._emit(f"❌ 配置加载失败: {e}")
             return False
     
     def create_sample_config(self, output_path: Path) -> bool:
         """创建示例配置文件"""
-        print(f"📝 创建示例配置文件: {output_path}")
-        
-        sample_config = {
-            'app': {
-                'name': 'VR Video Processing Pipeline',
-                'version': '2.0.0',
-                'debug': False
-            },
-            'paths': {
-                'download': './downloads',
-                'output': './output',
-                'temp': './temp',
-                'logs': './logs',
-                'windows': {
-                    'ffmpeg_path': 'C:/ffmpeg/bin/ffmpeg.exe'
-                },
-                'macos': {
-                    'ffmpeg_path': '/usr/local/bin/ffmpeg'
-                },
-                'linux': {
-                    'ffmpeg_path': '/usr/bin/ffmpeg'
-                }
-            },
-            'encoding': {
-                'hevc': {
-                    'preset': 'slower',
-                    'crf_range': {'min': 20, 'max': 38},
-                    'profile': 'main10'
-                }
-            },
-            'processing': {
-                'max_workers': 4,
-                'batch_size': 10,
-                'timeout': 3600
-            },
-            'network': {
-                'share_name': 'VR_Project',
-                'access_script_auto_create': True
-            }
-        }
+        self._emit(f"📝 创建示例配置文件: {output_path}")
         
         try:
             output_path.parent.mkdir(parents=True, exist_ok=True)
-            with open(output_path, 'w', encoding='utf-8') as f:
-                yaml.dump(sample_config, f, default_flow_style=False, indent=2, allow_unicode=True)
-            print("✅ 示例配置文件创建成功")
+            output_path.write_bytes(_SAMPLE_YAML)
+            self._emit("✅ 示例配置文件创建成功")
             return True
         except Exception as e:
-            print(f"❌ 创建示例配置文件失败: {e}")
+            self._emit(f"❌ 创建示例配置文件失败: {e}")
             return False
     
     def create_parser(self) -> argparse.ArgumentParser:
@@ -314,6 +550,16 @@ class ConfigValidator:
             default='config/settings_sample.yaml',
             help='示例配置文件输出路径'
         )
+        parser.add_argument(
+            '--profile-failures', 
+            action='store_true',
+            help='记录快速检查中失败的环节及耗时，用于调整检查顺序'
+        )
+        parser.add_argument(
+            '--json', 
+            action='store_true',
+            help='不输出检查过程，结束时只输出一个JSON结果（适合CI/pre-commit）'
+        )
         parser.add_argument(
             '--verbose', '-v', 
             action='store_true',
@@ -330,13 +576,17 @@ class ConfigValidator:
         # 设置日志
         level = logging.DEBUG if args.verbose else logging.INFO
         logging.basicConfig(level=level, format='%(levelname)s: %(message)s')
+        self.profile_failures = args.profile_failures
+        self.quiet = args.json
         
         try:
-            print("⚙️  VREconder 配置验证工具")
-            print("=" * 50)
+            self._emit("⚙️  VREconder 配置验证工具")
+            self._emit("=" * 50)
             
             if args.create_sample:
                 success = self.create_sample_config(args.output)
+                if args.json:
+                    _write_json({'created': success, 'output': str(args.output)})
                 return 0 if success else 1
             
             # 验证配置文件
@@ -345,49 +595,62 @@ class ConfigValidator:
             
             # 测试配置加载
             if is_valid:
-                load_success = self.test_config_loading(config_path)
+                load_success = self.test_config_loading(config_path, self.config_data)
                 if not load_success:
                     is_valid = False
             
+            if args.json:
+                _write_json({
+                    'config_file': str(config_path),
+                    'valid': is_valid,
+                    'errors': errors,
+                    'warnings': warnings,
+                })
+                return 0 if is_valid else 1
+            
             # 显示结果
-            print("\n" + "=" * 50)
+            self._emit("\n" + "=" * 50)
             
             if errors:
-                print("❌ 发现错误:")
+                self._emit("❌ 发现错误:")
                 for error in errors:
-                    print(f"   - {error}")
+                    self._emit(f"   - {error}")
             
             if warnings:
-                print("⚠️  发现警告:")
+                self._emit("⚠️  发现警告:")
                 for warning in warnings:
-                    print(f"   - {warning}")
+                    self._emit(f"   - {warning}")
             
             if is_valid and not warnings:
-                print("✅ 配置验证通过，未发现问题")
+                self._emit("✅ 配置验证通过，未发现问题")
                 return 0
             elif is_valid:
-                print("✅ 配置基本有效，但有一些建议改进的地方")
+                self._emit("✅ 配置基本有效，但有一些建议改进的地方")
                 return 0
             else:
-                print("❌ 配置验证失败，请修复错误后重试")
+                self._emit("❌ 配置验证失败，请修复错误后重试")
                 return 1
                 
         except KeyboardInterrupt:
-            print("\n⚠️  用户中断操作")
+            self._emit("\n⚠️  用户中断操作")
             return 130
         except Exception as e:
-            print(f"\n❌ 验证过程出错: {e}")
+            if args.json:
+                _write_json({'valid': False, 'errors': [f"验证过程出错: {e}"], 'warnings': []})
+            self._emit(f"\n❌ 验证过程出错: {e}")
             if args.verbose:
                 import traceback
                 traceback.print_exc()
             return 1
+        finally:
+            self._flush()
 
 
-def main():
-    """入口点函数"""
+def main(argv=None):
+    """入口点函数，返回退出码（argv 为 None 时解析 sys.argv）"""
     validator = ConfigValidator()
-    sys.exit(validator.main())
+    return validator.main(argv)
 
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    sys.exit(main()) 
\ No newline at end of file
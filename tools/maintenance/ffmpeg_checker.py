@@ -5,11 +5,14 @@ FFmpeg 环境检测工具
 
 基于 src/utils/ffmpeg_detector.py 提供更好的用户体验
 """
+import os
+import re
 import sys
 import argparse
 import logging
+from functools import cached_property, lru_cache
 from pathlib import Path
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional
 
 # 添加src到路径
 sys.path.insert(0, str(Path(__file__).parent.parent.parent / "src"))
@@ -17,6 +20,24 @@ sys.path.insert(0, str(Path(__file__).parent.parent.parent / "src"))
 from config.settings import Config
 from utils.ffmpeg_detector import FFmpegDetector
 
+# 在原始PATH字符串上做不区分大小写的查找，无需先生成小写副本
+_FFMPEG_PATH_RE = re.compile(r'ffmpeg', re.IGNORECASE)
+
+try:
+    import orjson  # 可选：--json 输出时序列化更快
+except ImportError:
+    orjson = None
+
+
+def _write_json(result: Dict[str, Any]):
+    """把结果以单个JSON对象写到stdout（--json 模式下的唯一输出）"""
+    if orjson is not None:
+        sys.stdout.buffer.write(orjson.dumps(result) + b"\n")
+    else:
+        import json
+        sys.stdout.write(json.dumps(result, ensure_ascii=False) + "\n")
+    sys.stdout.flush()
+
 
 class FFmpegChecker:
     """用户友好的 FFmpeg 检测工具"""
@@ -30,6 +51,28 @@ class FFmpegChecker:
         self.config = Config(config_file)
         self.detector = FFmpegDetector(self.config)
         self.logger = logging.getLogger(__name__)
+        self.quiet = False
+        # 输出行缓冲，运行结束时一次写出
+        self._out: List[str] = []
+        # 最近一次编码器检测结果 {编码器名: 是否可用}
+        self.encoder_support: Dict[str, bool] = {}
+    
+    def _emit(self, *args):
+        """记录一行人类可读输出，由 _flush 统一写出；--json 模式下不输出"""
+        if not self.quiet:
+            self._out.append(" ".join(map(str, args)))
+    
+    def _flush(self):
+        """把缓冲的输出行一次写到stdout"""
+        if self._out:
+            sys.stdout.write("\n".join(self._out) + "\n")
+            sys.stdout.flush()
+            self._out.clear()
+    
+    @cached_property
+    def summary(self) -> Dict[str, Any]:
+        """检测摘要（含 ffmpeg -version 子进程），一次运行内只计算一次"""
+        return self.detector.get_detection_summary()
     
     def check_installation(self, verbose: bool = False) -> Dict[str, Any]:
         """检查 FFmpeg 安装状态
@@ -40,23 +83,23 @@ class FFmpegChecker:
         Returns:
             检测结果字典
         """
-        print("🔍 检测 FFmpeg 安装状态...")
-        print("-" * 50)
+        self._emit("🔍 检测 FFmpeg 安装状态...")
+        self._emit("-" * 50)
         
         # 获取检测摘要
-        summary = self.detector.get_detection_summary()
+        summary = self.summary
         
         # 显示系统信息
-        print(f"操作系统: {summary['system'].title()}")
+        self._emit(f"操作系统: {summary['system'].title()}")
         
         # 显示 FFmpeg 检测结果
         if summary['ffmpeg_found']:
-            print(f"✅ FFmpeg: 已找到")
-            print(f"   路径: {summary['ffmpeg_path']}")
+            self._emit(f"✅ FFmpeg: 已找到")
+            self._emit(f"   路径: {summary['ffmpeg_path']}")
             
             if summary.get('version'):
-                version_line = summary['version'].split('\n')[0] if '\n' in summary['version'] else summary['version']
-                print(f"   版本: {version_line}")
+                version_line = summary['version'].partition('\n')[0]
+                self._emit(f"   版本: {version_line}")
             
             if summary.get('detection_method'):
                 method_names = {
@@ -67,23 +110,23 @@ class FFmpegChecker:
                     'custom_paths': '自定义路径'
                 }
                 method = method_names.get(summary['detection_method'], summary['detection_method'])
-                print(f"   检测方式: {method}")
+                self._emit(f"   检测方式: {method}")
         else:
-            print("❌ FFmpeg: 未找到")
+            self._emit("❌ FFmpeg: 未找到")
             
         # 显示 FFprobe 检测结果  
         if summary['ffprobe_found']:
-            print(f"✅ FFprobe: 已找到")
+            self._emit(f"✅ FFprobe: 已找到")
             if verbose:
-                print(f"   路径: {summary['ffprobe_path']}")
+                self._emit(f"   路径: {summary['ffprobe_path']}")
         else:
-            print("❌ FFprobe: 未找到")
+            self._emit("❌ FFprobe: 未找到")
         
         # 显示错误信息
         if 'error' in summary:
-            print(f"❌ 检测错误: {summary['error']}")
+            self._emit(f"❌ 检测错误: {summary['error']}")
         
-        print("-" * 50)
+        self._emit("-" * 50)
         
         # 显示建议
         if not summary['ffmpeg_found']:
@@ -97,108 +140,126 @@ class FFmpegChecker:
         """显示安装说明"""
         system = self.detector.system
         
-        print("💡 FFmpeg 安装建议:")
-        print()
+        self._emit("💡 FFmpeg 安装建议:")
+        self._emit()
         
         if system == "windows":
-            print("Windows 安装方式:")
-            print("1. 官方下载:")
-            print("   - 访问: https://ffmpeg.org/download.html")
-            print("   - 下载 Windows 构建版本")
-            print("   - 解压到 C:\\ffmpeg\\")
-            print("   - 将 C:\\ffmpeg\\bin\\ 添加到系统 PATH")
-            print()
-            print("2. 使用 Chocolatey:")
-            print("   choco install ffmpeg")
-            print()
-            print("3. 使用 Scoop:")
-            print("   scoop install ffmpeg")
+            self._emit("Windows 安装方式:")
+            self._emit("1. 官方下载:")
+            self._emit("   - 访问: https://ffmpeg.org/download.html")
+            self._emit("   - 下载 Windows 构建版本")
+            self._emit("   - 解压到 C:\\ffmpeg\\")
+            self._emit("   - 将 C:\\ffmpeg\\bin\\ 添加到系统 PATH")
+            self._emit()
+            self._emit("2. 使用 Chocolatey:")
+            self._emit("   choco install ffmpeg")
+            self._emit()
+            self._emit("3. 使用 Scoop:")
+            self._emit("   scoop install ffmpeg")
             
         elif system == "darwin":
-            print("macOS 安装方式:")
-            print("1. 使用 Homebrew (推荐):")
-            print("   brew install ffmpeg")
-            print()
-            print("2. 使用 MacPorts:")
-            print("   sudo port install ffmpeg")
-            print()
-            print("3. 官方二进制:")
-            print("   - 访问: https://ffmpeg.org/download.html")
-            print("   - 下载 macOS 构建版本")
+            self._emit("macOS 安装方式:")
+            self._emit("1. 使用 Homebrew (推荐):")
+            self._emit("   brew install ffmpeg")
+            self._emit()
+            self._emit("2. 使用 MacPorts:")
+            self._emit("   sudo port install ffmpeg")
+            self._emit()
+            self._emit("3. 官方二进制:")
+            self._emit("   - 访问: https://ffmpeg.org/download.html")
+            self._emit("   - 下载 macOS 构建版本")
             
         else:  # Linux
-            print("Linux 安装方式:")
-            print("1. Ubuntu/Debian:")
-            print("   sudo apt update && sudo apt install ffmpeg")
-            print()
-            print("2. CentOS/RHEL/Fedora:")
-            print("   sudo dnf install ffmpeg")
-            print("   # 或 sudo yum install ffmpeg")
-            print()
-            print("3. 使用 Snap:")
-            print("   sudo snap install ffmpeg")
-            print()
-            print("4. 从源码编译:")
-            print("   # 下载源码并按官方文档编译")
+            self._emit("Linux 安装方式:")
+            self._emit("1. Ubuntu/Debian:")
+            self._emit("   sudo apt update && sudo apt install ffmpeg")
+            self._emit()
+            self._emit("2. CentOS/RHEL/Fedora:")
+            self._emit("   sudo dnf install ffmpeg")
+            self._emit("   # 或 sudo yum install ffmpeg")
+            self._emit()
+            self._emit("3. 使用 Snap:")
+            self._emit("   sudo snap install ffmpeg")
+            self._emit()
+            self._emit("4. 从源码编译:")
+            self._emit("   # 下载源码并按官方文档编译")
         
-        print()
-        print("配置说明:")
-        print("- 安装后重启命令行/终端")
-        print("- 或在 config/settings.yaml 中指定路径:")
-        print("  paths:")
-        print("    windows:")
-        print("      ffmpeg_path: 'C:/ffmpeg/bin/ffmpeg.exe'")
-        print("    macos:")
-        print("      ffmpeg_path: '/usr/local/bin/ffmpeg'")
+        self._emit()
+        self._emit("配置说明:")
+        self._emit("- 安装后重启命令行/终端")
+        self._emit("- 或在 config/settings.yaml 中指定路径:")
+        self._emit("  paths:")
+        self._emit("    windows:")
+        self._emit("      ffmpeg_path: 'C:/ffmpeg/bin/ffmpeg.exe'")
+        self._emit("    macos:")
+        self._emit("      ffmpeg_path: '/usr/local/bin/ffmpeg'")
     
     def _show_additional_info(self, summary: Dict[str, Any]):
         """显示额外信息"""
-        print("📋 详细信息:")
+        self._emit("📋 详细信息:")
         
         if summary.get('ffmpeg_path'):
             ffmpeg_path = Path(summary['ffmpeg_path'])
             if ffmpeg_path.exists() and ffmpeg_path != Path('ffmpeg'):
                 try:
                     size = ffmpeg_path.stat().st_size / (1024 * 1024)
-                    print(f"   FFmpeg 文件大小: {size:.1f} MB")
+                    self._emit(f"   FFmpeg 文件大小: {size:.1f} MB")
                 except:
                     pass
         
         # 显示配置文件状态
         config_path = self.detector._get_config_path()
         if config_path:
-            print(f"   配置文件中的路径: {config_path}")
+            self._emit(f"   配置文件中的路径: {config_path}")
         else:
-            print("   配置文件: 未配置 FFmpeg 路径")
+            self._emit("   配置文件: 未配置 FFmpeg 路径")
     
     def test_functionality(self) -> bool:
         """测试 FFmpeg 功能"""
-        print("\n🧪 测试 FFmpeg 功能...")
-        print("-" * 50)
+        self._emit("\n🧪 测试 FFmpeg 功能...")
+        self._emit("-" * 50)
         
         try:
-            is_working, version_info = self.detector.test_ffmpeg_installation()
+            # 一次 ffmpeg -encoders 同时完成功能测试与编码器检测
+            result = self._run_encoders()
             
-            if is_working:
-                print("✅ FFmpeg 功能测试: 通过")
-                print(f"   版本信息: {version_info}")
+            if result.returncode == 0:
+                # banner（输出到stderr）首行即版本信息
+                version_info = self.summary.get('version') or result.stderr.partition('\n')[0]
+                self._emit("✅ FFmpeg 功能测试: 通过")
+                self._emit(f"   版本信息: {version_info}")
                 
                 # 测试常用编码器
-                self._test_encoders()
+                self._test_encoders(result.stdout)
                 
                 return True
             else:
-                print("❌ FFmpeg 功能测试: 失败")
-                print(f"   错误信息: {version_info}")
+                self._emit("❌ FFmpeg 功能测试: 失败")
+                self._emit(f"   错误信息: FFmpeg 执行失败，返回码: {result.returncode}")
                 return False
                 
         except Exception as e:
-            print(f"❌ 测试过程出错: {e}")
+            self._emit(f"❌ 测试过程出错: {e}")
             return False
     
-    def _test_encoders(self):
-        """测试编码器可用性"""
-        print("\n🎬 检测编码器支持:")
+    def _run_encoders(self):
+        """运行 ffmpeg -encoders（不加 -hide_banner，以便从banner中读取版本）"""
+        import subprocess
+        ffmpeg_path = self.summary['ffmpeg_path'] or self.detector.detect_ffmpeg_path()
+        return subprocess.run(
+            [ffmpeg_path, '-encoders'], 
+            capture_output=True, 
+            text=True, 
+            timeout=10
+        )
+    
+    def _test_encoders(self, encoders_output: Optional[str] = None):
+        """测试编码器可用性
+        
+        Args:
+            encoders_output: 已获取的 ffmpeg -encoders 输出；为None时自行运行
+        """
+        self._emit("\n🎬 检测编码器支持:")
         
         encoders_to_test = [
             ('libx265', 'x265 (软件编码)'),
@@ -208,77 +269,74 @@ class FFmpegChecker:
         ]
         
         try:
-            ffmpeg_path = self.detector.detect_ffmpeg_path()
-            
-            import subprocess
-            # 获取编码器列表
-            result = subprocess.run(
-                [ffmpeg_path, '-encoders'], 
-                capture_output=True, 
-                text=True, 
-                timeout=10
-            )
+            if encoders_output is None:
+                result = self._run_encoders()
+                encoders_output = result.stdout if result.returncode == 0 else None
             
-            if result.returncode == 0:
-                available_encoders = result.stdout
+            if encoders_output is not None:
+                # 编码器表格行形如 " V....D libx265  ..."，第二列为编码器名；解析一次供多次查询
+                available_encoders = frozenset(
+                    line.split()[1] for line in encoders_output.splitlines()
+                    if line.startswith((' V', ' A')) and len(line.split()) > 1
+                )
                 
                 for encoder_name, encoder_desc in encoders_to_test:
-                    if encoder_name in available_encoders:
-                        print(f"   ✅ {encoder_desc}")
+                    self.encoder_support[encoder_name] = encoder_name in available_encoders
+                    if self.encoder_support[encoder_name]:
+                        self._emit(f"   ✅ {encoder_desc}")
                     else:
-                        print(f"   ❌ {encoder_desc}")
+                        self._emit(f"   ❌ {encoder_desc}")
             else:
-                print("   ⚠️  无法获取编码器列表")
+                self._emit("   ⚠️  无法获取编码器列表")
                 
         except Exception as e:
-            print(f"   ⚠️  编码器检测失败: {e}")
+            self._emit(f"   ⚠️  编码器检测失败: {e}")
     
     def diagnose_issues(self) -> Dict[str, Any]:
         """诊断常见问题"""
-        print("\n🔧 诊断常见问题...")
-        print("-" * 50)
+        self._emit("\n🔧 诊断常见问题...")
+        self._emit("-" * 50)
         
         issues = []
         suggestions = []
         
         # 检查路径权限
         try:
-            ffmpeg_path = self.detector.detect_ffmpeg_path()
+            ffmpeg_path = self.summary['ffmpeg_path'] or self.detector.detect_ffmpeg_path()
             path_obj = Path(ffmpeg_path)
             
             if path_obj != Path('ffmpeg') and path_obj.exists():
                 if not path_obj.is_file():
                     issues.append("FFmpeg路径指向的不是文件")
                     suggestions.append("检查配置文件中的路径设置")
-                
-                # Windows下检查可执行权限
-                if self.detector.is_windows:
-                    if not path_obj.suffix.lower() == '.exe':
-                        issues.append("Windows下FFmpeg应该是.exe文件")
-                        suggestions.append("确保下载的是Windows版本的FFmpeg")
+                # 一次 access(X_OK) 系统调用判断可执行性，各平台通用
+                elif not os.access(ffmpeg_path, os.X_OK):
+                    issues.append("FFmpeg 不可执行")
+                    if self.detector.is_windows:
+                        suggestions.append("确保下载的是Windows版本的FFmpeg (.exe文件)")
+                    else:
+                        suggestions.append(f"为FFmpeg添加可执行权限: chmod +x {ffmpeg_path}")
         
         except Exception as e:
             issues.append(f"路径检测失败: {e}")
             suggestions.append("检查FFmpeg是否正确安装")
         
         # 检查环境变量
-        import os
-        path_env = os.environ.get('PATH', '')
-        if 'ffmpeg' not in path_env.lower():
+        if not _FFMPEG_PATH_RE.search(os.environ.get('PATH', '')):
             issues.append("系统PATH中可能不包含FFmpeg")
             suggestions.append("将FFmpeg添加到系统PATH环境变量")
         
         # 显示结果
         if not issues:
-            print("✅ 未发现明显问题")
+            self._emit("✅ 未发现明显问题")
         else:
-            print("⚠️  发现以下问题:")
+            self._emit("⚠️  发现以下问题:")
             for i, issue in enumerate(issues, 1):
-                print(f"   {i}. {issue}")
+                self._emit(f"   {i}. {issue}")
             
-            print("\n💡 建议解决方案:")
+            self._emit("\n💡 建议解决方案:")
             for i, suggestion in enumerate(suggestions, 1):
-                print(f"   {i}. {suggestion}")
+                self._emit(f"   {i}. {suggestion}")
         
         return {
             'issues': issues,
@@ -323,6 +381,11 @@ class FFmpegChecker:
             type=Path,
             help='指定配置文件路径'
         )
+        parser.add_argument(
+            '--json', 
+            action='store_true',
+            help='不输出检测过程，结束时只输出一个JSON结果（适合CI/pre-commit）'
+        )
         
         return parser
     
@@ -334,52 +397,74 @@ class FFmpegChecker:
         # 设置日志
         level = logging.DEBUG if args.verbose else logging.INFO
         logging.basicConfig(level=level, format='%(levelname)s: %(message)s')
+        self.quiet = args.json
         
         try:
-            print("🎬 VREconder FFmpeg 环境检测工具")
-            print("=" * 50)
+            self._emit("🎬 VREconder FFmpeg 环境检测工具")
+            self._emit("=" * 50)
             
             # 创建检测器
             config_file = str(args.config_file) if args.config_file else None
-            checker = FFmpegChecker(config_file)
+            checker = _get_checker(config_file)
+            checker.quiet = args.json
+            checker._out = self._out
             
             # 执行基本检测
             summary = checker.check_installation(args.verbose)
+            result = dict(summary)
             
             # 执行功能测试
             if args.test and summary['ffmpeg_found']:
                 test_result = checker.test_functionality()
+                result['functional_test'] = test_result
+                result['encoders'] = checker.encoder_support
                 if not test_result:
+                    if args.json:
+                        _write_json(result)
                     return 1
             
             # 执行问题诊断
             if args.diagnose:
-                checker.diagnose_issues()
+                result.update(checker.diagnose_issues())
+            
+            if args.json:
+                _write_json(result)
+                return 0 if summary['ffmpeg_found'] else 1
             
             # 返回状态码
             if summary['ffmpeg_found']:
-                print("\n✅ FFmpeg 环境检测完成")
+                self._emit("\n✅ FFmpeg 环境检测完成")
                 return 0
             else:
-                print("\n❌ FFmpeg 未正确安装或配置")
+                self._emit("\n❌ FFmpeg 未正确安装或配置")
                 return 1
                 
         except KeyboardInterrupt:
-            print("\n⚠️  用户中断操作")
+            self._emit("\n⚠️  用户中断操作")
             return 130
         except Exception as e:
-            print(f"\n❌ 检测过程出错: {e}")
+            if args.json:
+                _write_json({'ffmpeg_found': False, 'error': str(e)})
+            self._emit(f"\n❌ 检测过程出错: {e}")
             if args.verbose:
                 import traceback
                 traceback.print_exc()
             return 1
+        finally:
+            self._flush()
+
+
+@lru_cache(maxsize=8)
+def _get_checker(config_file: Optional[str] = None) -> FFmpegChecker:
+    """按配置文件复用检测器，在同一进程内多次调用时不必重复加载配置和检测FFmpeg"""
+    return FFmpegChecker(config_file)
 
 
-def main():
-    """入口点函数"""
-    checker = FFmpegChecker()
-    sys.exit(checker.main())
+def main(argv=None):
+    """入口点函数，返回退出码（argv 为 None 时解析 sys.argv）"""
+    checker = _get_checker()
+    return checker.main(argv)
 
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    sys.exit(main()) 
\ No newline at end of file
@@ -3,14 +3,21 @@
 系统诊断工具
 检查系统环境、硬件信息和配置状态
 """
+import os
 import sys
+import json
+import time
 import platform
+import tempfile
 import subprocess
 import psutil
 import argparse
 import logging
+import importlib.util
+from concurrent.futures import ThreadPoolExecutor
+from functools import cached_property, lru_cache
 from pathlib import Path
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional
 
 # 添加src到路径
 sys.path.insert(0, str(Path(__file__).parent.parent.parent / "src"))
@@ -18,6 +25,67 @@ sys.path.insert(0, str(Path(__file__).parent.parent.parent / "src"))
 from config.settings import Config
 
 
+# 平台/CPU信息在进程内不会变化；platform.processor() 在Windows上还会启动子进程，
+# 缓存后重复诊断无需再次查询
+@lru_cache(maxsize=1)
+def _platform_name() -> str:
+    return platform.platform()
+
+
+@lru_cache(maxsize=1)
+def _platform_system() -> str:
+    return platform.system()
+
+
+@lru_cache(maxsize=1)
+def _platform_processor() -> str:
+    return platform.processor()
+
+
+@lru_cache(maxsize=2)
+def _cpu_count(logical: bool = True) -> Optional[int]:
+    return psutil.cpu_count(logical=logical)
+
+
+def _module_available(name: str) -> bool:
+    """只查找模块而不执行导入（numpy/cv2 等完整导入需数百毫秒）"""
+    try:
+        return importlib.util.find_spec(name) is not None
+    except (ImportError, ValueError):
+        return False
+
+
+# 诊断结果缓存：同一主机、同一解释器下1小时内直接复用
+DIAGNOSE_CACHE_FILE = Path.home() / ".cache" / "vreconder" / "diagnose.json"
+DIAGNOSE_CACHE_TTL = 3600  # 秒
+
+
+# PCI厂商ID
+_PCI_NVIDIA = '0x10de'
+_PCI_AMD = '0x1002'
+_PCI_INTEL = '0x8086'
+
+
+@lru_cache(maxsize=1)
+def _read_pci_vendors() -> Optional[frozenset]:
+    """读取显示控制器（PCI类 0x03xxxx）的厂商ID
+    
+    直接读取sysfs，无需启动 lspci / nvidia-smi。非Linux或sysfs不可用时返回None。
+    """
+    devices = Path('/sys/bus/pci/devices')
+    if not devices.is_dir():
+        return None
+    
+    vendors = set()
+    for device in devices.iterdir():
+        try:
+            if (device / 'class').read_text().startswith('0x03'):
+                vendors.add((device / 'vendor').read_text().strip().lower())
+        except OSError:
+            continue
+    return frozenset(vendors)
+
+
 class SystemDiagnose:
     """系统诊断工具"""
     
@@ -25,6 +93,11 @@ class SystemDiagnose:
         self.config = Config(config_file)
         self.logger = logging.getLogger(__name__)
     
+    @cached_property
+    def _partitions(self) -> List[Any]:
+        """磁盘分区列表，首次使用时查询一次"""
+        return psutil.disk_partitions()
+    
     def diagnose_system(self) -> Dict[str, Any]:
         """诊断系统环境"""
         print("🖥️  系统环境诊断")
@@ -34,10 +107,10 @@ class SystemDiagnose:
         
         # 基本系统信息
         print("📋 基本信息:")
-        info['platform'] = platform.platform()
-        info['system'] = platform.system()
+        info['platform'] = _platform_name()
+        info['system'] = _platform_system()
         info['machine'] = platform.machine()
-        info['processor'] = platform.processor()
+        info['processor'] = _platform_processor()
         
         print(f"   系统: {info['platform']}")
         print(f"   架构: {info['machine']}")
@@ -54,15 +127,15 @@ class SystemDiagnose:
         
         # CPU信息
         info['cpu'] = {
-            'count': psutil.cpu_count(),
-            'physical': psutil.cpu_count(logical=False)
+            'count': _cpu_count(),
+            'physical': _cpu_count(logical=False)
         }
         print(f"   CPU: {info['cpu']['physical']} 物理核心, {info['cpu']['count']} 逻辑核心")
         
         # 磁盘信息
         print("\n💾 磁盘空间:")
         info['disks'] = []
-        for partition in psutil.disk_partitions():
+        for partition in self._partitions:
             try:
                 usage = psutil.disk_usage(partition.mountpoint)
                 disk_info = {
@@ -94,33 +167,47 @@ class SystemDiagnose:
         }
         
         try:
-            # 检查NVIDIA GPU
-            try:
-                result = subprocess.run(['nvidia-smi', '-L'], 
-                                      capture_output=True, text=True, timeout=10)
-                if result.returncode == 0:
-                    gpu_info['nvidia'] = True
-                    lines = result.stdout.strip().split('\n')
-                    for line in lines:
-                        if 'GPU' in line:
-                            gpu_info['details'].append(f"NVIDIA: {line.strip()}")
-                            print(f"   ✅ {line.strip()}")
-            except (FileNotFoundError, subprocess.TimeoutExpired):
+            is_windows = _platform_system() == "Windows"
+            pci_vendors = None if is_windows else _read_pci_vendors()
+            # Windows下只查询一次显卡名称，供各厂商判断共用
+            windows_gpus = self._get_windows_gpus() if is_windows else None
+            
+            # 检查NVIDIA GPU（已确定没有NVIDIA显卡时不启动 nvidia-smi）
+            if ((pci_vendors is not None and _PCI_NVIDIA not in pci_vendors) or
+                    (windows_gpus is not None and 'nvidia' not in windows_gpus)):
                 print("   ❌ NVIDIA GPU: 未检测到或驱动未安装")
+            else:
+                try:
+                    result = subprocess.run(['nvidia-smi', '-L'], 
+                                          capture_output=True, text=True, timeout=10)
+                    if result.returncode == 0:
+                        gpu_info['nvidia'] = True
+                        lines = result.stdout.strip().split('\n')
+                        for line in lines:
+                            if 'GPU' in line:
+                                gpu_info['details'].append(f"NVIDIA: {line.strip()}")
+                                print(f"   ✅ {line.strip()}")
+                except (FileNotFoundError, subprocess.TimeoutExpired):
+                    print("   ❌ NVIDIA GPU: 未检测到或驱动未安装")
             
             # 检查Intel集显
             try:
-                if platform.system() == "Windows":
-                    result = subprocess.run(['wmic', 'path', 'win32_VideoController', 'get', 'name'], 
-                                          capture_output=True, text=True, timeout=10)
-                    if result.returncode == 0 and 'Intel' in result.stdout:
+                if is_windows:
+                    if windows_gpus is None:
+                        print("   ⚠️  Intel QuickSync: 无法检测")
+                    elif 'intel' in windows_gpus:
                         gpu_info['intel'] = True
                         gpu_info['details'].append("Intel: 集成显卡检测到")
                         print("   ✅ Intel QuickSync: 可能支持")
                     else:
                         print("   ❌ Intel QuickSync: 未检测到Intel显卡")
+                elif pci_vendors is not None:
+                    if _PCI_INTEL in pci_vendors:
+                        gpu_info['intel'] = True
+                        gpu_info['details'].append("Intel: 集成显卡检测到")
+                        print("   ✅ Intel QuickSync: 可能支持")
                 else:
-                    # Linux/macOS的检测方法
+                    # macOS等没有sysfs的系统
                     result = subprocess.run(['lspci'], capture_output=True, text=True, timeout=10)
                     if result.returncode == 0 and 'Intel' in result.stdout:
                         gpu_info['intel'] = True
@@ -130,24 +217,100 @@ class SystemDiagnose:
                 print("   ⚠️  Intel QuickSync: 无法检测")
             
             # 检查AMD GPU
-            try:
-                if platform.system() == "Windows":
-                    result = subprocess.run(['wmic', 'path', 'win32_VideoController', 'get', 'name'], 
-                                          capture_output=True, text=True, timeout=10)
-                    if result.returncode == 0 and ('AMD' in result.stdout or 'Radeon' in result.stdout):
-                        gpu_info['amd'] = True
-                        gpu_info['details'].append("AMD: 显卡检测到")
-                        print("   ✅ AMD AMF: 可能支持")
-                    else:
-                        print("   ❌ AMD AMF: 未检测到AMD显卡")
-            except (FileNotFoundError, subprocess.TimeoutExpired):
-                print("   ⚠️  AMD AMF: 无法检测")
+            if is_windows:
+                if windows_gpus is None:
+                    print("   ⚠️  AMD AMF: 无法检测")
+                elif 'amd' in windows_gpus or 'radeon' in windows_gpus:
+                    gpu_info['amd'] = True
+                    gpu_info['details'].append("AMD: 显卡检测到")
+                    print("   ✅ AMD AMF: 可能支持")
+                else:
+                    print("   ❌ AMD AMF: 未检测到AMD显卡")
                 
         except Exception as e:
             print(f"   ⚠️  GPU检测失败: {e}")
         
         return gpu_info
     
+    def _get_windows_gpus(self) -> Optional[str]:
+        """查询一次Windows显卡名称（小写），查询失败返回None
+        
+        使用 PowerShell 的 CIM 查询代替已弃用且较慢的 wmic。
+        """
+        try:
+            result = subprocess.run(['powershell', '-NoProfile', '-NonInteractive', '-Command',
+                                     'Get-CimInstance Win32_VideoController | Select-Object -ExpandProperty Name'], 
+                                  capture_output=True, text=True, timeout=10)
+        except (FileNotFoundError, subprocess.TimeoutExpired):
+            return None
+        return result.stdout.lower() if result.returncode == 0 else None
+    
+    @staticmethod
+    def _cache_key() -> List[str]:
+        return [platform.node(), sys.version]
+    
+    def _load_cached_results(self) -> Optional[Dict[str, Any]]:
+        """读取未过期（按文件mtime判断）且主机/解释器一致的诊断结果"""
+        try:
+            age = time.time() - DIAGNOSE_CACHE_FILE.stat().st_mtime
+            if age >= DIAGNOSE_CACHE_TTL:
+                return None
+            with open(DIAGNOSE_CACHE_FILE, 'r', encoding='utf-8') as f:
+                cached = json.load(f)
+            if cached.get('key') != self._cache_key():
+                return None
+            results = cached['results']
+            results['age'] = age
+            return results
+        except (OSError, ValueError, KeyError):
+            return None
+    
+    def _save_cached_results(self, results: Dict[str, Any]):
+        """原子写入诊断结果缓存，写入失败不影响诊断"""
+        try:
+            DIAGNOSE_CACHE_FILE.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=DIAGNOSE_CACHE_FILE.parent, suffix=".tmp")
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump({'key': self._cache_key(), 'results': results}, f)
+            os.replace(tmp_path, DIAGNOSE_CACHE_FILE)
+        except OSError as e:
+            self.logger.debug(f"无法写入诊断缓存: {e}")
+    
+    def _print_cached_results(self, results: Dict[str, Any]):
+        """输出缓存的诊断摘要（内存使用率变化快，重新读取）"""
+        system_info = results['system']
+        gpu_info = results['gpu']
+        deps_info = results['deps']
+        
+        memory = psutil.virtual_memory()
+        system_info['memory'] = {
+            'total': memory.total,
+            'available': memory.available,
+            'percent': memory.percent
+        }
+        
+        print(f"🖥️  系统环境诊断（{int(results['age'] // 60)} 分钟前的缓存结果，使用 --refresh 重新检测）")
+        print("=" * 50)
+        print(f"   系统: {system_info['platform']}")
+        print(f"   架构: {system_info['machine']}")
+        print(f"   处理器: {system_info['processor']}")
+        print(f"   内存: {memory.total // (1024**3)} GB 总量, {memory.available // (1024**3)} GB 可用 ({memory.percent:.1f}% 已使用)")
+        print(f"   CPU: {system_info['cpu']['physical']} 物理核心, {system_info['cpu']['count']} 逻辑核心")
+        
+        print("\n🎮 GPU硬件编码支持:")
+        for detail in gpu_info['details']:
+            print(f"   ✅ {detail}")
+        if not gpu_info['details']:
+            print("   ❌ 未检测到")
+        
+        print("\n📦 Python依赖:")
+        print(f"   Python版本: {deps_info['python_version'].split()[0]}")
+        missing = [name for name, state in deps_info['packages'].items() if state == 'missing']
+        if missing:
+            print(f"   ⚠️  缺失: {', '.join(missing)}")
+        else:
+            print("   ✅ 全部已安装")
+    
     def check_dependencies(self) -> Dict[str, Any]:
         """检查Python依赖"""
         print("\n📦 Python依赖检查:")
@@ -161,32 +324,36 @@ class SystemDiagnose:
         print(f"   Python版本: {sys.version.split()[0]}")
         
         # 检查必要的包
-        required_packages = [
-            'psutil', 'yaml', 'pathlib', 
-            'subprocess', 'concurrent.futures', 'threading'
-        ]
+        # 标准库模块随解释器提供，不再探测
+        required_packages = ['psutil', 'yaml']
         
+        # (显示名/pip包名, 导入名)
         optional_packages = [
-            'numpy', 'opencv-python', 'pillow'
+            ('numpy', 'numpy'),
+            ('opencv-python', 'cv2'),
+            ('pillow', 'PIL'),
         ]
         
+        # 并发查找模块位置，结果仍按原顺序输出
+        to_probe = required_packages + [import_name for _, import_name in optional_packages]
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            available = dict(zip(to_probe, executor.map(_module_available, to_probe)))
+        
         print("   必要依赖:")
         for package in required_packages:
-            try:
-                __import__(package)
+            if available[package]:
                 dependencies['packages'][package] = 'installed'
                 print(f"     ✅ {package}")
-            except ImportError:
+            else:
                 dependencies['packages'][package] = 'missing'
                 print(f"     ❌ {package} (缺失)")
         
         print("   可选依赖:")
-        for package in optional_packages:
-            try:
-                __import__(package)
+        for package, import_name in optional_packages:
+            if available[import_name]:
                 dependencies['packages'][package] = 'installed'
                 print(f"     ✅ {package}")
-            except ImportError:
+            else:
                 dependencies['packages'][package] = 'missing'
                 print(f"     ⚠️  {package} (可选)")
         
@@ -216,10 +383,24 @@ class SystemDiagnose:
             'config/settings.yaml', 'requirements.txt'
         ]
         
+        # 每个父目录只 scandir 一次，之后按相对路径查表（不再逐个 exists() + stat()）
+        # 只扫描需要的目录，不递归整个项目（.git、输出目录等可能很大）
+        wanted = set(required_dirs) | set(required_files)
+        entries: Dict[str, os.DirEntry] = {}
+        for parent in {Path(name).parent.as_posix() for name in wanted}:
+            try:
+                with os.scandir(project_root / parent) as it:
+                    for entry in it:
+                        rel = entry.name if parent == '.' else f"{parent}/{entry.name}"
+                        if rel in wanted:
+                            entries[rel] = entry
+            except OSError:
+                continue
+        
         print("   必要目录:")
         for dir_name in required_dirs:
-            dir_path = project_root / dir_name
-            if dir_path.exists():
+            entry = entries.get(dir_name)
+            if entry is not None and entry.is_dir():
                 print(f"     ✅ {dir_name}/")
             else:
                 structure['missing_dirs'].append(dir_name)
@@ -227,9 +408,9 @@ class SystemDiagnose:
         
         print("   必要文件:")
         for file_name in required_files:
-            file_path = project_root / file_name
-            if file_path.exists():
-                size_kb = file_path.stat().st_size / 1024
+            entry = entries.get(file_name)
+            if entry is not None:
+                size_kb = entry.stat().st_size / 1024
                 print(f"     ✅ {file_name} ({size_kb:.1f} KB)")
             else:
                 structure['missing_files'].append(file_name)
@@ -259,6 +440,11 @@ class SystemDiagnose:
             action='store_true',
             help='仅检查依赖'
         )
+        parser.add_argument(
+            '--refresh',
+            action='store_true',
+            help='忽略缓存，重新执行全部检测'
+        )
         parser.add_argument(
             '--verbose', '-v', 
             action='store_true',
@@ -282,10 +468,17 @@ class SystemDiagnose:
             elif args.deps_only:
                 self.check_dependencies()
             else:
-                # 执行完整诊断
-                system_info = self.diagnose_system()
-                gpu_info = self.check_gpu_support()
-                deps_info = self.check_dependencies()
+                # 执行完整诊断（1小时内的缓存结果直接复用）
+                cached = None if args.refresh else self._load_cached_results()
+                if cached:
+                    self._print_cached_results(cached)
+                    system_info = cached['system']
+                    gpu_info = cached['gpu']
+                else:
+                    system_info = self.diagnose_system()
+                    gpu_info = self.check_gpu_support()
+                    deps_info = self.check_dependencies()
+                    self._save_cached_results({'system': system_info, 'gpu': gpu_info, 'deps': deps_info})
                 
                 if args.full:
                     structure_info = self.check_project_structure()
@@ -320,11 +513,11 @@ class SystemDiagnose:
             return 1
 
 
-def main():
-    """入口点函数"""
+def main(argv=None):
+    """入口点函数，返回退出码（argv 为 None 时解析 sys.argv）"""
     diagnose = SystemDiagnose()
-    sys.exit(diagnose.main())
+    return diagnose.main(argv)
 
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    sys.exit(main()) 
\ No newline at end of file
@@ -11,9 +11,14 @@ import os
 import time
 import argparse
 import random
-import json
 import subprocess
 import shutil
+import queue
+import asyncio
+import tempfile
+from contextlib import contextmanager
+from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
 from typing import List, Dict, Optional, Tuple
 
@@ -29,12 +34,34 @@ except ImportError:
     print("❌ Pillow (PIL) is required. Please run: pip install Pillow")
     sys.exit(1)
 
+# NumPy for canvas compositing
+try:
+    import numpy as np
+except ImportError:
+    print("❌ NumPy is required. Please run: pip install numpy")
+    sys.exit(1)
+
+# Optional: PyAV decodes frames in-process instead of launching ffmpeg per extraction
+try:
+    import av
+except ImportError:
+    av = None
+
 # Project imports
 from src.config.settings import Config
 from src.encoders.hevc_encoder import HEVCEncoder, EncoderType, QualityPreset
 
+# ROI crop (square, pixels) and the comparison canvas layout: 4 crops wide with padding
+CROP_SIZE = 512
+CANVAS_PADDING = 20
+CANVAS_SIZE = ((CROP_SIZE * 4) + (CANVAS_PADDING * 5), CROP_SIZE + 100)  # + space for header/footer
+
+# Source codecs whose clips can be stream-copied into the mp4 reference clips
+COPY_CODECS = {'h264', 'hevc'}
+
+@lru_cache(maxsize=32)
 def get_font(size=24):
-    """Get a usable font."""
+    """Get a usable font (cached per size)."""
     try:
         # Try a few common fonts
         fonts = ["arial.ttf", "segoeui.ttf", "DejaVuSans.ttf", "FreeSans.ttf"]
@@ -49,16 +76,28 @@ def get_font(size=24):
 
 class PrintLogger:
     def format_and_write(self, line):
-        # Only print errors or warnings to avoid spam
-        if "Error" in line or "error" in line or "Warning" in line:
-            print(f"FFMPEG: {line.strip()}")
+        # Encodes run with errors_only=True, so every line is an error
+        print(f"FFMPEG: {line.strip()}")
 
 class VisualBenchmark:
-    def __init__(self, input_file: Path, output_dir: Path, samples: int = 3, roi_pos: float = 0.25):
+    def __init__(self, input_file: Path, output_dir: Path, samples: int = 3, roi_pos: float = 0.25,
+                 jobs: Optional[int] = None, single_pass: bool = False, pin_cores: bool = False,
+                 fanout: bool = False, random_samples: bool = False):
         self.input_file = input_file
         self.output_dir = output_dir
         self.samples = samples
         self.roi_pos = roi_pos  # 0.25 = center of left half (approx)
+        self.jobs = jobs  # concurrent preset encodes, None = pick per encoder
+        self.single_pass = single_pass  # one decode split to all presets (no per-preset timing)
+        self.random_samples = random_samples  # random start times instead of evenly spaced keyframes
+        self.fanout = fanout  # one decode piped to a separate encoder process per preset (Linux)
+        self.pin_cores = pin_cores  # give each concurrent encode its own CPU cores (Linux)
+        self._core_pool: Optional[queue.Queue] = None
+        self.keyframes: Optional[np.ndarray] = None  # sorted keyframe times, set by _load_keyframes()
+        self.frame_size: Optional[Tuple[int, int]] = None  # set from probe_video()
+        # Same ROI and canvas for every sample: computed/allocated once
+        self._crop_box: Optional[Tuple[int, int, int, int]] = None
+        self._canvas_template: Optional[np.ndarray] = None
         
         self.config = Config()
         self.encoder = HEVCEncoder(self.config)
@@ -74,17 +113,19 @@ class VisualBenchmark:
             'ffprobe', 
             '-v', 'error', 
             '-select_streams', 'v:0', 
-            '-show_entries', 'stream=width,height,duration', 
-            '-of', 'json', 
+            '-show_entries', 'stream=codec_name,width,height,duration', 
+            '-of', 'csv=p=0', 
             str(self.input_file)
         ]
-        result = subprocess.run(cmd, capture_output=True, text=True)
-        data = json.loads(result.stdout)
-        stream = data['streams'][0]
+        result = subprocess.run(cmd, stdin=subprocess.DEVNULL, capture_output=True, text=True)
+        # Fields come in ffprobe's stream order: codec_name,width,height,duration
+        codec, width, height, duration = result.stdout.splitlines()[0].split(',')[:4]
         return {
-            'width': int(stream['width']),
-            'height': int(stream['height']),
-            'duration': float(stream.get('duration', 0))
+            'codec': codec or None,
+            'width': int(width),
+            'height': int(height),
+            # Containers like MKV carry no per-stream duration
+            'duration': float(duration) if duration not in ('', 'N/A') else 0.0
         }
 
     def generate_random_timestamps(self, duration: float, clip_len: float = 5.0) -> List[float]:
@@ -93,6 +134,63 @@ class VisualBenchmark:
         possible_end = max(0, duration - clip_len)
         return sorted([random.uniform(possible_start, possible_end) for _ in range(self.samples)])
 
+    def generate_keyframe_timestamps(self, duration: float, clip_len: float = 5.0) -> List[float]:
+        """Pick start timestamps from evenly spaced keyframes (needs _load_keyframes() first).
+
+        Clips then start exactly on a keyframe, and the samples cover the whole
+        video instead of clustering by chance.
+        """
+        usable = self.keyframes[self.keyframes <= max(0, duration - clip_len)]
+        if not usable.size:
+            usable = self.keyframes[:1]
+        # Middle of each of `samples` equal stretches, so neither the first frame
+        # (often a black/title intro) nor the tail is picked by construction
+        picks = ((np.arange(self.samples) + 0.5) * len(usable) / self.samples).astype(int)
+        return usable[picks].tolist()
+
+    def probe_keyframes(self) -> List[float]:
+        """Keyframe timestamps of the source, read from packet flags (nothing is decoded)."""
+        cmd = [
+            'ffprobe',
+            '-v', 'error',
+            '-select_streams', 'v:0',
+            '-show_entries', 'packet=pts_time,flags',
+            '-of', 'csv=p=0',
+            str(self.input_file)
+        ]
+        result = subprocess.run(cmd, stdin=subprocess.DEVNULL, capture_output=True, text=True)
+        keyframes = []
+        for line in result.stdout.splitlines():
+            pts_time, _, flags = line.partition(',')
+            if 'K' in flags and pts_time not in ('', 'N/A'):
+                keyframes.append(float(pts_time))
+        return sorted(keyframes)
+
+    def _load_keyframes(self, codec: Optional[str]) -> np.ndarray:
+        """Probe the keyframes once per run; empty when clips cannot be stream-copied."""
+        if self.keyframes is None:
+            times = self.probe_keyframes() if codec in COPY_CODECS else []
+            self.keyframes = np.asarray(times, dtype=np.float64)
+        return self.keyframes
+
+    def snap_to_keyframes(self, timestamps: List[float]) -> List[float]:
+        """Move each timestamp back to the keyframe at or before it."""
+        idx = np.searchsorted(self.keyframes, timestamps, side='right') - 1
+        return self.keyframes[np.maximum(idx, 0)].tolist()
+
+    def extract_clips_copy(self, start_times: List[float], output_paths: List[Path], duration: float = 5.0):
+        """Cut all clips in one ffmpeg run without re-encoding.
+
+        Start times must be keyframes so the stream copy begins on a decodable
+        frame; each clip is its own fast-seeked input mapped to its own output.
+        """
+        cmd = ['ffmpeg', '-y', '-loglevel', 'error', '-nostats']
+        for start_time in start_times:
+            cmd += ['-ss', str(start_time), '-t', str(duration), '-i', str(self.input_file)]
+        for idx, output_path in enumerate(output_paths):
+            cmd += ['-map', f'{idx}:v:0', '-map', f'{idx}:a:0?', '-c', 'copy', str(output_path)]
+        subprocess.run(cmd, stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
+
     def extract_clip_raw(self, start_time: float, output_path: Path, duration: float = 5.0):
         """Extract a raw clip using hybrid seek for frame accuracy."""
         # Hybrid seeking:
@@ -108,7 +206,7 @@ class VisualBenchmark:
             slow_seek = start_time
 
         cmd = [
-            'ffmpeg', '-y',
+            'ffmpeg', '-y', '-loglevel', 'error', '-nostats',
             '-ss', str(fast_seek),
             '-i', str(self.input_file),
             '-ss', str(slow_seek),
@@ -117,54 +215,114 @@ class VisualBenchmark:
             '-c:a', 'copy',
             str(output_path)
         ]
-        subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
+        subprocess.run(cmd, stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
+
+    def _frame_size(self) -> Tuple[int, int]:
+        """(width, height) of decoded frames; encodes keep the source resolution."""
+        if self.frame_size is None:
+            meta = self.probe_video()
+            self.frame_size = (meta['width'], meta['height'])
+        return self.frame_size
+
+    def _read_raw_frames(self, cmd: List[str], count: int) -> List[Image.Image]:
+        """Run ffmpeg writing rgb24 rawvideo to stdout and wrap each frame as an image.
+
+        Frames never touch the disk and skip the JPEG encode/decode round-trip.
+        """
+        width, height = self._frame_size()
+        frame_bytes = width * height * 3
+        cmd = cmd + ['-f', 'rawvideo', '-pix_fmt', 'rgb24', 'pipe:1']
+        result = subprocess.run(cmd, stdin=subprocess.DEVNULL, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, check=True)
+        if len(result.stdout) < frame_bytes * count:
+            raise RuntimeError(f"ffmpeg returned {len(result.stdout)} bytes, expected {frame_bytes * count}")
+        buf = memoryview(result.stdout)
+        return [
+            Image.frombuffer('RGB', (width, height), buf[n * frame_bytes:(n + 1) * frame_bytes], 'raw', 'RGB', 0, 1)
+            for n in range(count)
+        ]
+
+    def _decode_frames_av(self, video_path: Path, timestamps: List[float]) -> List[Image.Image]:
+        """Decode one frame per timestamp with PyAV, reusing one demuxer/decoder.
+
+        Same frame ffmpeg's accurate input seek picks: seek back to the keyframe,
+        then decode forward to the first frame at or after the timestamp.
+        """
+        frames = []
+        with av.open(str(video_path)) as container:
+            stream = container.streams.video[0]
+            time_base = stream.time_base
+            # ffmpeg's -ss is relative to the stream start, PyAV times are not
+            start = float(stream.start_time * time_base) if stream.start_time is not None else 0.0
+            for ts in timestamps:
+                target = start + ts
+                container.seek(int(target / time_base), stream=stream)
+                frame = None
+                for frame in container.decode(stream):
+                    if frame.time is not None and frame.time >= target:
+                        break
+                if frame is None:
+                    raise RuntimeError(f"No frame decoded at {ts:.2f}s in {video_path}")
+                frames.append(frame.to_image())
+        return frames
+
+    def extract_frames_batch(self, video_path: Path, timestamps: List[float]) -> List[Image.Image]:
+        """Extract one frame per timestamp from the VIDEO with a single ffmpeg run.
+
+        Every timestamp is its own fast-seeked input trimmed to one frame; the
+        frames are concatenated into one rawvideo stream, so N frames cost one
+        process launch instead of N. With PyAV installed no process is launched.
+        """
+        if av is not None:
+            return self._decode_frames_av(video_path, timestamps)
+        cmd = ['ffmpeg', '-y', '-loglevel', 'error', '-nostats']
+        for ts in timestamps:
+            cmd += ['-ss', str(ts), '-i', str(video_path)]
+        chains = ';'.join(f'[{idx}:v:0]trim=end_frame=1,setpts=PTS-STARTPTS[f{idx}]'
+                          for idx in range(len(timestamps)))
+        inputs = ''.join(f'[f{idx}]' for idx in range(len(timestamps)))
+        cmd += ['-filter_complex', f'{chains};{inputs}concat=n={len(timestamps)}:v=1:a=0[out]', '-map', '[out]',
+                # one frame per input: never drop/duplicate to hit a frame rate.
+                # -vsync rather than -fps_mode (5.1+) so FFmpeg 4.x keeps working
+                '-vsync', 'passthrough']
+        return self._read_raw_frames(cmd, len(timestamps))
 
     def extract_frame_at_timestamp(self, video_path: Path, timestamp: float) -> Image.Image:
         """Extract a frame from the VIDEO at a specific timestamp."""
-        frame_path = self.temp_dir / f"frame_{timestamp:.2f}.jpg"
-        cmd = [
-            'ffmpeg', '-y',
-            '-ss', str(timestamp),
-            '-i', str(video_path),
-            '-frames:v', '1',
-            '-q:v', '2',
-            str(frame_path)
-        ]
-        subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
-        return Image.open(frame_path)
+        return self.extract_frames_batch(video_path, [timestamp])[0]
 
     def extract_frame(self, video_path: Path, time_offset: float = 2.5) -> Image.Image:
         """Extract a frame from the CLIP at a specific offset."""
-        frame_path = self.temp_dir / f"{video_path.stem}_frame.jpg"
+        if av is not None:
+            return self._decode_frames_av(video_path, [time_offset])[0]
         cmd = [
-            'ffmpeg', '-y',
+            'ffmpeg', '-y', '-loglevel', 'error', '-nostats',
             '-ss', str(time_offset),
             '-i', str(video_path),
             '-frames:v', '1',
-            '-q:v', '2',
-            str(frame_path)
         ]
-        subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
-        return Image.open(frame_path)
+        return self._read_raw_frames(cmd, 1)[0]
 
-    def save_roi_preview(self, image: Image.Image, meta: Dict, sample_idx: int):
-        """Save a full-size image with ROI box drawn for validation."""
-        width = meta['width']
-        height = meta['height']
-        
-        # Calculate ROI box
-        crop_size = 512
+    def _compute_crop_box(self, width: int, height: int) -> Tuple[int, int, int, int]:
+        """Crop box centered at the ROI: self.roi_pos (0.25) of width, 0.5 of height."""
         cx = int(width * self.roi_pos)
         cy = int(height * 0.5)
         
-        left = max(0, cx - crop_size // 2)
-        top = max(0, cy - crop_size // 2)
-        right = min(width, left + crop_size)
-        bottom = min(height, top + crop_size)
+        left = max(0, cx - CROP_SIZE // 2)
+        top = max(0, cy - CROP_SIZE // 2)
+        right = min(width, left + CROP_SIZE)
+        bottom = min(height, top + CROP_SIZE)
         
         # Adjust if off-edge
-        if right - left < crop_size: left = right - crop_size
-        if bottom - top < crop_size: top = bottom - crop_size
+        if right - left < CROP_SIZE: left = right - CROP_SIZE
+        if bottom - top < CROP_SIZE: top = bottom - CROP_SIZE
+        
+        return (left, top, right, bottom)
+
+    def save_roi_preview(self, image: Image.Image, meta: Dict, sample_idx: int):
+        """Save a full-size image with ROI box drawn for validation."""
+        if self._crop_box is None:
+            self._crop_box = self._compute_crop_box(meta['width'], meta['height'])
+        left, top, right, bottom = self._crop_box
         
         preview = image.copy()
         draw = ImageDraw.Draw(preview)
@@ -183,37 +341,46 @@ class VisualBenchmark:
                               sample_idx: int,
                               resolution: Tuple[int, int]):
         """Stitch images side-by-side with labels."""
-        width, height = resolution
-        
-        # Crop size: 512x512
-        crop_size = 512
-        
-        # Calculate crop box centered at ROI
-        # ROI is self.roi_pos (0.25) of width, 0.5 of height
-        cx = int(width * self.roi_pos)
-        cy = int(height * 0.5)
-        
-        left = max(0, cx - crop_size // 2)
-        top = max(0, cy - crop_size // 2)
-        right = min(width, left + crop_size)
-        bottom = min(height, top + crop_size)
-        
-        # Adjust if off-edge
-        if right - left < crop_size: left = right - crop_size
-        if bottom - top < crop_size: top = bottom - crop_size
-        
-        crop_box = (left, top, right, bottom)
+        if self._crop_box is None:
+            self._crop_box = self._compute_crop_box(*resolution)
+        crop_box = self._crop_box
+        crop_size = CROP_SIZE
+        padding = CANVAS_PADDING
         
         # Presets order
         presets = ['Original', 'Low', 'High', 'Ultra']
         
-        # Calculate canvas size
-        # 4 images wide, some padding
-        padding = 20
-        canvas_width = (crop_size * 4) + (padding * 5)
-        canvas_height = crop_size + 100 # Space for header/footer
+        if self._canvas_template is None:
+            canvas_width, canvas_height = CANVAS_SIZE
+            self._canvas_template = np.full((canvas_height, canvas_width, 3), 30, dtype=np.uint8)
+        canvas_np = self._canvas_template.copy()
+        
+        # The crop box may run off a small frame (like PIL's crop, the
+        # uncovered part stays black), so clip it to the source and shift
+        # the destination by the same amount
+        left, top, right, bottom = crop_box
+        y = 80
         
-        canvas = Image.new('RGB', (canvas_width, canvas_height), (30, 30, 30))
+        # Paste crops by slice-assigning straight into the canvas array
+        for idx, preset_name in enumerate(presets):
+            img = images.get(preset_name)
+            if not img:
+                continue
+            
+            src = np.asarray(img.convert('RGB'))
+            height, width = src.shape[:2]
+            src_left, src_top = max(0, left), max(0, top)
+            src_right, src_bottom = min(width, right), min(height, bottom)
+            
+            x = padding + (idx * (crop_size + padding))
+            canvas_np[y:y + crop_size, x:x + crop_size] = 0
+            if src_right > src_left and src_bottom > src_top:
+                dst_x = x + (src_left - left)
+                dst_y = y + (src_top - top)
+                canvas_np[dst_y:dst_y + (src_bottom - src_top), dst_x:dst_x + (src_right - src_left)] = \
+                    src[src_top:src_bottom, src_left:src_right]
+        
+        canvas = Image.fromarray(canvas_np)
         draw = ImageDraw.Draw(canvas)
         font_title = get_font(36)
         font_label = get_font(24)
@@ -222,19 +389,11 @@ class VisualBenchmark:
         draw.text((padding, 20), f"Sample #{sample_idx+1} - ROI Focus: Left Eye Center", fill=(200, 200, 200), font=font_title)
         
         for idx, preset_name in enumerate(presets):
-            img = images.get(preset_name)
-            if not img:
+            if not images.get(preset_name):
                 continue
             
-            # Crop
-            crop = img.crop(crop_box)
-            
             # Position
             x = padding + (idx * (crop_size + padding))
-            y = 80
-            
-            # Paste
-            canvas.paste(crop, (x, y))
             
             # Label
             time_val = times.get(preset_name, 0)
@@ -243,6 +402,8 @@ class VisualBenchmark:
             if preset_name == 'Original':
                 label_text = f"{preset_name}\n(Reference)"
                 label_color = (100, 200, 255)
+            elif preset_name not in times:
+                label_text = f"{preset_name}\nTime: shared pass"
             else:
                 label_text = f"{preset_name}\nTime: {time_val:.2f}s"
                 
@@ -257,6 +418,222 @@ class VisualBenchmark:
 
 
 
+    def _encode_workers(self, encoder_type: EncoderType) -> int:
+        """How many preset encodes to run at once."""
+        if self.jobs:
+            return self.jobs
+        if encoder_type == EncoderType.NVENC:
+            # One GPU: a couple of sessions overlap setup/teardown without
+            # hitting the consumer-card session cap
+            return 2
+        # libx265 is itself multi-threaded, so leave it half the cores
+        return max(1, min(3, (os.cpu_count() or 2) // 2))
+
+    def _make_core_pool(self, workers: int) -> Optional[queue.Queue]:
+        """Split the usable cores into one contiguous set per concurrent encode."""
+        if not hasattr(os, 'sched_setaffinity'):
+            print("   ⚠️  --pin-cores needs Linux (os.sched_setaffinity); running unpinned")
+            return None
+        cores = sorted(os.sched_getaffinity(0))
+        slots = max(1, min(workers, len(cores)))
+        per_slot = len(cores) // slots
+        pool = queue.Queue()
+        for k in range(slots):
+            # The last set also takes the cores left over by the division
+            end = (k + 1) * per_slot if k < slots - 1 else len(cores)
+            pool.put(set(cores[k * per_slot:end]))
+        return pool
+
+    @contextmanager
+    def _pinned_cores(self):
+        """Pin the calling worker thread to a free core set while its encode runs.
+
+        Linux affinity is per thread and inherited by processes it starts, so the
+        ffmpeg child stays on those cores without touching the other workers.
+        """
+        if self._core_pool is None:
+            yield
+            return
+        cores = self._core_pool.get()
+        previous = os.sched_getaffinity(0)
+        os.sched_setaffinity(0, cores)
+        try:
+            yield
+        finally:
+            os.sched_setaffinity(0, previous)
+            self._core_pool.put(cores)
+
+    def _encode_preset(self, ref_path: Path, sample_idx: int, q_name: str,
+                       q_preset: QualityPreset, encoder_type: EncoderType,
+                       logger: 'PrintLogger') -> Tuple[bool, float, Optional[Image.Image]]:
+        """Encode one preset and grab its comparison frame (runs in a worker thread).
+
+        Returns:
+            (success, encode seconds, extracted frame or None)
+        """
+        out_path = self.temp_dir / f"sample_{sample_idx}_{q_name}.mp4"
+
+        with self._pinned_cores():
+            # Timed from here so waiting for a free core set is not counted
+            start_t = time.time()
+            success = self.encoder.encode_video(
+                input_file=ref_path,
+                output_file=out_path,
+                encoder_type=encoder_type,
+                quality_preset=q_preset,
+                crf=None, # auto
+                resolution="4k",
+                progress_logger=logger,
+                errors_only=True
+            )
+
+            # Fallback to LIBX265 if failed
+            if not success and encoder_type != EncoderType.LIBX265:
+                print(f"   [{q_name}: NVENC Failed, Retrying with LIBX265]")
+                success = self.encoder.encode_video(
+                    input_file=ref_path,
+                    output_file=out_path,
+                    encoder_type=EncoderType.LIBX265,
+                    quality_preset=q_preset,
+                    crf=None,
+                    resolution="4k",
+                    progress_logger=logger,
+                    errors_only=True
+                )
+
+        duration = time.time() - start_t
+        # Frame extraction overlaps with the encodes still running
+        frame = self.extract_frame(out_path) if success else None
+        return success, duration, frame
+
+    def _encode_presets_single_pass(self, ref_path: Path, sample_idx: int,
+                                    quality_map: Dict[str, QualityPreset], encoder_type: EncoderType,
+                                    logger: 'PrintLogger') -> Tuple[bool, float, Dict[str, Image.Image]]:
+        """Encode every preset from one decode of the clip (ffmpeg split filter).
+
+        Returns:
+            (success, total encode seconds, extracted frame per preset)
+        """
+        outputs = [(self.temp_dir / f"sample_{sample_idx}_{q_name}.mp4", q_preset)
+                   for q_name, q_preset in quality_map.items()]
+        start_t = time.time()
+
+        success = self.encoder.encode_video_multi(
+            input_file=ref_path,
+            outputs=outputs,
+            encoder_type=encoder_type,
+            crf=None, # auto
+            resolution="4k",
+            progress_logger=logger,
+            errors_only=True
+        )
+
+        # Fallback to LIBX265 if failed
+        if not success and encoder_type != EncoderType.LIBX265:
+            print("   [NVENC Failed, Retrying with LIBX265]")
+            success = self.encoder.encode_video_multi(
+                input_file=ref_path,
+                outputs=outputs,
+                encoder_type=EncoderType.LIBX265,
+                crf=None,
+                resolution="4k",
+                progress_logger=logger,
+                errors_only=True
+            )
+
+        duration = time.time() - start_t
+        frames = {}
+        if success:
+            for q_name, (out_path, _) in zip(quality_map, outputs):
+                frames[q_name] = self.extract_frame(out_path)
+        return success, duration, frames
+
+    async def _fanout_encode(self, ref_path: Path, out_paths: Dict[str, Path],
+                             quality_map: Dict[str, QualityPreset], encoder_type: EncoderType,
+                             logger: 'PrintLogger') -> Dict[str, Tuple[bool, float]]:
+        """Decode the clip once and tee the raw frames into one FIFO per preset encoder.
+
+        Returns:
+            (success, seconds until that encoder finished) per preset
+        """
+        crf = self.encoder.calculate_crf("4k", "medium")  # what encode_video picks for crf=None
+        with tempfile.TemporaryDirectory(dir=self.temp_dir) as fifo_dir:
+            fifos = {q_name: os.path.join(fifo_dir, f"{q_name}.nut") for q_name in quality_map}
+            for fifo in fifos.values():
+                os.mkfifo(fifo)
+
+            start_t = time.time()
+            encoders = {}
+            for q_name, q_preset in quality_map.items():
+                cmd = self.encoder._build_ffmpeg_command(
+                    Path(fifos[q_name]), out_paths[q_name], encoder_type, q_preset, crf, errors_only=True)
+                encoders[q_name] = await asyncio.create_subprocess_exec(
+                    *cmd, stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+
+            # decoder -> pipe -> tee -> FIFOs
+            read_fd, write_fd = os.pipe()
+            try:
+                decoder = await asyncio.create_subprocess_exec(
+                    'ffmpeg', '-loglevel', 'error', '-nostats', '-i', str(ref_path),
+                    '-map', '0:v:0', '-c:v', 'rawvideo', '-f', 'nut', 'pipe:1',
+                    stdin=subprocess.DEVNULL, stdout=write_fd, stderr=subprocess.DEVNULL)
+                splitter = await asyncio.create_subprocess_exec(
+                    'tee', '-p', *fifos.values(), stdin=read_fd, stdout=subprocess.DEVNULL)
+            finally:
+                os.close(read_fd)
+                os.close(write_fd)
+
+            def abort():
+                # tee blocks opening a FIFO until its encoder opens it for reading, and the
+                # other encoders block until tee opens theirs: once one encoder fails
+                # (bad option, missing binary) the pipeline can never finish, so stop it all
+                for proc in (decoder, splitter, *encoders.values()):
+                    if proc.returncode is None:
+                        try:
+                            proc.kill()
+                        except ProcessLookupError:
+                            pass
+
+            async def finish(q_name: str, proc) -> Tuple[str, Tuple[bool, float]]:
+                _, err = await proc.communicate()
+                if proc.returncode != 0:
+                    abort()
+                for line in err.decode(errors='replace').splitlines():
+                    logger.format_and_write(line)
+                out_path = out_paths[q_name]
+                ok = proc.returncode == 0 and out_path.exists() and out_path.stat().st_size > 0
+                return q_name, (ok, time.time() - start_t)
+
+            results = dict(await asyncio.gather(*(finish(q_name, proc) for q_name, proc in encoders.items())))
+            decoded = await decoder.wait() == 0
+            await splitter.wait()
+
+        if not decoded:
+            # Encoders saw a truncated stream: nothing they wrote is usable
+            return {q_name: (False, duration) for q_name, (_, duration) in results.items()}
+        return results
+
+    def _encode_presets_fanout(self, ref_path: Path, sample_idx: int,
+                               quality_map: Dict[str, QualityPreset], encoder_type: EncoderType,
+                               logger: 'PrintLogger') -> Dict[str, Tuple[bool, float, Optional[Image.Image]]]:
+        """Encode every preset concurrently from one shared decode (no multi-output encoder needed).
+
+        Returns:
+            (success, encode seconds, extracted frame or None) per preset
+        """
+        out_paths = {q_name: self.temp_dir / f"sample_{sample_idx}_{q_name}.mp4" for q_name in quality_map}
+        results = asyncio.run(self._fanout_encode(ref_path, out_paths, quality_map, encoder_type, logger))
+
+        # Fallback to LIBX265 if failed
+        if not all(ok for ok, _ in results.values()) and encoder_type != EncoderType.LIBX265:
+            print("   [NVENC Failed, Retrying with LIBX265]")
+            results = asyncio.run(self._fanout_encode(ref_path, out_paths, quality_map, EncoderType.LIBX265, logger))
+
+        return {
+            q_name: (ok, duration, self.extract_frame(out_paths[q_name]) if ok else None)
+            for q_name, (ok, duration) in results.items()
+        }
+
     def run(self):
         # Setup logging
         import logging
@@ -266,9 +643,24 @@ class VisualBenchmark:
         
         # Probe
         meta = self.probe_video()
+        self.frame_size = (meta['width'], meta['height'])
+        self._crop_box = self._compute_crop_box(meta['width'], meta['height'])
         print(f"   Resolution: {meta['width']}x{meta['height']}, Duration: {meta['duration']:.2f}s")
         
-        timestamps = self.generate_random_timestamps(meta['duration'])
+        # H.264/HEVC sources: start every clip on a keyframe and stream-copy them
+        # all in one pass. Anything else goes through the per-clip re-encode.
+        keyframes = self._load_keyframes(meta['codec'])
+        if keyframes.size and not self.random_samples:
+            timestamps = self.generate_keyframe_timestamps(meta['duration'])
+        else:
+            timestamps = self.generate_random_timestamps(meta['duration'])
+        ref_paths = [self.temp_dir / f"sample_{i}_ref.mp4" for i in range(len(timestamps))]
+
+        if keyframes.size:
+            timestamps = self.snap_to_keyframes(timestamps)
+            print("Extracting source clips (stream copy)...", end="", flush=True)
+            self.extract_clips_copy(timestamps, ref_paths)
+            print(" Done.")
         
         # Quality mapping
         quality_map = {
@@ -280,8 +672,23 @@ class VisualBenchmark:
         # Select encoder dynamically
         encoder_type = self.encoder.get_optimal_encoder()
             
+        workers = self._encode_workers(encoder_type)
         print(f"   Using Encoder: {encoder_type.value}")
         print(f"   Samples: {self.samples}")
+        if self.fanout and not (hasattr(os, 'mkfifo') and shutil.which('tee')):
+            print("   ⚠️  --fanout needs os.mkfifo and tee (Linux); encoding each preset separately")
+            self.fanout = False
+        if self.single_pass:
+            print("   Single pass: one decode split to every preset")
+        elif self.fanout:
+            print(f"   Fan-out: one decode piped to {len(quality_map)} encoder processes")
+        else:
+            print(f"   Concurrent encodes: {workers}")
+            if self.pin_cores:
+                self._core_pool = self._make_core_pool(workers)
+                if self._core_pool is not None:
+                    core_sets = list(self._core_pool.queue)
+                    print(f"   Pinned core sets: {', '.join(f'{min(c)}-{max(c)}' for c in core_sets)}")
         print("-" * 60)
 
         logger = PrintLogger()
@@ -292,6 +699,15 @@ class VisualBenchmark:
             'High': [],
             'Ultra': []
         }
+        if self.single_pass:
+            # Presets share one process, so only the combined time is measured
+            all_times = {'All': []}
+
+        # Reference frames come straight from the SOURCE (pixel perfect), all in
+        # one ffmpeg run. Offset = ts + 2.5 (middle of clip)
+        print("Extracting reference frames...", end="", flush=True)
+        original_frames = self.extract_frames_batch(self.input_file, [ts + 2.5 for ts in timestamps])
+        print(" Done.")
 
         for i, ts in enumerate(timestamps):
             print(f"\nProcessing Sample {i+1}/{self.samples} at timestamp {ts:.2f}s")
@@ -299,15 +715,14 @@ class VisualBenchmark:
             sample_images = {}
             sample_times = {}
             
-            # 1. Original (Reference) - Extract directly from source for best quality
+            # 1. Original (Reference) - frame already extracted from the source above
             print("   Extracting Original Reference...", end="", flush=True)
-            ref_path = self.temp_dir / f"sample_{i}_ref.mp4"
+            ref_path = ref_paths[i]
             # We still need the clip for encoding source, but image comes from source
-            self.extract_clip_raw(ts, ref_path)
+            if not keyframes.size:
+                self.extract_clip_raw(ts, ref_path)
             
-            # Key Change: Extract frame from SOURCE video (pixel perfect)
-            # Offset = ts + 2.5 (middle of clip)
-            sample_images['Original'] = self.extract_frame_at_timestamp(self.input_file, ts + 2.5)
+            sample_images['Original'] = original_frames[i]
             sample_times['Original'] = 0
             print(" Done.")
             
@@ -316,56 +731,50 @@ class VisualBenchmark:
                 self.save_roi_preview(sample_images['Original'], meta, i)
 
             # 2. Transcode Presets
-            for q_name, q_preset in quality_map.items():
-                print(f"   Encoding {q_name}...", end="", flush=True)
-                
-                # Output path
-                out_path = self.temp_dir / f"sample_{i}_{q_name}.mp4"
-                
-                # Encode
-                start_t = time.time()
-                
-                # Debug: Print command
-                try:
-                    debug_cmd = self.encoder._build_ffmpeg_command(
-                         ref_path, out_path, encoder_type, q_preset, self.encoder.calculate_crf("4k", "medium"), resolution="4k"
-                    )
-                except:
-                    pass
-
-                success = self.encoder.encode_video(
-                    input_file=ref_path,
-                    output_file=out_path,
-                    encoder_type=encoder_type,
-                    quality_preset=q_preset,
-                    crf=None, # auto
-                    resolution="4k",
-                    progress_logger=logger
-                )
-                
-                # Fallback to LIBX265 if failed
-                if not success and encoder_type != EncoderType.LIBX265:
-                    print("   [NVENC Failed, Retrying with LIBX265]...", end="", flush=True)
-                    success = self.encoder.encode_video(
-                        input_file=ref_path,
-                        output_file=out_path,
-                        encoder_type=EncoderType.LIBX265,
-                        quality_preset=q_preset,
-                        crf=None,
-                        resolution="4k",
-                        progress_logger=logger
-                    )
-
-                end_t = time.time()
-                
+            if self.single_pass:
+                print(f"   Encoding {', '.join(quality_map)} (single pass)...")
+                success, duration, frames = self._encode_presets_single_pass(ref_path, i, quality_map, encoder_type, logger)
                 if success:
-                    duration = end_t - start_t
-                    print(f" Done ({duration:.2f}s)")
-                    sample_times[q_name] = duration
-                    sample_images[q_name] = self.extract_frame(out_path)
-                    all_times[q_name].append(duration)
+                    print(f"   All: Done ({duration:.2f}s)")
+                    all_times['All'].append(duration)
+                    sample_images.update(frames)
                 else:
-                    print(" Failed!")
+                    print("   All: Failed!")
+                self.create_comparison_image(sample_images, sample_times, i, (meta['width'], meta['height']))
+                continue
+
+            if self.fanout:
+                print(f"   Encoding {', '.join(quality_map)} (shared decode)...")
+                for q_name, (success, duration, frame) in self._encode_presets_fanout(
+                        ref_path, i, quality_map, encoder_type, logger).items():
+                    if success:
+                        print(f"   {q_name}: Done ({duration:.2f}s)")
+                        sample_times[q_name] = duration
+                        sample_images[q_name] = frame
+                    else:
+                        print(f"   {q_name}: Failed!")
+            else:
+                # Concurrently; each preset is its own ffmpeg process
+                print(f"   Encoding {', '.join(quality_map)} ({workers} at a time)...")
+                with ThreadPoolExecutor(max_workers=workers) as executor:
+                    futures = {
+                        executor.submit(self._encode_preset, ref_path, i, q_name, q_preset, encoder_type, logger): q_name
+                        for q_name, q_preset in quality_map.items()
+                    }
+                    for future in as_completed(futures):
+                        q_name = futures[future]
+                        success, duration, frame = future.result()
+                        if success:
+                            print(f"   {q_name}: Done ({duration:.2f}s)")
+                            sample_times[q_name] = duration
+                            sample_images[q_name] = frame
+                        else:
+                            print(f"   {q_name}: Failed!")
+
+            # Keep the statistics in preset order regardless of completion order
+            for q_name in quality_map:
+                if q_name in sample_times:
+                    all_times[q_name].append(sample_times[q_name])
             
             # 3. Create Composite
             self.create_comparison_image(
@@ -387,8 +796,7 @@ class VisualBenchmark:
         print(f"{'Preset':<10} | {'Avg Time':<10} | {'Min Time':<10} | {'Max Time':<10} | {'Samples':<8}")
         print("-" * 60)
         
-        for preset in ['Low', 'High', 'Ultra']:
-            times = all_times[preset]
+        for preset, times in all_times.items():
             if times:
                 avg_t = sum(times) / len(times)
                 min_t = min(times)
@@ -405,6 +813,21 @@ def main():
     parser.add_argument('--input-file', type=Path, required=True, help='Input video file')
     parser.add_argument('--output-dir', type=Path, default=Path('benchmark_results'), help='Output directory')
     parser.add_argument('--samples', type=int, default=3, help='Number of samples')
+    parser.add_argument('--jobs', type=int, default=None,
+                        help='Preset encodes to run at once (default: 2 for NVENC, half the CPU cores up to 3 otherwise; '
+                             'use 1 for uncontended per-preset timings)')
+    parser.add_argument('--random', action='store_true',
+                        help='Sample random timestamps instead of evenly spaced keyframes')
+    parser.add_argument('--pin-cores', action='store_true',
+                        help='Linux: give each concurrent preset encode its own fixed set of CPU cores '
+                             'for steadier timings')
+    shared_decode = parser.add_mutually_exclusive_group()
+    shared_decode.add_argument('--single-pass', action='store_true',
+                               help='Decode each clip once and encode all presets from it in one ffmpeg run '
+                                    '(faster; reports only the combined encode time)')
+    shared_decode.add_argument('--fanout', action='store_true',
+                               help='Linux: decode each clip once and pipe the raw frames through FIFOs to '
+                                    'one encoder process per preset (for encoders unstable with multiple outputs)')
     
     args = parser.parse_args()
     
@@ -412,7 +835,9 @@ def main():
         print(f"Error: Input file {args.input_file} not found.")
         return 1
         
-    bench = VisualBenchmark(args.input_file, args.output_dir, args.samples)
+    bench = VisualBenchmark(args.input_file, args.output_dir, args.samples, jobs=args.jobs,
+                            single_pass=args.single_pass, pin_cores=args.pin_cores, fanout=args.fanout,
+                            random_samples=args.random)
     bench.run()
     return 0
 
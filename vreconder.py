@@ -9,17 +9,46 @@ VREconder - 统一跨平台CLI工具
     python vreconder.py setup --install-deps
 """
 
+import os
 import sys
 import argparse
-from pathlib import Path
+import importlib
+from functools import lru_cache
 
-# 确保项目路径
-PROJECT_ROOT = Path(__file__).parent
-sys.path.insert(0, str(PROJECT_ROOT))
+__version__ = "2.0.0"
 
+# 确保项目路径（直接运行时解释器已把脚本目录放进 sys.path，避免重复插入）
+PROJECT_ROOT = os.path.dirname(os.path.realpath(__file__))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
 
+
+def _P(s):
+    """argparse 的路径类型：参数转换时才导入 pathlib，help/version 等路径无需加载"""
+    from pathlib import Path
+    return Path(s)
+
+
+# batch / single 共用的选项取值
+_ENCODERS = ('libx265', 'hevc_nvenc', 'hevc_qsv')
+_QUALITIES = ('low', 'medium', 'high', 'ultra')
+
+# 子命令及其帮助文本（按帮助中的显示顺序）
+_SUBCOMMANDS = (
+    ('batch', '批量视频处理'),
+    ('maintenance', '系统维护'),
+    ('setup', '环境配置'),
+    ('single', '单文件处理'),
+    ('dash-merge', 'DASH视频分段合并'),
+)
+
+
+@lru_cache(maxsize=1)
 def create_main_parser():
-    """创建主命令解析器"""
+    """创建主命令解析器（包含全部子命令，用于帮助与错误提示）
+    
+    解析器可重复 parse_args，同一进程内多次调用 main() 时复用。
+    """
     parser = argparse.ArgumentParser(
         prog='vreconder',
         description='VREconder - 专业VR视频处理工具',
@@ -40,41 +69,40 @@ def create_main_parser():
         """
     )
     
-    subparsers = parser.add_subparsers(dest='command', help='可用命令')
-    
-    # 批量处理命令
-    batch_parser = subparsers.add_parser('batch', help='批量视频处理')
-    setup_batch_parser(batch_parser)
-    
-    # 维护命令
-    maintenance_parser = subparsers.add_parser('maintenance', help='系统维护')
-    setup_maintenance_parser(maintenance_parser)
+    parser.add_argument('-v', '--version', action='version', version=f'%(prog)s {__version__}')
     
-    # 配置命令
-    setup_parser = subparsers.add_parser('setup', help='环境配置')
-    setup_setup_parser(setup_parser)
-    
-    # 单文件处理命令
-    single_parser = subparsers.add_parser('single', help='单文件处理')
-    setup_single_parser(single_parser)
+    subparsers = parser.add_subparsers(dest='command', help='可用命令')
     
-    # DASH合并命令
-    dash_parser = subparsers.add_parser('dash-merge', help='DASH视频分段合并')
-    setup_dash_parser(dash_parser)
+    for name, help_text in _SUBCOMMANDS:
+        _COMMANDS[name][0](subparsers.add_parser(name, help=help_text))
     
     return parser
 
 
+@lru_cache(maxsize=1)
+def _main_help():
+    """顶层帮助文本：首次调用时由主解析器生成，之后复用，与解析器定义始终一致"""
+    return create_main_parser().format_help()
+
+
+@lru_cache(maxsize=len(_SUBCOMMANDS))
+def create_command_parser(command):
+    """单独创建一个子命令的解析器，与主解析器中的同名子解析器行为一致"""
+    parser = argparse.ArgumentParser(prog=f'vreconder {command}')
+    _COMMANDS[command][0](parser)
+    return parser
+
+
 def setup_batch_parser(parser):
     """设置批量处理子命令"""
     # 必需参数
-    parser.add_argument('--input-dir', type=Path, required=True, help='输入目录')
-    parser.add_argument('--output-dir', type=Path, required=True, help='输出目录')
+    parser.add_argument('--input-dir', type=_P, required=True, help='输入目录')
+    parser.add_argument('--output-dir', type=_P, required=True, help='输出目录')
     
     # 处理参数
-    parser.add_argument('--encoder', choices=['libx265', 'hevc_nvenc', 'hevc_qsv'], 
+    parser.add_argument('--encoder', choices=_ENCODERS, 
                        default='libx265', help='编码器类型')
-    parser.add_argument('--quality', choices=['low', 'medium', 'high', 'ultra'], 
+    parser.add_argument('--quality', choices=_QUALITIES, 
                        default='high', help='质量预设')
     parser.add_argument('--max-workers', type=int, default=2, help='并发任务数')
     parser.add_argument('--parallel-files', type=int, default=1, help='并发文件数')
@@ -99,6 +127,7 @@ def setup_maintenance_parser(parser):
     # 系统诊断
     system_parser = maintenance_subparsers.add_parser('system-diagnose', help='系统诊断')
     system_parser.add_argument('--full', action='store_true', help='完整诊断')
+    system_parser.add_argument('--refresh', action='store_true', help='忽略缓存，重新执行全部检测')
     
     # 配置验证
     config_parser = maintenance_subparsers.add_parser('config-validate', help='配置验证')
@@ -115,11 +144,11 @@ def setup_setup_parser(parser):
 
 def setup_single_parser(parser):
     """设置单文件处理子命令"""
-    parser.add_argument('--input-file', type=Path, required=True, help='输入文件')
-    parser.add_argument('--output-file', type=Path, required=True, help='输出文件')
-    parser.add_argument('--encoder', choices=['libx265', 'hevc_nvenc', 'hevc_qsv'], 
+    parser.add_argument('--input-file', type=_P, required=True, help='输入文件')
+    parser.add_argument('--output-file', type=_P, required=True, help='输出文件')
+    parser.add_argument('--encoder', choices=_ENCODERS, 
                        default='libx265', help='编码器类型')
-    parser.add_argument('--quality', choices=['low', 'medium', 'high', 'ultra'], 
+    parser.add_argument('--quality', choices=_QUALITIES, 
                        default='high', help='质量预设')
     parser.add_argument('--fast', '--extreme-speed', dest='fast', action='store_true', 
                        help='极速模式 (强制使用 NVENC + p7/Ultra 预设)')
@@ -127,145 +156,129 @@ def setup_single_parser(parser):
 
 def setup_dash_parser(parser):
     """设置DASH合并子命令"""
-    parser.add_argument('path', type=Path, help='包含m4s文件的文件夹路径或父目录路径')
+    parser.add_argument('path', type=_P, help='包含m4s文件的文件夹路径或父目录路径')
     parser.add_argument('--batch', action='store_true', help='批量处理所有子目录')
-    parser.add_argument('--output', '-o', type=Path, help='输出文件路径 (单文件夹处理时)')
-    parser.add_argument('--workers', '-w', type=int, default=4, help='并行处理任务数 (批量模式, 默认: 4)')
+    parser.add_argument('--output', '-o', type=_P, help='输出文件路径 (单文件夹处理时)')
+    parser.add_argument('--workers', '-w', type=int, default=None, help='并行处理任务数 (批量模式, 默认: 按CPU核数自动选择)')
+    parser.add_argument('--io-bound', action='store_true', help='批量模式以asyncio子进程并发合并，代替进程池')
     parser.add_argument('--dry-run', action='store_true', help='模拟运行，预览操作')
+    parser.add_argument('--yes', '-y', action='store_true', help='批量模式跳过确认，边扫描边处理')
     parser.add_argument('--verbose', '-v', action='store_true', help='详细输出')
 
 
-def handle_batch_command(args):
-    """处理批量处理命令"""
+# 各命令的处理对象：(模块, 属性, 导入失败时显示的名称)，执行到对应命令时才导入
+_HANDLERS = {
+    'batch': ('tools.batch.batch_cli', 'BatchCLI', '批量处理模块'),
+    'ffmpeg-check': ('tools.maintenance.ffmpeg_checker', 'main', 'FFmpeg检查工具'),
+    'system-diagnose': ('tools.maintenance.system_diagnose', 'main', '系统诊断工具'),
+    'config-validate': ('tools.maintenance.config_validator', 'main', '配置验证工具'),
+    'install-deps': ('tools.deployment.install_deps', 'main', '依赖安装工具'),
+    'setup-env': ('tools.deployment.setup_env', 'main', '环境配置工具'),
+    'single': ('src.main', 'main', '核心模块'),
+    'dash-batch': ('tools.batch_dash_merge', 'BatchDashMerger', 'DASH批量合并模块'),
+    'dash-workers': ('tools.batch_dash_merge', 'default_max_workers', 'DASH批量合并模块'),
+    'dash-single': ('src.combiners.dash_merger', 'DashMerger', 'DASH合并模块'),
+}
+
+
+def _load(key):
+    """导入 _HANDLERS[key] 对应的对象；失败时打印原因并返回 None"""
+    module_name, attr, label = _HANDLERS[key]
     try:
-        from tools.batch.batch_cli import BatchCLI
-        cli = BatchCLI()
-        
-        # 转换参数格式
-        batch_args = [
-            '--input-dir', str(args.input_dir),
-            '--output-dir', str(args.output_dir),
-            '--encoder', args.encoder,
-            '--quality', args.quality,
-            '--max-workers', str(args.max_workers),
-            '--parallel-files', str(args.parallel_files)
-        ]
-        
-        # 处理极速模式
-        if args.fast:
-            print("🚀 极速模式已激活: 强制使用 NVENC (Ultra/p7)")
-            # 找到encoder和quality的索引并替换 (如果有)
-            for i in range(len(batch_args)):
-                if batch_args[i] == '--encoder':
-                    batch_args[i+1] = 'hevc_nvenc'
-                elif batch_args[i] == '--quality':
-                    batch_args[i+1] = 'ultra'
-
-        
-        if args.dry_run:
-            batch_args.append('--dry-run')
-        if args.list_files:
-            batch_args.append('--list-files')
-        if args.verbose:
-            batch_args.append('--verbose')
-        
-        return cli.main(batch_args)
-        
+        return getattr(importlib.import_module(module_name), attr)
     except ImportError as e:
-        print(f"❌ 批量处理模块导入失败: {e}")
+        print(f"❌ {label}导入失败: {e}")
         print("请确保项目结构完整")
+        return None
+
+
+def handle_batch_command(args):
+    """处理批量处理命令"""
+    BatchCLI = _load('batch')
+    if BatchCLI is None:
         return 1
+    
+    encoder, quality = args.encoder, args.quality
+    # 处理极速模式
+    if args.fast:
+        print("🚀 极速模式已激活: 强制使用 NVENC (Ultra/p7)")
+        encoder, quality = 'hevc_nvenc', 'ultra'
+    
+    # 参数已解析为 Path/int，直接调用，不再转成字符串交给 BatchCLI 重新解析
+    return BatchCLI().run(
+        input_dir=args.input_dir,
+        output_dir=args.output_dir,
+        encoder=encoder,
+        quality=quality,
+        max_workers=args.max_workers,
+        parallel_files=args.parallel_files,
+        dry_run=args.dry_run,
+        list_files=args.list_files,
+        verbose=args.verbose
+    )
 
 
 def handle_maintenance_command(args):
     """处理维护命令"""
     if args.maintenance_action == 'ffmpeg-check':
-        try:
-            from tools.maintenance.ffmpeg_checker import main as ffmpeg_main
-            sys.argv = ['ffmpeg_checker.py']
-            if args.test:
-                sys.argv.append('--test')
-            if args.diagnose:
-                sys.argv.append('--diagnose')
-            return ffmpeg_main()
-        except ImportError:
-            print("❌ FFmpeg检查工具不可用")
-            return 1
-    
+        tool_argv = []
+        if args.test:
+            tool_argv.append('--test')
+        if args.diagnose:
+            tool_argv.append('--diagnose')
     elif args.maintenance_action == 'system-diagnose':
-        try:
-            from tools.maintenance.system_diagnose import main as system_main
-            sys.argv = ['system_diagnose.py']
-            if args.full:
-                sys.argv.append('--full')
-            return system_main()
-        except ImportError:
-            print("❌ 系统诊断工具不可用")
-            return 1
-    
+        tool_argv = []
+        if args.full:
+            tool_argv.append('--full')
+        if args.refresh:
+            tool_argv.append('--refresh')
     elif args.maintenance_action == 'config-validate':
-        try:
-            from tools.maintenance.config_validator import main as config_main
-            sys.argv = ['config_validator.py']
-            if args.create_sample:
-                sys.argv.append('--create-sample')
-            return config_main()
-        except ImportError:
-            print("❌ 配置验证工具不可用")
-            return 1
-    
+        tool_argv = ['--create-sample'] if args.create_sample else []
     else:
         print("❌ 未知的维护命令")
         return 1
+    
+    tool_main = _load(args.maintenance_action)
+    return tool_main(tool_argv) if tool_main else 1
+
+
+# setup 选项 -> (_HANDLERS 键, 工具参数)，按优先级排列
+_SETUP_ACTIONS = (
+    ('install_deps', 'install-deps', ('--install',)),
+    ('check_env', 'install-deps', ('--check-only',)),
+    ('setup_all', 'setup-env', ('--setup-all',)),
+    ('create_dirs', 'setup-env', ('--create-dirs',)),
+)
 
 
 def handle_setup_command(args):
     """处理环境配置命令"""
-    try:
-        if args.install_deps:
-            from tools.deployment.install_deps import main as install_main
-            return install_main(['--install'])
-        
-        elif args.check_env:
-            from tools.deployment.setup_env import main as setup_main
-            return setup_main(['--check-only'])
-        
-        elif args.setup_all:
-            from tools.deployment.setup_env import main as setup_main
-            return setup_main(['--setup-all'])
-        
-        elif args.create_dirs:
-            from tools.deployment.setup_env import main as setup_main
-            return setup_main(['--create-dirs'])
-        
-        else:
-            print("请指定配置操作：--install-deps, --check-env, --setup-all, --create-dirs")
-            return 1
-            
-    except ImportError as e:
-        print(f"❌ 配置工具导入失败: {e}")
-        return 1
+    for flag, key, tool_argv in _SETUP_ACTIONS:
+        if getattr(args, flag):
+            tool_main = _load(key)
+            return tool_main(list(tool_argv)) if tool_main else 1
+    
+    print("请指定配置操作：--install-deps, --check-env, --setup-all, --create-dirs")
+    return 1
 
 
 def handle_single_command(args):
     """处理单文件处理命令"""
-    try:
-        from src.main import main as src_main
-        sys.argv = [
-            'main.py', 'split-encode-merge',
-            '--input-file', str(args.input_file),
-            '--output-file', str(args.output_file),
-            '--encoder', 'hevc_nvenc' if args.fast else args.encoder,
-            '--quality', 'ultra' if args.fast else args.quality
-        ]
-        
-        if args.fast:
-             print("🚀 极速模式已激活: 强制使用 NVENC (Ultra/p7)")
-        return src_main()
-        
-    except ImportError as e:
-        print(f"❌ 核心模块导入失败: {e}")
+    src_main = _load('single')
+    if src_main is None:
         return 1
+    
+    single_argv = [
+        'split-encode-merge',
+        '--input-file', os.fspath(args.input_file),
+        '--output-file', os.fspath(args.output_file),
+        '--encoder', 'hevc_nvenc' if args.fast else args.encoder,
+        '--quality', 'ultra' if args.fast else args.quality
+    ]
+    
+    if args.fast:
+         print("🚀 极速模式已激活: 强制使用 NVENC (Ultra/p7)")
+    return src_main(single_argv)
 
 
 def handle_dash_command(args):
@@ -273,38 +286,44 @@ def handle_dash_command(args):
     try:
         if args.batch:
             # 使用高效的批量处理器
-            from tools.batch_dash_merge import BatchDashMerger
+            BatchDashMerger = _load('dash-batch')
+            default_max_workers = _load('dash-workers')
+            if BatchDashMerger is None or default_max_workers is None:
+                return 1
             
             # 设置输出目录
             output_dir = args.output or (args.path / "merged")
+            workers = args.workers or default_max_workers(args.io_bound)
             
-            print(f"🎬 VREconder 批量DASH合并")
-            print(f"📁 输入目录: {args.path}")
-            print(f"📁 输出目录: {output_dir}")
-            print(f"🔧 并行任务: {args.workers}")
+            # 横幅一次格式化、一次写出
+            sys.stdout.write("🎬 VREconder 批量DASH合并\n📁 输入目录: {p}\n📁 输出目录: {o}\n🔧 并行任务: {w}\n".format(
+                p=args.path, o=output_dir, w=workers))
             
             # 创建批量处理器
-            batch_merger = BatchDashMerger(max_workers=args.workers, verbose=args.verbose)
+            batch_merger = BatchDashMerger(max_workers=workers, verbose=args.verbose,
+                                           io_bound=args.io_bound)
             
             # 执行批量处理
-            results = batch_merger.process_batch(args.path, output_dir, dry_run=args.dry_run)
+            stats = batch_merger.process_batch(args.path, output_dir, dry_run=args.dry_run,
+                                               assume_yes=args.yes)
             
-            if results and not args.dry_run:
+            if stats and not args.dry_run:
                 # 生成报告
                 report_file = batch_merger.generate_report(output_dir)
                 # 显示摘要
                 batch_merger.display_final_summary(report_file)
             
             # 返回适当的退出代码
-            if not results:
+            if not stats:
                 return 0 if args.dry_run else 1
             
-            failed_count = sum(1 for r in results if not r.success)
-            return 0 if failed_count == 0 else 1
+            return 0 if stats.failed == 0 else 1
             
         else:
             # 单文件夹处理
-            from src.combiners.dash_merger import DashMerger
+            DashMerger = _load('dash-single')
+            if DashMerger is None:
+                return 1
             
             merger = DashMerger(verbose=args.verbose)
             
@@ -327,45 +346,48 @@ def handle_dash_command(args):
             finally:
                 merger.cleanup()
             
-    except ImportError as e:
-        print(f"❌ DASH合并模块导入失败: {e}")
-        print("请确保项目结构完整")
-        return 1
     except Exception as e:
         print(f"❌ DASH合并出错: {e}")
         return 1
 
 
+# 子命令 -> (解析器设置函数, 处理函数)
+_COMMANDS = {
+    'batch': (setup_batch_parser, handle_batch_command),
+    'maintenance': (setup_maintenance_parser, handle_maintenance_command),
+    'setup': (setup_setup_parser, handle_setup_command),
+    'single': (setup_single_parser, handle_single_command),
+    'dash-merge': (setup_dash_parser, handle_dash_command),
+}
+
+
 def main():
     """主入口点"""
-    parser = create_main_parser()
+    argv = sys.argv[1:]
     
-    # 如果没有参数，显示帮助
-    if len(sys.argv) == 1:
-        parser.print_help()
+    # 如果没有参数，显示帮助；版本号不需要构建解析器
+    if argv in ([], ['-h'], ['--help']):
+        sys.stdout.write(_main_help())
+        return 0
+    if argv in (['-v'], ['--version']):
+        print(f"vreconder {__version__}")
         return 0
     
-    args = parser.parse_args()
-    
-    # 根据命令分发处理
-    if args.command == 'batch':
-        return handle_batch_command(args)
-    
-    elif args.command == 'maintenance':
-        return handle_maintenance_command(args)
-    
-    elif args.command == 'setup':
-        return handle_setup_command(args)
-    
-    elif args.command == 'single':
-        return handle_single_command(args)
-    
-    elif args.command == 'dash-merge':
-        return handle_dash_command(args)
+    # 第一个参数就是子命令时直接查表分发，只构建该子命令的解析器
+    command = _COMMANDS.get(argv[0])
+    if command is not None:
+        _, handler = command
+        args = create_command_parser(argv[0]).parse_args(argv[1:])
+        args.command = argv[0]
+        return handler(args)
     
-    else:
-        parser.print_help()
-        return 1
+    # 其他情况（未知命令、-h 加其他参数等）交给完整解析器给出帮助或错误
+    parser = create_main_parser()
+    args = parser.parse_args(argv)
+    if args.command:
+        return _COMMANDS[args.command][1](args)
+    sys.stdout.write(_main_help())
+    return 1
 
 
 if __name__ == '__main__':